@@ -17,13 +17,23 @@ class Category:
         self.name = name
         self.rules = rules
     
-    def apply(self, tag_bundle_set):
+    def apply(self, tag_bundle_set, context=None):
         """Determines whether a location belongs to this category or not
 
         :param tag_bundle_set: a set of tag bundles of osm elements at the location
+        :param context: EvaluationContext of the location shared by the categories (optional)
         :return: boolean whether the rules of this category are true for the given location
         """
-        return self.rules.apply(tag_bundle_set)
+        return self.rules.apply(tag_bundle_set, context)
+
+    def evaluate(self, tag_bundle_set, context=None):
+        """Determines whether a location belongs to this category or not, without debug meta info
+
+        :param tag_bundle_set: a set of tag bundles of osm elements at the location
+        :param context: EvaluationContext of the location shared by the categories (optional)
+        :return: boolean whether the rules of this category are true for the given location
+        """
+        return self.rules.evaluate(tag_bundle_set, context)
 
     def __str__(self):
         return self.str_template.format(name=self.name, rules=indent(str(self.rules), base_indent_num))
@@ -1,4 +1,5 @@
 from openlostcat.utils import error, indent, base_indent_num
+from openlostcat.evaluationcontext import EvaluationContext
 
 
 class CategoryCatalog:
@@ -20,18 +21,62 @@ class CategoryCatalog:
         if 'evaluationStrategy' in prop:
             self.evaluationStrategy = prop['evaluationStrategy']
 
-    def __init__(self, category_list, properties=None, debug=False):
+    def __init__(self, category_list, properties=None, debug=False, key_prefilter=True):
         """Initializes the catalog
 
         :param category_list: Category objects
         :param properties: directives for the category evaluation, see update_properties
         :param debug: Boolean for detailed output
+        :param key_prefilter: Boolean for skipping the categories whose necessary tag keys are missing at the location
         """
         if properties is None:
             properties = {}
         self.debug = debug
         self.update_properties(properties)
         self.categories = category_list
+        self.key_prefilter = key_prefilter
+        self.build_key_index()
+        self.evaluation = self.select_evaluation()
+
+    def build_key_index(self):
+        """Builds the inverted index of the categories by their necessary tag keys:
+        a category can only match a location having at least one of its necessary keys,
+        categories without such a condition are always candidates
+        """
+        self.unconditional_category_nums = set()
+        self.key_index = {}
+        for num, category in enumerate(self.categories):
+            keys = category.rules.get_necessary_keys()
+            if keys is None:
+                self.unconditional_category_nums.add(num)
+            else:
+                for key in keys:
+                    self.key_index.setdefault(key, set()).add(num)
+
+    def get_candidate_category_nums(self, tag_bundle_set, get_location_keys=None):
+        """Retrieves the categories that can match a location according to the key index
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :param get_location_keys: retrieval of the set of tag keys from another representation
+            of the tag bundle set (optional)
+        :return: the ordered indices of the candidate categories
+        """
+        if not self.key_prefilter or len(self.unconditional_category_nums) == len(self.categories):
+            return range(len(self.categories))
+        location_keys = get_location_keys(tag_bundle_set) if get_location_keys else set().union(*tag_bundle_set)
+        candidates = set(self.unconditional_category_nums)
+        for key, category_nums in self.key_index.items():
+            if key in location_keys:
+                candidates |= category_nums
+        return sorted(candidates)
+
+    def get_referenced_keys(self):
+        """Retrieves the tag keys looked up by the rules of the categories,
+        the tags of other keys do not affect the categorization
+
+        :return: frozenset of tag keys
+        """
+        return frozenset().union(*[category.rules.get_referenced_keys() for category in self.categories])
 
     def get_categories_enumerated_key_map(self):
         """Retrieves the categories with their rules
@@ -40,46 +85,103 @@ class CategoryCatalog:
         """
         return dict(enumerate([c.name for c in self.categories]))
 
-    def apply_fm_evaluation(self, tag_bundle_set):
-        """Categorizes a location (by its tag bundle set) with the first-matching category strategy (single output)
+    def apply_fm_evaluation(self, tag_bundle_set, context=None):
+        """Categorizes a location (by its tag bundle set) with the first-matching category strategy (single output),
+        without meta info
 
         :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
-        :return: list of matching categories
+        :param context: EvaluationContext of the location shared with other catalogs (optional)
+        :return: the first matching category
         """
-        for num, category in enumerate(self.categories):
-            (is_matching_category, op_result_meta_info) = category.apply(tag_bundle_set)
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        for num in self.get_candidate_category_nums(tag_bundle_set):
+            category = self.categories[num]
+            if category.evaluate(tag_bundle_set, context):
+                return num, category.name
+        return -1, None
+
+    def apply_fm_evaluation_debug(self, tag_bundle_set, context=None):
+        """Categorizes a location (by its tag bundle set) with the first-matching category strategy (single output),
+        with the matching tag bundles of the subexpressions evaluated as meta info
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :param context: EvaluationContext of the location shared with other catalogs (optional)
+        :return: the first matching category with meta info
+        """
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        for num in self.get_candidate_category_nums(tag_bundle_set):
+            category = self.categories[num]
+            (is_matching_category, op_result_meta_info) = category.apply(tag_bundle_set, context)
             if is_matching_category:
-                return (num, category.name, op_result_meta_info) if self.debug else (num, category.name)
-        return (-1, None, []) if self.debug else (-1, None)
+                return num, category.name, op_result_meta_info
+        return -1, None, []
 
-    def apply_all_evaluation(self, tag_bundle_set):
+    def apply_all_evaluation(self, tag_bundle_set, context=None):
         """Categorizes a location (by its tag bundle set) with the all-matching category strategy
-        (possible multiple output)
+        (possible multiple output), without meta info
 
         :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :param context: EvaluationContext of the location shared with other catalogs (optional)
         :return: list of matching categories
         """
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        categories_list = [(num, self.categories[num].name) for num in self.get_candidate_category_nums(tag_bundle_set)
+                           if self.categories[num].evaluate(tag_bundle_set, context)]
+        return categories_list if categories_list else [(-1, None)]
+
+    def apply_all_evaluation_debug(self, tag_bundle_set, context=None):
+        """Categorizes a location (by its tag bundle set) with the all-matching category strategy
+        (possible multiple output), with the matching tag bundles of the subexpressions evaluated as meta info
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :param context: EvaluationContext of the location shared with other catalogs (optional)
+        :return: list of matching categories with meta info
+        """
         categories_list = []
-        for num, category in enumerate(self.categories):
-            (is_matching_category, op_result_meta_info) = category.apply(tag_bundle_set)
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        for num in self.get_candidate_category_nums(tag_bundle_set):
+            category = self.categories[num]
+            (is_matching_category, op_result_meta_info) = category.apply(tag_bundle_set, context)
             if is_matching_category:
-                categories_list.append(
-                    (num, category.name, op_result_meta_info) if self.debug else (num, category.name))
-        return categories_list if categories_list else [(-1, None, []) if self.debug else (-1, None)]
+                categories_list.append((num, category.name, op_result_meta_info))
+        return categories_list if categories_list else [(-1, None, [])]
+
+    def select_evaluation(self):
+        """Chooses the evaluation of the locations by the strategy and the debug flag (once, at construction),
+        without debug no meta info is collected at all
+
+        :return: evaluation function of a tag bundle set and an optional EvaluationContext
+        """
+        evaluation_switcher = {
+            ("firstMatching", False): self.apply_fm_evaluation,
+            ("firstMatching", True): self.apply_fm_evaluation_debug,
+            ("all", False): self.apply_all_evaluation,
+            ("all", True): self.apply_all_evaluation_debug
+        }
+        return evaluation_switcher.get((self.evaluationStrategy, bool(self.debug)),
+                                       lambda x, context=None: error("Unsupported evaluation strategy: ",
+                                                                     self.evaluationStrategy))
 
-    def apply(self, tag_bundle_set):
+    def apply(self, tag_bundle_set, context=None):
         """Categorizes a location (by its tag bundle set) according to the given strategy (stored in the catalog)
         
         :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :param context: EvaluationContext of the location shared with other catalogs (optional, usually created here)
         :return: list of matching categories
         """
-        evaluation_switcher = {
-            "firstMatching": self.apply_fm_evaluation,
-            "all": self.apply_all_evaluation
-        }
-        return evaluation_switcher.get(self.evaluationStrategy,
-                                       lambda x: error("Unsupported evaluation strategy: ", self.evaluationStrategy))(
-            tag_bundle_set)
+        return self.evaluation(tag_bundle_set, context)
+
+    def apply_batch(self, tag_bundle_sets):
+        """Categorizes multiple locations (by their tag bundle sets) one by one
+
+        :param tag_bundle_sets: list of tag bundle sets, one for each location
+        :return: list of the matching categories for each location
+        """
+        return [self.apply(tag_bundle_set) for tag_bundle_set in tag_bundle_sets]
 
     def __str__(self):
         return self.str_template.format(categories=indent(
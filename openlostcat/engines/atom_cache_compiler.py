@@ -0,0 +1,152 @@
+"""
+The atom cache compiler evaluates the rules on bitmasks as the bitset compiler, with the results of the atomic filters
+cached for each osm object across the locations.
+
+The atomic filters of the rules are numbered, and the results of all of them for the tags of an osm object
+are a single integer (its atom vector). The same osm object is near many locations in a batch of nearby locations,
+so its atom vector is cached by the identity (type, id, version) of the object in a bounded LRU cache,
+together with its tag bundle (the version is missing from results without metadata, and the tags of an object
+change by edits or by the projection to the referenced keys), and the bitmask of an atomic filter for a location is gathered from the atom vectors of its objects.
+"""
+
+from collections import OrderedDict
+import threading
+from openlostcat.engines.closure_compiler import ClosureCompiler
+from openlostcat.engines.bitset_compiler import BitsetCompiler, TagBundleBitset, indices_to_mask
+
+
+class IdentifiedTagBundleSet(frozenset):
+    """A tag bundle set with the identities (type, id, version) of the osm objects of its tag bundles
+    (objects of identical tags are a single tag bundle with the identity of any of them)
+
+    """
+
+    def __new__(cls, identified_tag_bundles):
+        """Builds the tag bundle set
+
+        :param identified_tag_bundles: iterable of (identity, tag bundle) pairs
+        """
+        element_keys = {}
+        for element_key, tag_bundle in identified_tag_bundles:
+            element_keys.setdefault(tag_bundle, element_key)
+        tag_bundle_set = super().__new__(cls, element_keys)
+        tag_bundle_set.element_keys = element_keys
+        return tag_bundle_set
+
+    def __reduce__(self):
+        return IdentifiedTagBundleSet, ([(element_key, tag_bundle)
+                                         for tag_bundle, element_key in self.element_keys.items()],)
+
+
+class AtomVectorBitset(TagBundleBitset):
+    """A TagBundleBitset with the atom vectors of its tag bundles,
+    the bitmasks of the atomic filters are gathered at their first lookup
+
+    """
+
+    def __init__(self, tag_bundle_set, get_atom_vector):
+        """Numbers the tag bundles of a tag bundle set and retrieves their atom vectors
+
+        :param tag_bundle_set: set of dicts of tags of osm objects (IdentifiedTagBundleSet for caching)
+        :param get_atom_vector: function of the identity and the tag bundle of an osm object returning its atom vector
+        """
+        super().__init__(tag_bundle_set)
+        element_keys = getattr(tag_bundle_set, "element_keys", {})
+        self.atom_vectors = [get_atom_vector(element_keys.get(tag_bundle), tag_bundle)
+                             for tag_bundle in self.tag_bundles]
+        self.atom_masks = {}
+
+    def get_atom_mask(self, atom_num):
+        """Retrieves the bitmask of the tag bundles matching an atomic filter
+
+        :param atom_num: the number of the atomic filter
+        :return: integer bitmask
+        """
+        if atom_num not in self.atom_masks:
+            self.atom_masks[atom_num] = indices_to_mask(
+                [i for i, atom_vector in enumerate(self.atom_vectors) if atom_vector >> atom_num & 1],
+                len(self.tag_bundles))
+        return self.atom_masks[atom_num]
+
+
+class AtomCacheCompiler(BitsetCompiler):
+    """Compiles the rules as BitsetCompiler, with the atomic filters looking up the cached atom vectors
+    of the osm objects
+
+    """
+
+    def __init__(self, cache_size=65536):
+        """Initializer
+
+        :param cache_size: maximal number of osm objects whose atom vectors are cached
+        """
+        super().__init__()
+        self.cache_size = cache_size
+        # numbers of the atomic filters and their predicates of a tag bundle in the order of the numbers
+        self.atom_nums = {}
+        self.atom_predicates = []
+        # atom vectors by the identities and the tag bundles of the osm objects, the least recently used first
+        # (guarded by the lock, as locations may be categorized by multiple threads)
+        self.atom_vectors = OrderedDict()
+        self.lock = threading.Lock()
+
+    def compile_atomic_filter(self, atomic_filter):
+        """Numbers an atomic filter (equal atomic filters get the same number)
+
+        :param atomic_filter: AtomicFilter
+        :return: closure returning the bitmask of the matching tag bundles of an AtomVectorBitset
+        """
+        atom_num = self.atom_nums.get(atomic_filter)
+        if atom_num is None:
+            atom_num = self.atom_nums[atomic_filter] = len(self.atom_predicates)
+            self.atom_predicates.append(ClosureCompiler.compile_atomic_filter(atomic_filter))
+            # the cached atom vectors lack the new atomic filter
+            with self.lock:
+                self.atom_vectors.clear()
+        return lambda bitset: bitset.get_atom_mask(atom_num)
+
+    def compute_atom_vector(self, tag_bundle):
+        """Evaluates all the atomic filters on a tag bundle
+
+        :param tag_bundle: dict of tags of an osm object
+        :return: atom vector (integer with the bits of the matching atomic filters set)
+        """
+        atom_vector = 0
+        for atom_num, predicate in enumerate(self.atom_predicates):
+            if predicate(tag_bundle):
+                atom_vector |= 1 << atom_num
+        return atom_vector
+
+    def get_atom_vector(self, element_key, tag_bundle):
+        """Retrieves the atom vector of an osm object from the cache, evaluated at its first retrieval (thread-safe),
+        cached by its identity and its tag bundle, so that an object seen with other tags is evaluated again
+
+        :param element_key: (type, id, version) identity of the osm object (None if unknown, not cached then)
+        :param tag_bundle: dict of tags of the osm object
+        :return: atom vector
+        """
+        if element_key is None or element_key[1] is None:
+            return self.compute_atom_vector(tag_bundle)
+        cache_key = (element_key, tag_bundle)
+        with self.lock:
+            atom_vector = self.atom_vectors.get(cache_key)
+            if atom_vector is not None:
+                self.atom_vectors.move_to_end(cache_key)
+                return atom_vector
+        # evaluated outside the lock, an object evaluated by multiple threads at once gets the same atom vector
+        atom_vector = self.compute_atom_vector(tag_bundle)
+        with self.lock:
+            self.atom_vectors[cache_key] = atom_vector
+            self.atom_vectors.move_to_end(cache_key)
+            if len(self.atom_vectors) > self.cache_size:
+                self.atom_vectors.popitem(last=False)
+        return atom_vector
+
+    def prepare(self, tag_bundle_set):
+        """Numbers the tag bundle set of a location and retrieves the atom vectors of its osm objects
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+            (IdentifiedTagBundleSet, so that the atom vectors are cached)
+        :return: AtomVectorBitset
+        """
+        return AtomVectorBitset(tag_bundle_set, self.get_atom_vector)
@@ -0,0 +1,165 @@
+"""
+The bitset compiler evaluates set(filter)-level operators on integer bitmasks instead of python sets.
+
+The tag bundles of a location are numbered once and indexed by the keys and values looked up by the rules,
+so that an atomic filter is a few dictionary lookups, 'and'/'or'/'not' are the bitwise &, |, ~ operations,
+and the quantifiers ANY/ALL become "non-zero" and "equals the full mask" checks.
+No tag bundle is hashed again after the indexing.
+"""
+
+from openlostcat.engines.closure_compiler import ClosureCompiler
+
+
+def indices_to_mask(indices, size):
+    """Builds an integer bitmask from bit indices
+
+    :param indices: iterable of bit indices
+    :param size: number of bits
+    :return: integer bitmask
+    """
+    bits = bytearray((size >> 3) + 1)
+    for i in indices:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+class TagBundleBitset:
+    """A tag bundle set with numbered tag bundles and bitmask indices by the keys and key-value pairs
+    (a key is indexed at its first lookup, so only the keys needed by the evaluation are indexed)
+
+    """
+
+    def __init__(self, tag_bundle_set):
+        """Numbers the tag bundles of a tag bundle set
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        """
+        self.tag_bundles = list(tag_bundle_set)
+        self.full_mask = (1 << len(self.tag_bundles)) - 1
+        # results of shared subexpressions (references) for this location
+        self.memo = {}
+        self.key_indices = {}
+
+    def get_key_index(self, key):
+        """Retrieves the bitmask index of a key
+
+        :param key: tag key
+        :return: the bitmask of the tag bundles having the key,
+            and a dictionary of the bitmasks of the tag bundles by the values of the key
+        """
+        if key not in self.key_indices:
+            value_indices = {}
+            key_indices = []
+            for i, tag_bundle in enumerate(self.tag_bundles):
+                if key in tag_bundle:
+                    key_indices.append(i)
+                    value_indices.setdefault(tag_bundle[key], []).append(i)
+            size = len(self.tag_bundles)
+            self.key_indices[key] = (indices_to_mask(key_indices, size),
+                                     {value: indices_to_mask(indices, size)
+                                      for value, indices in value_indices.items()})
+        return self.key_indices[key]
+
+    def get_tag_bundles(self, mask):
+        """Retrieves the tag bundles of a bitmask (for debug purposes)
+
+        :param mask: integer bitmask
+        :return: set of tag bundles
+        """
+        return {tag_bundle for i, tag_bundle in enumerate(self.tag_bundles) if mask >> i & 1}
+
+
+class BitsetCompiler(ClosureCompiler):
+    """Compiles set(filter)-level operators into closures returning the bitmask of the matching tag bundles
+    of a TagBundleBitset, category(bool)-level operators are compiled as by ClosureCompiler
+
+    """
+
+    def compile_atomic_filter(self, atomic_filter):
+        """Chooses a specialized bitmask lookup for an atomic filter
+
+        :param atomic_filter: AtomicFilter
+        :return: closure returning the bitmask of the matching tag bundles of a TagBundleBitset
+        """
+        key = atomic_filter.key
+        if atomic_filter.is_any_value:
+            return lambda bitset: bitset.get_key_index(key)[0]
+        values = list(atomic_filter.values)
+        if len(values) == 1:
+            value = values[0]
+
+            def value_mask(value_masks):
+                return value_masks.get(value, 0)
+        else:
+            def value_mask(value_masks):
+                mask = 0
+                for v in values:
+                    mask |= value_masks.get(v, 0)
+                return mask
+        if atomic_filter.is_optional_key:
+            def optional_key_mask(bitset):
+                key_mask, value_masks = bitset.get_key_index(key)
+                return value_mask(value_masks) | (bitset.full_mask ^ key_mask)
+            return optional_key_mask
+        return lambda bitset: value_mask(bitset.get_key_index(key)[1])
+
+    @staticmethod
+    def compile_filter_const(op):
+        return (lambda bitset: bitset.full_mask) if op.const_val else (lambda bitset: 0)
+
+    def compile_filter_not(self, op):
+        mask_of = self.compile_filter_op(op.filter_operator)
+        return lambda bitset: bitset.full_mask ^ mask_of(bitset)
+
+    def compile_filter_ref(self, op):
+        return self.memoize(op, self.compile_filter_op(op.filter_operator))
+
+    def compile_filter_and(self, masks_of):
+        """Fuses 'and' operands into a single bitwise conjunction
+
+        :param masks_of: operand closures returning bitmasks
+        :return: closure returning a bitmask
+        """
+        def conjunction(bitset):
+            mask = bitset.full_mask
+            for mask_of in masks_of:
+                mask &= mask_of(bitset)
+                if not mask:
+                    break
+            return mask
+        return conjunction
+
+    def compile_filter_or(self, masks_of):
+        """Fuses 'or' operands into a single bitwise disjunction
+
+        :param masks_of: operand closures returning bitmasks
+        :return: closure returning a bitmask
+        """
+        def disjunction(bitset):
+            mask = 0
+            for mask_of in masks_of:
+                mask |= mask_of(bitset)
+                if mask == bitset.full_mask:
+                    break
+            return mask
+        return disjunction
+
+    def compile_any(self, op):
+        mask_of = self.compile_filter_op(op.filter_operator)
+        return lambda bitset: mask_of(bitset) != 0
+
+    def compile_all(self, op):
+        mask_of = self.compile_filter_op(op.filter_operator)
+        return lambda bitset: mask_of(bitset) == bitset.full_mask
+
+    def prepare(self, tag_bundle_set):
+        """Numbers and indexes the tag bundle set of a location
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :return: TagBundleBitset
+        """
+        return TagBundleBitset(tag_bundle_set)
+
+    @staticmethod
+    def get_location_keys(bitset):
+        return set().union(*bitset.tag_bundles)
@@ -0,0 +1,328 @@
+"""
+The closure compiler lowers a parsed category catalog into nested python closures,
+so that categorizing a location does not walk the operator tree any more.
+
+Set(filter)-level operators are element-wise by definition (a tag bundle is kept or dropped on its own),
+therefore a whole filter subexpression is fused into a single per-bundle predicate,
+and only the quantifiers iterate over the tag bundle set.
+"""
+
+from functools import reduce
+from openlostcat.utils import error
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolNOT, BoolREF, BoolConst, BoolIMPL
+from openlostcat.operators.filter_operators import FilterAND, FilterOR, FilterNOT, FilterREF, FilterIMPL, \
+    AtomicFilter, FilterConst
+from openlostcat.operators.quantifier_operators import ANY, ALL
+from openlostcat.parsers.subexpressionsharer import SubexpressionSharer
+from openlostcat.evaluationcontext import EvaluationContext
+
+
+class ClosureCompiler:
+    """Compiles category(bool)-level operators into closures returning a single bool for the EvaluationContext
+    of a location, and set(filter)-level operators into predicates returning a single bool for a tag bundle
+
+    """
+
+    def __init__(self):
+        # compiled closures by operator object, so that shared subexpressions (references) are compiled only once
+        self.compiled_bool_ops = {}
+        self.compiled_filter_ops = {}
+        # subexpressions occurring multiple times in the rules, their results are memoized for a location
+        self.shared_ops = set()
+
+    @staticmethod
+    def compile_atomic_filter(atomic_filter):
+        """Chooses a specialized predicate for an atomic filter
+
+        :param atomic_filter: AtomicFilter
+        :return: predicate of a tag bundle
+        """
+        key = atomic_filter.key
+        if atomic_filter.is_any_value:
+            return lambda tag_bundle: key in tag_bundle
+        values = frozenset(atomic_filter.values)
+        if atomic_filter.is_optional_key:
+            if not values:
+                return lambda tag_bundle: key not in tag_bundle
+            if len(values) == 1:
+                value = next(iter(values))
+                return lambda tag_bundle: key not in tag_bundle or tag_bundle[key] == value
+            return lambda tag_bundle: key not in tag_bundle or tag_bundle[key] in values
+        if not values:
+            return lambda tag_bundle: False
+        if len(values) == 1:
+            value = next(iter(values))
+            return lambda tag_bundle: tag_bundle.get(key) == value
+        return lambda tag_bundle: tag_bundle.get(key) in values
+
+    @staticmethod
+    def fuse_and(predicates):
+        """Fuses predicates into a single short-circuit conjunction
+
+        :param predicates: list of predicates (of a tag bundle or a tag bundle set)
+        :return: predicate (always true for no predicates)
+        """
+        return reduce(lambda p, q: lambda x: p(x) and q(x), predicates, lambda x: True)
+
+    @staticmethod
+    def fuse_or(predicates):
+        """Fuses predicates into a single short-circuit disjunction
+
+        :param predicates: list of predicates (of a tag bundle or a tag bundle set)
+        :return: predicate (always false for no predicates)
+        """
+        return reduce(lambda p, q: lambda x: p(x) or q(x), predicates, lambda x: False)
+
+    def compile_filter_op(self, op):
+        """Compiles a set(filter)-level operator into a per-bundle predicate
+
+        :param op: set(filter)-level operator
+        :return: predicate of a tag bundle
+        """
+        if op in self.compiled_filter_ops:
+            return self.compiled_filter_ops[op]
+        switcher = {
+            AtomicFilter: self.compile_atomic_filter,
+            FilterConst: self.compile_filter_const,
+            FilterAND: lambda x: self.compile_filter_and([self.compile_filter_op(o) for o in x.filter_operators]),
+            FilterOR: lambda x: self.compile_filter_or([self.compile_filter_op(o) for o in x.filter_operators]),
+            FilterNOT: self.compile_filter_not,
+            FilterIMPL: lambda x: self.compile_filter_op(x.impl_op),
+            FilterREF: self.compile_filter_ref
+        }
+        predicate = switcher.get(type(op), lambda x: error("Unsupported filter operator: ", x))(op)
+        self.compiled_filter_ops[op] = predicate
+        return predicate
+
+    @staticmethod
+    def compile_filter_const(op):
+        return (lambda tag_bundle: True) if op.const_val else (lambda tag_bundle: False)
+
+    def compile_filter_and(self, predicates):
+        return self.fuse_and(predicates)
+
+    def compile_filter_or(self, predicates):
+        return self.fuse_or(predicates)
+
+    def compile_filter_not(self, op):
+        predicate = self.compile_filter_op(op.filter_operator)
+        return lambda tag_bundle: not predicate(tag_bundle)
+
+    def compile_filter_ref(self, op):
+        return self.compile_filter_op(op.filter_operator)
+
+    def compile_bool_op(self, op):
+        """Compiles a category(bool)-level operator into a closure
+
+        :param op: category(bool)-level operator
+        :return: predicate of an EvaluationContext
+        """
+        if op in self.compiled_bool_ops:
+            return self.compiled_bool_ops[op]
+        switcher = {
+            ANY: self.compile_any,
+            ALL: self.compile_all,
+            BoolConst: lambda x: (lambda context: True) if x.const_val else (lambda context: False),
+            BoolAND: lambda x: self.fuse_and([self.compile_bool_op(o) for o in x.bool_operators]),
+            BoolOR: lambda x: self.fuse_or([self.compile_bool_op(o) for o in x.bool_operators]),
+            BoolNOT: self.compile_bool_not,
+            BoolIMPL: lambda x: self.compile_bool_op(x.impl_op),
+            BoolREF: self.compile_bool_ref
+        }
+        predicate = switcher.get(type(op), lambda x: error("Unsupported bool operator: ", x))(op)
+        if op in self.shared_ops and self.is_memoizable(op):
+            predicate = self.memoize(op, predicate)
+        self.compiled_bool_ops[op] = predicate
+        return predicate
+
+    @staticmethod
+    def is_memoizable(op):
+        """Determines whether the result of a shared subexpression is to be memoized for a location
+
+        :param op: category(bool)-level operator
+        :return: False for constants, references (memoized by themselves) and quantifiers without cache
+        """
+        if isinstance(op, (ANY, ALL)):
+            return op.with_cache
+        return not isinstance(op, (BoolConst, BoolREF))
+
+    def compile_any(self, op):
+        predicate = self.compile_filter_op(op.filter_operator)
+        return lambda context: any(map(predicate, context.tag_bundle_set))
+
+    def compile_all(self, op):
+        predicate = self.compile_filter_op(op.filter_operator)
+        return lambda context: all(map(predicate, context.tag_bundle_set))
+
+    def compile_bool_not(self, op):
+        predicate = self.compile_bool_op(op.bool_operator)
+        return lambda context: not predicate(context)
+
+    def compile_bool_ref(self, op):
+        predicate = self.compile_bool_op(op.bool_operator)
+        return self.memoize(op, predicate) if op.with_cache else predicate
+
+    @staticmethod
+    def memoize(op, predicate):
+        """Memoizes the result of a compiled subexpression for the location being categorized
+
+        :param op: the operator compiled
+        :param predicate: the compiled closure
+        :return: closure caching the result in the memo of the evaluation context of the location
+        """
+        def memoized_predicate(context):
+            if op not in context.memo:
+                context.memo[op] = predicate(context)
+            return context.memo[op]
+        return memoized_predicate
+
+    def prepare(self, tag_bundle_set):
+        """Converts a tag bundle set to the input of the compiled closures (once per location)
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :return: EvaluationContext of the tag bundle set, compiled quantifiers iterate the tag bundle set directly
+        """
+        return EvaluationContext(tag_bundle_set)
+
+    @staticmethod
+    def get_location_keys(compiled_input):
+        """Retrieves the tag keys of a location from the input of the compiled closures (for the key prefilter)
+
+        :param compiled_input: EvaluationContext prepared
+        :return: set of tag keys
+        """
+        return set().union(*compiled_input.tag_bundle_set)
+
+    def compile(self, category_catalog):
+        """Compiles all the categories of a catalog
+
+        :param category_catalog: CategoryCatalog
+        :return: CompiledCategoryCatalog
+        """
+        return self.compile_catalogs([category_catalog])[0]
+
+    def compile_catalogs(self, category_catalogs):
+        """Compiles multiple catalogs into closures shared among them,
+        so that a subexpression occurring in multiple catalogs is evaluated only once for a location
+        (if the catalogs are evaluated with the same compiled input)
+
+        :param category_catalogs: list of CategoryCatalog objects (usually parsed with a common SubexpressionSharer)
+        :return: list of CompiledCategoryCatalog objects
+        """
+        self.shared_ops = SubexpressionSharer.get_shared_subexpressions(
+            [category.rules for category_catalog in category_catalogs for category in category_catalog.categories])
+        return [self.create_compiled_catalog(category_catalog,
+                                             [self.compile_bool_op(category.rules)
+                                              for category in category_catalog.categories])
+                for category_catalog in category_catalogs]
+
+    def create_compiled_catalog(self, category_catalog, compiled_rules):
+        """Creates the compiled catalog of the compiled rules
+
+        :param category_catalog: the CategoryCatalog being compiled
+        :param compiled_rules: compiled predicates of the categories in the order of the catalog
+        :return: CompiledCategoryCatalog
+        """
+        return CompiledCategoryCatalog(category_catalog, compiled_rules, self.prepare, self.get_location_keys)
+
+
+class CompiledCategoryCatalog:
+    """A category catalog evaluated by compiled closures instead of the operator tree,
+    giving the same results as the CategoryCatalog it was compiled from
+
+    Debug output contains the matching tag bundles of the operators, hence it is delegated to the original catalog.
+    """
+
+    def __init__(self, category_catalog, compiled_rules, prepare=None, get_location_keys=None):
+        """Initializer
+
+        :param category_catalog: the CategoryCatalog being compiled
+        :param compiled_rules: compiled predicates of the categories in the order of the catalog
+        :param prepare: conversion of the tag bundle set to the input of the compiled predicates (optional)
+        :param get_location_keys: retrieval of the tag keys from the input of the compiled predicates (optional)
+        """
+        if prepare is None:
+            prepare = ClosureCompiler().prepare
+        if get_location_keys is None:
+            get_location_keys = ClosureCompiler.get_location_keys
+        self.category_catalog = category_catalog
+        self.prepare = prepare
+        self.get_location_keys = get_location_keys
+        self.compiled_categories = [(num, category.name, rules) for (num, category), rules
+                                    in zip(enumerate(category_catalog.categories), compiled_rules)]
+        self.evaluation = self.select_evaluation()
+
+    def get_categories_enumerated_key_map(self):
+        """Retrieves the categories with their rules
+
+        :return: a dictionary of categories
+        """
+        return self.category_catalog.get_categories_enumerated_key_map()
+
+    def apply_fm_evaluation(self, tag_bundle_set, compiled_input=None):
+        """Categorizes a location (by its tag bundle set) with the first-matching category strategy (single output)
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :param compiled_input: the tag bundle set prepared, shared with other catalogs (optional)
+        :return: the first matching category
+        """
+        if compiled_input is None:
+            compiled_input = self.prepare(tag_bundle_set)
+        for num in self.category_catalog.get_candidate_category_nums(compiled_input, self.get_location_keys):
+            num, name, rules = self.compiled_categories[num]
+            if rules(compiled_input):
+                return num, name
+        return -1, None
+
+    def apply_all_evaluation(self, tag_bundle_set, compiled_input=None):
+        """Categorizes a location (by its tag bundle set) with the all-matching category strategy
+        (possible multiple output)
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :param compiled_input: the tag bundle set prepared, shared with other catalogs (optional)
+        :return: list of matching categories
+        """
+        if compiled_input is None:
+            compiled_input = self.prepare(tag_bundle_set)
+        categories_list = [(num, name) for num, name, rules
+                           in map(self.compiled_categories.__getitem__,
+                                  self.category_catalog.get_candidate_category_nums(compiled_input,
+                                                                                    self.get_location_keys))
+                           if rules(compiled_input)]
+        return categories_list if categories_list else [(-1, None)]
+
+    def apply(self, tag_bundle_set, compiled_input=None):
+        """Categorizes a location (by its tag bundle set) according to the strategy of the catalog
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :param compiled_input: the tag bundle set prepared by the compiler, shared with other catalogs
+            (optional, usually prepared here)
+        :return: list of matching categories
+        """
+        return self.evaluation(tag_bundle_set, compiled_input)
+
+    def select_evaluation(self):
+        """Chooses the evaluation of the locations by the strategy of the catalog (once, at construction)
+
+        :return: evaluation function of a tag bundle set and an optional compiled input
+        """
+        if self.category_catalog.debug:
+            return lambda tag_bundle_set, compiled_input=None: self.category_catalog.apply(tag_bundle_set)
+        evaluation_switcher = {
+            "firstMatching": self.apply_fm_evaluation,
+            "all": self.apply_all_evaluation
+        }
+        return evaluation_switcher.get(self.category_catalog.evaluationStrategy,
+                                       lambda x, compiled_input=None: error("Unsupported evaluation strategy: ",
+                                                       self.category_catalog.evaluationStrategy))
+
+    def apply_batch(self, tag_bundle_sets):
+        """Categorizes multiple locations (by their tag bundle sets) one by one
+
+        :param tag_bundle_sets: list of tag bundle sets, one for each location
+        :return: list of the matching categories for each location
+        """
+        return [self.apply(tag_bundle_set) for tag_bundle_set in tag_bundle_sets]
+
+    def __str__(self):
+        return str(self.category_catalog)
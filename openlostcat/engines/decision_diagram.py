@@ -0,0 +1,296 @@
+"""
+The decision diagram compiler builds a single reduced ordered decision diagram for a first-matching catalog.
+
+Each distinct quantified subexpression (ANY/ALL) of the rules is a boolean variable of the diagram,
+and the leaves are the indices of the categories (-1 for no matching category).
+A location is categorized by following one path from the root to a leaf,
+so that each quantified subexpression is evaluated at most once, and only those deciding the category.
+The quantified subexpressions themselves are evaluated by the closures of ClosureCompiler.
+"""
+
+from functools import reduce
+from openlostcat.utils import error
+from openlostcat.engines.closure_compiler import ClosureCompiler
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolNOT, BoolREF, BoolConst, BoolIMPL
+from openlostcat.operators.filter_operators import FilterNOT
+from openlostcat.operators.quantifier_operators import ANY, ALL
+
+
+class DecisionNode:
+    """A node of a decision diagram: a leaf with a value, or a test of a variable with low (false) and high (true)
+    successors
+
+    """
+
+    __slots__ = ("var", "low", "high", "value")
+
+    def __init__(self, var=None, low=None, high=None, value=None):
+        self.var = var
+        self.low = low
+        self.high = high
+        self.value = value
+
+    def is_leaf(self):
+        return self.var is None
+
+
+class DecisionDiagram:
+    """Factory of the hash-consed nodes of reduced ordered decision diagrams with arbitrary leaf values,
+    variables are ordered by their (integer) indices
+
+    """
+
+    def __init__(self):
+        self.leaves = {}
+        self.nodes = {}
+
+    def leaf(self, value):
+        """Retrieves the unique leaf of a value
+
+        :param value: hashable leaf value
+        :return: DecisionNode
+        """
+        # keyed by the type as well, since True == 1 and False == 0
+        key = (type(value), value)
+        if key not in self.leaves:
+            self.leaves[key] = DecisionNode(value=value)
+        return self.leaves[key]
+
+    def node(self, var, low, high):
+        """Retrieves the unique node testing a variable (a redundant test is reduced to its successor)
+
+        :param var: variable index
+        :param low: successor if the variable is false
+        :param high: successor if the variable is true
+        :return: DecisionNode
+        """
+        if low is high:
+            return low
+        key = (var, id(low), id(high))
+        if key not in self.nodes:
+            self.nodes[key] = DecisionNode(var, low, high)
+        return self.nodes[key]
+
+    def variable(self, var):
+        """Retrieves the boolean diagram of a single variable
+
+        :param var: variable index
+        :return: DecisionNode
+        """
+        return self.node(var, self.leaf(False), self.leaf(True))
+
+    def apply(self, operation, f, g):
+        """Combines two diagrams by an operation on their leaf values
+
+        :param operation: function of two leaf values
+        :param f: DecisionNode
+        :param g: DecisionNode
+        :return: DecisionNode
+        """
+        memo = {}
+
+        def combine(f, g):
+            key = (id(f), id(g))
+            if key not in memo:
+                if f.is_leaf() and g.is_leaf():
+                    memo[key] = self.leaf(operation(f.value, g.value))
+                else:
+                    var = min(n.var for n in (f, g) if not n.is_leaf())
+                    f_low, f_high = (f.low, f.high) if f.var == var else (f, f)
+                    g_low, g_high = (g.low, g.high) if g.var == var else (g, g)
+                    memo[key] = self.node(var, combine(f_low, g_low), combine(f_high, g_high))
+            return memo[key]
+        return combine(f, g)
+
+    def negate(self, f):
+        return self.apply(lambda a, b: not a, f, f)
+
+    def conjunction(self, f, g):
+        return self.apply(lambda a, b: a and b, f, g)
+
+    def disjunction(self, f, g):
+        return self.apply(lambda a, b: a or b, f, g)
+
+    def select(self, f, value, g):
+        """Builds the diagram giving a value where the boolean diagram f is true, and g elsewhere
+
+        :param f: boolean DecisionNode
+        :param value: leaf value
+        :param g: DecisionNode
+        :return: DecisionNode
+        """
+        return self.apply(lambda a, b: value if a else b, f, g)
+
+    def count_nodes(self, root):
+        """Counts the nodes reachable from a root (for statistics)
+
+        :param root: DecisionNode
+        :return: number of nodes including the leaves
+        """
+        visited = set()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if id(node) not in visited:
+                visited.add(id(node))
+                if not node.is_leaf():
+                    stack.extend([node.low, node.high])
+        return len(visited)
+
+    def get_depth(self, root):
+        """Retrieves the longest root-to-leaf path of a diagram, the most tests needed for a location
+
+        :param root: DecisionNode
+        :return: the number of tests
+        """
+        depths = {}
+
+        def depth(node):
+            if node.is_leaf():
+                return 0
+            if id(node) not in depths:
+                depths[id(node)] = 1 + max(depth(node.low), depth(node.high))
+            return depths[id(node)]
+        return depth(root)
+
+
+class DecisionDiagramCompiler:
+    """Compiles the rules of a first-matching catalog into a single decision diagram over the quantified
+    subexpressions
+
+    """
+
+    def __init__(self, closure_compiler=None):
+        """Initializer
+
+        :param closure_compiler: ClosureCompiler for compiling the quantified subexpressions (optional)
+        """
+        if closure_compiler is None:
+            closure_compiler = ClosureCompiler()
+        self.closure_compiler = closure_compiler
+        self.diagram = DecisionDiagram()
+        # the quantified subexpressions in the order of the variables
+        self.atoms = []
+        self.atom_vars = {}
+        self.built_ops = {}
+
+    def get_var(self, atom):
+        """Retrieves the variable of a quantified subexpression (numbered in the order of their first occurrence),
+        quantifiers of the same filter are the same variable regardless of their names
+
+        :param atom: ANY/ALL operator
+        :return: variable index
+        """
+        key = (type(atom), atom.filter_operator)
+        if key not in self.atom_vars:
+            self.atom_vars[key] = len(self.atoms)
+            self.atoms.append(atom)
+        return self.atom_vars[key]
+
+    def build_quantifier(self, atom):
+        """Builds the boolean decision diagram of a quantified subexpression,
+        a quantified 'not' is the negation of the dual quantifier (ALL(not f) = NOT ANY(f)), sharing its variable
+
+        :param atom: ANY/ALL operator
+        :return: DecisionNode
+        """
+        if isinstance(atom.filter_operator, FilterNOT):
+            dual_quantifier = ALL if isinstance(atom, ANY) else ANY
+            return self.diagram.negate(self.build_quantifier(
+                dual_quantifier(None, atom.filter_operator.filter_operator, atom.with_cache)))
+        return self.diagram.variable(self.get_var(atom))
+
+    def build(self, op):
+        """Builds the boolean decision diagram of a category(bool)-level operator
+
+        :param op: category(bool)-level operator
+        :return: DecisionNode
+        """
+        if op not in self.built_ops:
+            switcher = {
+                ANY: self.build_quantifier,
+                ALL: self.build_quantifier,
+                BoolConst: lambda x: self.diagram.leaf(x.const_val),
+                # the leaf of the neutral element is the diagram of no operands
+                BoolAND: lambda x: reduce(self.diagram.conjunction, [self.build(o) for o in x.bool_operators],
+                                          self.diagram.leaf(True)),
+                BoolOR: lambda x: reduce(self.diagram.disjunction, [self.build(o) for o in x.bool_operators],
+                                         self.diagram.leaf(False)),
+                BoolNOT: lambda x: self.diagram.negate(self.build(x.bool_operator)),
+                BoolIMPL: lambda x: self.build(x.impl_op),
+                BoolREF: lambda x: self.build(x.bool_operator)
+            }
+            self.built_ops[op] = switcher.get(type(op), lambda x: error("Unsupported bool operator: ", x))(op)
+        return self.built_ops[op]
+
+    def compile(self, category_catalog):
+        """Compiles a first-matching catalog
+
+        :param category_catalog: CategoryCatalog
+        :return: DecisionDiagramCatalog
+        """
+        if category_catalog.evaluationStrategy != "firstMatching":
+            error("The decision diagram supports the firstMatching evaluation strategy only: ",
+                  category_catalog.evaluationStrategy)
+        category_diagrams = [self.build(category.rules) for category in category_catalog.categories]
+        # the first category is the outermost choice, hence the diagram is built from the last one
+        root = self.diagram.leaf(-1)
+        for num in reversed(range(len(category_diagrams))):
+            root = self.diagram.select(category_diagrams[num], num, root)
+        return DecisionDiagramCatalog(category_catalog, root,
+                                      [self.closure_compiler.compile_bool_op(atom) for atom in self.atoms],
+                                      self.closure_compiler.prepare)
+
+
+class DecisionDiagramCatalog:
+    """A first-matching category catalog evaluated by following a decision diagram,
+    giving the same results as the CategoryCatalog it was compiled from
+
+    Debug output contains the matching tag bundles of the operators, hence it is delegated to the original catalog.
+    """
+
+    def __init__(self, category_catalog, root, compiled_atoms, prepare):
+        """Initializer
+
+        :param category_catalog: the CategoryCatalog being compiled
+        :param root: root DecisionNode with category indices as leaf values
+        :param compiled_atoms: compiled closures of the quantified subexpressions by the variable indices
+        :param prepare: conversion of the tag bundle set to the input of the compiled closures
+        """
+        self.category_catalog = category_catalog
+        self.root = root
+        self.compiled_atoms = compiled_atoms
+        self.prepare = prepare
+        self.names = [category.name for category in category_catalog.categories]
+
+    def get_categories_enumerated_key_map(self):
+        """Retrieves the categories with their rules
+
+        :return: a dictionary of categories
+        """
+        return self.category_catalog.get_categories_enumerated_key_map()
+
+    def apply(self, tag_bundle_set):
+        """Categorizes a location (by its tag bundle set) with the first-matching category strategy
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :return: the first matching category
+        """
+        if self.category_catalog.debug:
+            return self.category_catalog.apply(tag_bundle_set)
+        compiled_input = self.prepare(tag_bundle_set)
+        node = self.root
+        while node.var is not None:
+            node = node.high if self.compiled_atoms[node.var](compiled_input) else node.low
+        return (node.value, self.names[node.value]) if node.value >= 0 else (-1, None)
+
+    def apply_batch(self, tag_bundle_sets):
+        """Categorizes multiple locations (by their tag bundle sets) one by one
+
+        :param tag_bundle_sets: list of tag bundle sets, one for each location
+        :return: list of the matching categories for each location
+        """
+        return [self.apply(tag_bundle_set) for tag_bundle_set in tag_bundle_sets]
+
+    def __str__(self):
+        return str(self.category_catalog)
@@ -0,0 +1,213 @@
+"""
+The interned compiler evaluates the rules on tag bundles encoded as sets of integer codes.
+
+Tag keys and key-value pairs are interned into integer codes shared by all the locations categorized in a run,
+and a tag bundle becomes the frozenset of the codes of its keys and key-value pairs,
+so that each distinct tag string is stored only once in memory.
+The keys and values of the atomic filters are translated to the same codes at compile time,
+hence an atomic filter is an integer set membership check instead of string lookups and comparisons.
+Once the rules are compiled, the keys and key-value pairs not referenced by them are encoded as a single sentinel code,
+so that the codes do not grow with the distinct tags of the locations (except in debug mode, decoding the tags).
+"""
+
+from immutabledict import immutabledict
+from openlostcat.engines.closure_compiler import ClosureCompiler, CompiledCategoryCatalog
+from openlostcat.evaluationcontext import EvaluationContext
+
+
+class EncodedTagBundleSet(frozenset):
+    """A tag bundle set of encoded tag bundles (frozensets of integer codes)
+
+    """
+    __slots__ = ()
+
+
+# the code of the keys and key-value pairs not interned by a frozen interner
+UNREFERENCED_CODE = -1
+
+
+class TagInterner:
+    """Interns tag keys and key-value pairs into integer codes, and encodes tag bundles by the codes
+
+    """
+
+    def __init__(self):
+        # codes of the keys (strings) and key-value pairs (tuples), and the symbols by their codes
+        self.codes = {}
+        self.symbols = []
+        # a frozen interner encodes the symbols not interned yet as UNREFERENCED_CODE
+        self.frozen = False
+
+    def freeze(self):
+        """Stops interning new symbols at encoding (e.g. once all the rules are compiled),
+        the symbols not interned yet are encoded as UNREFERENCED_CODE, and cannot be decoded
+        """
+        self.frozen = True
+
+    def get_code(self, symbol):
+        """Retrieves the code of a key or a key-value pair (a new code is assigned at its first occurrence)
+
+        :param symbol: tag key or (key, value) tuple
+        :return: integer code
+        """
+        code = self.codes.get(symbol)
+        if code is None:
+            code = self.codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    def lookup_code(self, symbol):
+        """Retrieves the code of a key or a key-value pair without interning it
+
+        :param symbol: tag key or (key, value) tuple
+        :return: integer code, UNREFERENCED_CODE if not interned
+        """
+        return self.codes.get(symbol, UNREFERENCED_CODE)
+
+    def encode_tag_bundle(self, tag_dict):
+        """Encodes the tags of an osm object
+
+        :param tag_dict: dictionary of tags
+        :return: frozenset of the codes of the keys and key-value pairs
+        """
+        get_code = self.lookup_code if self.frozen else self.get_code
+        return frozenset([code for key, value in tag_dict.items() for code in (get_code(key), get_code((key, value)))])
+
+    def encode_tag_bundle_set(self, tag_dict_list):
+        """Encodes the tags of the osm objects of a location (the encoded counterpart of utils.to_tag_bundle_set)
+
+        :param tag_dict_list: list of dictionaries of tags
+        :return: EncodedTagBundleSet
+        """
+        return EncodedTagBundleSet(map(self.encode_tag_bundle, tag_dict_list))
+
+    def decode_tag_bundle(self, encoded_tag_bundle):
+        """Decodes an encoded tag bundle
+
+        :param encoded_tag_bundle: frozenset of codes
+        :return: tag bundle (immutabledict)
+        """
+        return immutabledict(self.symbols[code] for code in encoded_tag_bundle
+                             if code != UNREFERENCED_CODE and isinstance(self.symbols[code], tuple))
+
+    def decode_tag_bundle_set(self, encoded_tag_bundle_set):
+        """Decodes an encoded tag bundle set
+
+        :param encoded_tag_bundle_set: EncodedTagBundleSet
+        :return: set of tag bundles
+        """
+        return {self.decode_tag_bundle(encoded_tag_bundle) for encoded_tag_bundle in encoded_tag_bundle_set}
+
+
+class InternedCompiler(ClosureCompiler):
+    """Compiles set(filter)-level operators into predicates of encoded tag bundles,
+    category(bool)-level operators are compiled as by ClosureCompiler
+
+    """
+
+    def __init__(self, interner=None):
+        """Initializer
+
+        :param interner: TagInterner to be used (optional), for sharing the codes among multiple catalogs
+            (compiled before encoding any location, as the interner is frozen after compilation)
+        """
+        super().__init__()
+        if interner is None:
+            interner = TagInterner()
+        self.interner = interner
+
+    def compile_atomic_filter(self, atomic_filter):
+        """Chooses a specialized code membership check for an atomic filter
+
+        :param atomic_filter: AtomicFilter
+        :return: predicate of an encoded tag bundle
+        """
+        key_code = self.interner.get_code(atomic_filter.key)
+        if atomic_filter.is_any_value:
+            return lambda encoded_tag_bundle: key_code in encoded_tag_bundle
+        codes = frozenset(self.interner.get_code((atomic_filter.key, value)) for value in atomic_filter.values)
+        if atomic_filter.is_optional_key:
+            if not codes:
+                return lambda encoded_tag_bundle: key_code not in encoded_tag_bundle
+            return lambda encoded_tag_bundle: key_code not in encoded_tag_bundle \
+                or not codes.isdisjoint(encoded_tag_bundle)
+        if not codes:
+            return lambda encoded_tag_bundle: False
+        if len(codes) == 1:
+            code = next(iter(codes))
+            return lambda encoded_tag_bundle: code in encoded_tag_bundle
+        return lambda encoded_tag_bundle: not codes.isdisjoint(encoded_tag_bundle)
+
+    def prepare(self, tag_bundle_set):
+        """Encodes the tag bundle set of a location, unless it has been encoded at ingestion
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized,
+            or EncodedTagBundleSet
+        :return: EvaluationContext of the EncodedTagBundleSet
+        """
+        if isinstance(tag_bundle_set, EncodedTagBundleSet):
+            return EvaluationContext(tag_bundle_set)
+        return EvaluationContext(self.interner.encode_tag_bundle_set(tag_bundle_set))
+
+    def get_location_keys(self, context):
+        """Retrieves the tag keys of an encoded tag bundle set (also containing the key-value pairs)
+
+        :param context: EvaluationContext of an EncodedTagBundleSet
+        :return: set of keys and (key, value) tuples
+        """
+        return {self.interner.symbols[code] for code in frozenset().union(*context.tag_bundle_set)
+                if code != UNREFERENCED_CODE}
+
+    def compile_catalogs(self, category_catalogs):
+        """Compiles multiple catalogs as ClosureCompiler, then freezes the interner
+        (unless a catalog is in debug mode, decoding the tag bundles)
+
+        :param category_catalogs: list of CategoryCatalog objects
+        :return: list of InternedCategoryCatalog objects
+        """
+        compiled_catalogs = super().compile_catalogs(category_catalogs)
+        if not any(category_catalog.debug for category_catalog in category_catalogs):
+            self.interner.freeze()
+        return compiled_catalogs
+
+    def create_compiled_catalog(self, category_catalog, compiled_rules):
+        """Creates the compiled catalog of the compiled rules
+
+        :param category_catalog: the CategoryCatalog being compiled
+        :param compiled_rules: compiled predicates of the categories in the order of the catalog
+        :return: InternedCategoryCatalog
+        """
+        return InternedCategoryCatalog(category_catalog, compiled_rules, self.interner, self.prepare,
+                                       self.get_location_keys)
+
+
+class InternedCategoryCatalog(CompiledCategoryCatalog):
+    """A compiled category catalog evaluating encoded tag bundle sets,
+    tag bundle sets can be encoded at ingestion by its to_tag_bundle_set
+
+    """
+
+    def __init__(self, category_catalog, compiled_rules, interner, prepare, get_location_keys):
+        """Initializer
+
+        :param category_catalog: the CategoryCatalog being compiled
+        :param compiled_rules: compiled predicates of the categories in the order of the catalog
+        :param interner: TagInterner of the compiled rules
+        :param prepare: encoding of the tag bundle set
+        :param get_location_keys: retrieval of the keys of an encoded tag bundle set
+        """
+        super().__init__(category_catalog, compiled_rules, prepare, get_location_keys)
+        self.interner = interner
+
+    def to_tag_bundle_set(self, tag_dict_list):
+        """Encodes the tags of the osm objects of a location at ingestion
+
+        :param tag_dict_list: list of dictionaries of tags
+        :return: EncodedTagBundleSet
+        """
+        return self.interner.encode_tag_bundle_set(tag_dict_list)
+
+    def apply(self, tag_bundle_set, compiled_input=None):
+        if self.category_catalog.debug and isinstance(tag_bundle_set, EncodedTagBundleSet):
+            tag_bundle_set = self.interner.decode_tag_bundle_set(tag_bundle_set)
+        return super().apply(tag_bundle_set, compiled_input)
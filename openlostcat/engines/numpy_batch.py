@@ -0,0 +1,239 @@
+"""
+The numpy batch engine categorizes many locations at once by vectorized column operations.
+
+The tag bundles of all the locations of a batch are concatenated into a single column store,
+where each tag key referenced by the rules is a column of integer value codes, and each location is a segment.
+Set(filter)-level operators become boolean columns over all the tag bundles of the batch,
+and the quantifiers ANY/ALL become segmented reductions over the locations.
+Category(bool)-level operators work on boolean arrays over the locations.
+
+It requires numpy to be installed.
+"""
+
+import numpy as np
+from openlostcat.utils import error
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolNOT, BoolREF, BoolConst, BoolIMPL
+from openlostcat.operators.filter_operators import FilterAND, FilterOR, FilterNOT, FilterREF, FilterIMPL, \
+    AtomicFilter, FilterConst
+from openlostcat.operators.quantifier_operators import ANY, ALL
+
+
+class TagBundleColumns:
+    """Column store of the tag bundle sets of a batch of locations
+
+    """
+
+    missing_code = 0
+    """Value code of a missing key
+    """
+
+    def __init__(self, tag_bundle_sets):
+        """Concatenates the tag bundle sets of the locations
+
+        :param tag_bundle_sets: list of tag bundle sets, one for each location
+        """
+        tag_bundle_lists = [list(tag_bundle_set) for tag_bundle_set in tag_bundle_sets]
+        self.tag_bundles = [tag_bundle for tag_bundle_list in tag_bundle_lists for tag_bundle in tag_bundle_list]
+        counts = np.fromiter((len(tag_bundle_list) for tag_bundle_list in tag_bundle_lists), dtype=np.int64,
+                             count=len(tag_bundle_lists))
+        self.location_count = len(tag_bundle_lists)
+        self.bundle_count = len(self.tag_bundles)
+        # the first tag bundle of each location (segment start offsets)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64) if len(counts) else counts
+        self.nonempty = counts > 0
+        self.nonempty_offsets = self.offsets[self.nonempty]
+        # results of the operators (subexpressions) already evaluated for this batch
+        self.memo = {}
+        self.columns = {}
+
+    def get_column(self, key):
+        """Retrieves the value code column of a key (encoded at its first lookup)
+
+        :param key: tag key
+        :return: value code array over all tag bundles and the value code dictionary of the key
+        """
+        if key not in self.columns:
+            codes = {None: self.missing_code}
+            column = np.fromiter((codes.setdefault(tag_bundle.get(key), len(codes))
+                                  for tag_bundle in self.tag_bundles),
+                                 dtype=np.int64, count=self.bundle_count)
+            self.columns[key] = (column, codes)
+        return self.columns[key]
+
+    def segment_any(self, column):
+        """Segmented 'or' reduction of a boolean column over the tag bundles of each location
+
+        :param column: boolean array over all tag bundles
+        :return: boolean array over the locations (False for no tag bundles)
+        """
+        result = np.zeros(self.location_count, dtype=bool)
+        if self.bundle_count:
+            result[self.nonempty] = np.logical_or.reduceat(column, self.nonempty_offsets)
+        return result
+
+    def segment_all(self, column):
+        """Segmented 'and' reduction of a boolean column over the tag bundles of each location
+
+        :param column: boolean array over all tag bundles
+        :return: boolean array over the locations (True for no tag bundles)
+        """
+        result = np.ones(self.location_count, dtype=bool)
+        if self.bundle_count:
+            result[self.nonempty] = np.logical_and.reduceat(column, self.nonempty_offsets)
+        return result
+
+
+class NumpyBatchCatalog:
+    """A category catalog evaluated by vectorized column operations over batches of locations,
+    giving the same results as the CategoryCatalog it was built from
+
+    Debug output contains the matching tag bundles of the operators, hence it is delegated to the original catalog.
+    """
+
+    def __init__(self, category_catalog):
+        """Initializer
+
+        :param category_catalog: CategoryCatalog
+        """
+        self.category_catalog = category_catalog
+
+    def get_categories_enumerated_key_map(self):
+        """Retrieves the categories with their rules
+
+        :return: a dictionary of categories
+        """
+        return self.category_catalog.get_categories_enumerated_key_map()
+
+    def evaluate_filter_op(self, op, batch):
+        """Evaluates a set(filter)-level operator for all the tag bundles of a batch
+
+        :param op: set(filter)-level operator
+        :param batch: TagBundleColumns
+        :return: boolean array over all tag bundles
+        """
+        if op not in batch.memo:
+            switcher = {
+                AtomicFilter: self.__evaluate_atomic_filter,
+                FilterConst: lambda x, b: np.full(b.bundle_count, x.const_val, dtype=bool),
+                FilterAND: lambda x, b: self.conjunction(
+                    [self.evaluate_filter_op(o, b) for o in x.filter_operators], b.bundle_count),
+                FilterOR: lambda x, b: self.disjunction(
+                    [self.evaluate_filter_op(o, b) for o in x.filter_operators], b.bundle_count),
+                FilterNOT: lambda x, b: ~self.evaluate_filter_op(x.filter_operator, b),
+                FilterIMPL: lambda x, b: self.evaluate_filter_op(x.impl_op, b),
+                FilterREF: lambda x, b: self.evaluate_filter_op(x.filter_operator, b)
+            }
+            batch.memo[op] = switcher.get(type(op), lambda x, b: error("Unsupported filter operator: ", x))(op, batch)
+        return batch.memo[op]
+
+    @staticmethod
+    def conjunction(arrays, size):
+        """Element-wise 'and' of boolean arrays
+
+        :param arrays: list of boolean arrays of the same size
+        :param size: the size of the arrays (for an empty list)
+        :return: boolean array (all true for an empty list)
+        """
+        return np.logical_and.reduce(arrays) if arrays else np.ones(size, dtype=bool)
+
+    @staticmethod
+    def disjunction(arrays, size):
+        """Element-wise 'or' of boolean arrays
+
+        :param arrays: list of boolean arrays of the same size
+        :param size: the size of the arrays (for an empty list)
+        :return: boolean array (all false for an empty list)
+        """
+        return np.logical_or.reduce(arrays) if arrays else np.zeros(size, dtype=bool)
+
+    @staticmethod
+    def __evaluate_atomic_filter(atomic_filter, batch):
+        column, codes = batch.get_column(atomic_filter.key)
+        if atomic_filter.is_any_value:
+            return column != batch.missing_code
+        result = np.isin(column, [codes[value] for value in atomic_filter.values if value in codes])
+        if atomic_filter.is_optional_key:
+            result |= column == batch.missing_code
+        return result
+
+    def evaluate_bool_op(self, op, batch):
+        """Evaluates a category(bool)-level operator for all the locations of a batch
+
+        :param op: category(bool)-level operator
+        :param batch: TagBundleColumns
+        :return: boolean array over the locations
+        """
+        if op not in batch.memo:
+            switcher = {
+                ANY: lambda x, b: b.segment_any(self.evaluate_filter_op(x.filter_operator, b)),
+                ALL: lambda x, b: b.segment_all(self.evaluate_filter_op(x.filter_operator, b)),
+                BoolConst: lambda x, b: np.full(b.location_count, x.const_val, dtype=bool),
+                BoolAND: lambda x, b: self.conjunction([self.evaluate_bool_op(o, b) for o in x.bool_operators],
+                                                       b.location_count),
+                BoolOR: lambda x, b: self.disjunction([self.evaluate_bool_op(o, b) for o in x.bool_operators],
+                                                      b.location_count),
+                BoolNOT: lambda x, b: ~self.evaluate_bool_op(x.bool_operator, b),
+                BoolIMPL: lambda x, b: self.evaluate_bool_op(x.impl_op, b),
+                BoolREF: lambda x, b: self.evaluate_bool_op(x.bool_operator, b)
+            }
+            batch.memo[op] = switcher.get(type(op), lambda x, b: error("Unsupported bool operator: ", x))(op, batch)
+        return batch.memo[op]
+
+    def apply_fm_evaluation_batch(self, tag_bundle_sets):
+        """Categorizes a batch of locations with the first-matching category strategy
+
+        :param tag_bundle_sets: list of tag bundle sets, one for each location
+        :return: integer array of the index of the first matching category for each location (-1 if none)
+        """
+        batch = TagBundleColumns(tag_bundle_sets)
+        result = np.full(batch.location_count, -1, dtype=np.int64)
+        undecided = np.ones(batch.location_count, dtype=bool)
+        for num, category in enumerate(self.category_catalog.categories):
+            if not undecided.any():
+                break
+            matching = undecided & self.evaluate_bool_op(category.rules, batch)
+            result[matching] = num
+            undecided &= ~matching
+        return result
+
+    def apply_all_evaluation_batch(self, tag_bundle_sets):
+        """Categorizes a batch of locations with the all-matching category strategy
+
+        :param tag_bundle_sets: list of tag bundle sets, one for each location
+        :return: boolean matrix of the matching categories (a row for each location, a column for each category)
+        """
+        batch = TagBundleColumns(tag_bundle_sets)
+        result = np.zeros((batch.location_count, len(self.category_catalog.categories)), dtype=bool)
+        for num, category in enumerate(self.category_catalog.categories):
+            result[:, num] = self.evaluate_bool_op(category.rules, batch)
+        return result
+
+    def apply_batch(self, tag_bundle_sets):
+        """Categorizes a batch of locations according to the strategy of the catalog
+
+        :param tag_bundle_sets: list of tag bundle sets, one for each location
+        :return: list of the matching categories for each location (the same as by CategoryCatalog.apply)
+        """
+        if self.category_catalog.debug:
+            return self.category_catalog.apply_batch(tag_bundle_sets)
+        names = [category.name for category in self.category_catalog.categories]
+        evaluation_switcher = {
+            "firstMatching": lambda x: [(num, names[num]) if num >= 0 else (-1, None)
+                                        for num in self.apply_fm_evaluation_batch(x).tolist()],
+            "all": lambda x: [[(num, names[num]) for num in np.flatnonzero(row).tolist()] or [(-1, None)]
+                              for row in self.apply_all_evaluation_batch(x)]
+        }
+        return evaluation_switcher.get(self.category_catalog.evaluationStrategy,
+                                       lambda x: error("Unsupported evaluation strategy: ",
+                                                       self.category_catalog.evaluationStrategy))(tag_bundle_sets)
+
+    def apply(self, tag_bundle_set):
+        """Categorizes a single location as a batch of one
+
+        :param tag_bundle_set: set of dicts of tags of osm objects at the location to be categorized
+        :return: list of matching categories
+        """
+        return self.apply_batch([tag_bundle_set])[0]
+
+    def __str__(self):
+        return str(self.category_catalog)
@@ -0,0 +1,29 @@
+class EvaluationContext:
+    """Results of the subexpressions (references, quantifiers) evaluated for a single location,
+    created for each location being categorized and discarded afterwards
+
+    The operators themselves are not changed by the evaluation, so that a catalog can be shared among threads.
+    """
+
+    def __init__(self, tag_bundle_set):
+        """Initializer
+
+        :param tag_bundle_set: tag bundle set of the location being categorized
+        """
+        self.tag_bundle_set = tag_bundle_set
+        self.memo = {}
+
+    def memoize(self, key, tag_bundle_set, evaluate):
+        """Retrieves the result of a subexpression, evaluated at its first retrieval for the location
+
+        :param key: the key of the result, e.g. the operator itself
+        :param tag_bundle_set: the operand of the subexpression, results are only memoized for the whole
+            tag bundle set of the location (set(filter)-level subexpressions may be applied to its subsets)
+        :param evaluate: function without parameters evaluating the subexpression
+        :return: the result
+        """
+        if tag_bundle_set is not self.tag_bundle_set:
+            return evaluate()
+        if key not in self.memo:
+            self.memo[key] = evaluate()
+        return self.memo[key]
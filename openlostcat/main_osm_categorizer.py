@@ -1,5 +1,29 @@
-from openlostcat.utils import to_tag_bundle_set, get_tags_from_osm_elements
+from openlostcat.utils import to_tag_bundle, to_tag_bundle_set, get_tags_from_osm_elements, \
+    get_identified_tags_from_osm_elements, project_tag_dicts, error
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+import os
 from openlostcat.parsers.categorycatalogparser import CategoryCatalogParser
+from openlostcat.parsers.operandreorderer import OperandReorderer
+from openlostcat.engines.closure_compiler import ClosureCompiler
+from openlostcat.engines.bitset_compiler import BitsetCompiler
+from openlostcat.engines.interned_compiler import InternedCompiler, InternedCategoryCatalog
+from openlostcat.engines.decision_diagram import DecisionDiagramCompiler
+from openlostcat.engines.atom_cache_compiler import AtomCacheCompiler, IdentifiedTagBundleSet
+
+
+# the categorizer of a worker process of categorize_many
+_worker_categorizer = None
+
+
+def _init_worker(categorizer):
+    global _worker_categorizer
+    _worker_categorizer = categorizer
+
+
+def _categorize_chunk(osm_json_dicts):
+    return _worker_categorizer.categorize_batch(osm_json_dicts)
 
 
 class MainOsmCategorizer:
@@ -8,16 +32,121 @@ class MainOsmCategorizer:
 
     """
 
-    def __init__(self, category_catalog_source, debug=False, category_catalog_parser=None):
+    def __init__(self, category_catalog_source, debug=False, category_catalog_parser=None, engine="interpreter",
+                 operand_orders=None, project_tags=True, tag_bundle_pool=None, atom_cache_size=65536):
         """Initializes the categorizer by setting up the category catalog
 
         :param category_catalog_source: a JSON structure as python dictionary or a file path string
         :param debug: Boolean, set to true for more detailed output
         :param category_catalog_parser: parse using the given parser
+        :param engine: evaluation engine of the parsed rules:
+            "interpreter" (default) walks the operator tree,
+            "compiled" evaluates the rules compiled into python closures (same results, faster without debug),
+            "bitset" evaluates the compiled rules on integer bitmasks of the numbered tag bundles,
+            "interned" evaluates the compiled rules on tag bundles encoded as integer codes at ingestion,
+            "bdd" evaluates a first-matching catalog by a single decision diagram over the quantified conditions,
+            "numpy" evaluates batches of locations by vectorized column operations (requires numpy),
+            "atom_cache" evaluates the rules as "bitset", with the results of the atomic filters cached for each
+            osm object by its identity across the locations (for batches of nearby locations)
+        :param operand_orders: operand orders of the rules learned by optimize_operand_order,
+            as a dictionary or a JSON file path (optional)
+        :param project_tags: Boolean, build the tag bundles of the tags of the keys referenced by the rules only
+            (the categories are the same, the objects without such tags collapse to a single empty tag bundle),
+            not applied in debug mode
+        :param tag_bundle_pool: TagBundlePool sharing the identical tag bundles of the locations (optional,
+            not used by the "interned" engine encoding the tag bundles itself)
+        :param atom_cache_size: maximal number of osm objects whose results are cached by the "atom_cache" engine
         """
         if category_catalog_parser is None:
             category_catalog_parser = CategoryCatalogParser()
         self.category_cat = category_catalog_parser.parse(category_catalog_source, debug=debug)
+        if operand_orders is not None:
+            OperandReorderer(operand_orders).reorder(self.category_cat)
+        self.engine = engine
+        # the tags of other keys do not affect the categorization, only the debug output
+        self.projected_keys = self.category_cat.get_referenced_keys() if project_tags and not debug else None
+        self.tag_bundle_pool = tag_bundle_pool
+        self.atom_cache_size = atom_cache_size
+        self.set_up_evaluator()
+
+    def set_up_evaluator(self):
+        """Sets up the evaluation engine of the parsed rules
+        """
+        engine_switcher = {
+            "interpreter": lambda c: c,
+            "compiled": lambda c: ClosureCompiler().compile(c),
+            "bitset": lambda c: BitsetCompiler().compile(c),
+            "interned": lambda c: InternedCompiler().compile(c),
+            "bdd": lambda c: DecisionDiagramCompiler().compile(c),
+            "atom_cache": lambda c: AtomCacheCompiler(self.atom_cache_size).compile(c),
+            "numpy": self.__create_numpy_batch_catalog
+        }
+        self.evaluator = engine_switcher.get(self.engine,
+                                             lambda x: error("Unsupported evaluation engine: ", self.engine))(
+            self.category_cat)
+        # the "interned" engine encodes the tags of a location at ingestion instead of wrapping them in immutabledicts
+        if isinstance(self.evaluator, InternedCategoryCatalog):
+            self.to_tag_bundle_set = self.evaluator.to_tag_bundle_set
+        elif self.tag_bundle_pool is not None:
+            self.to_tag_bundle_set = self.tag_bundle_pool.to_tag_bundle_set
+        else:
+            self.to_tag_bundle_set = to_tag_bundle_set
+
+    def create_tag_bundle_set(self, tag_dicts):
+        """Builds the tag bundle set of a location for the evaluation engine (projected to the referenced keys)
+
+        :param tag_dicts: iterable of the dictionaries of tags of the osm objects at/near the location
+        :return: tag bundle set
+        """
+        if self.projected_keys is not None:
+            tag_dicts = project_tag_dicts(tag_dicts, self.projected_keys)
+        return self.to_tag_bundle_set(tag_dicts)
+
+    def create_identified_tag_bundle_set(self, identified_tag_dicts):
+        """Builds the tag bundle set of a location keeping the identities of the osm objects of the tag bundles
+        (projected to the referenced keys)
+
+        :param identified_tag_dicts: iterable of ((type, id, version), dictionary of tags) pairs
+        :return: IdentifiedTagBundleSet
+        """
+        to_bundle = self.tag_bundle_pool.to_tag_bundle if self.tag_bundle_pool is not None else to_tag_bundle
+        identified_tag_dicts = list(identified_tag_dicts)
+        tag_dicts = (tag_dict for _, tag_dict in identified_tag_dicts)
+        if self.projected_keys is not None:
+            tag_dicts = project_tag_dicts(tag_dicts, self.projected_keys)
+        return IdentifiedTagBundleSet(zip([element_key for element_key, _ in identified_tag_dicts],
+                                          map(to_bundle, tag_dicts)))
+
+    def get_tag_bundle_set(self, osm_json_dict):
+        """Builds the tag bundle set of a location from an osm query result
+        (with the identities of the osm objects for the "atom_cache" engine)
+
+        :param osm_json_dict: osm query result of the location
+        :return: tag bundle set
+        """
+        if self.engine == "atom_cache":
+            return self.create_identified_tag_bundle_set(get_identified_tags_from_osm_elements(osm_json_dict))
+        return self.create_tag_bundle_set(get_tags_from_osm_elements(osm_json_dict))
+
+    def optimize_operand_order(self, osm_json_dicts):
+        """Reorders the operands of the rules by their cost and selectivity observed on a sample of locations
+        (the categories are the same, only the evaluation is faster for similar locations)
+
+        :param osm_json_dicts: iterable of osm query results of the sample locations
+        :return: the learned operand orders (can be saved and passed to the initializer for later runs)
+        """
+        reorderer = OperandReorderer()
+        operand_orders = reorderer.profile(self.category_cat, [to_tag_bundle_set(get_tags_from_osm_elements(osm))
+                                                               for osm in osm_json_dicts])
+        reorderer.reorder(self.category_cat)
+        self.set_up_evaluator()
+        return operand_orders
+
+    @staticmethod
+    def __create_numpy_batch_catalog(category_catalog):
+        # numpy is an optional dependency, only required by this engine
+        from openlostcat.engines.numpy_batch import NumpyBatchCatalog
+        return NumpyBatchCatalog(category_catalog)
 
     def categorize(self, osm_json_dict):
         """Categorizes a location by the osm tag bundle set of the objects located there/nearby
@@ -25,8 +154,79 @@ class MainOsmCategorizer:
         :param osm_json_dict: tag bundle set of the osm objects at/near the location
         :return: categories matching the location by the given strategy
         """
-        tag_bundle_set = to_tag_bundle_set(get_tags_from_osm_elements(osm_json_dict))
-        return self.category_cat.apply(tag_bundle_set)
+        tag_bundle_set = self.get_tag_bundle_set(osm_json_dict)
+        return self.evaluator.apply(tag_bundle_set)
+
+    def categorize_tags(self, tag_dicts, with_identity=False):
+        """Categorizes a location by the tags of the osm objects located there/nearby,
+        building the tag bundle set as the tags are iterated (e.g. streamed by ask_osm_stream.ask_osm_tags)
+
+        :param tag_dicts: iterable of the dictionaries of tags of the osm objects at/near the location
+            (or ((type, id, version), dictionary of tags) pairs if with_identity)
+        :param with_identity: the tags are given with the identities of the osm objects
+            (e.g. streamed by ask_osm_tags(..., with_identity=True)), cached by the "atom_cache" engine
+        :return: categories matching the location by the given strategy
+        """
+        if not with_identity:
+            return self.evaluator.apply(self.create_tag_bundle_set(tag_dicts))
+        if self.engine == "atom_cache":
+            return self.evaluator.apply(self.create_identified_tag_bundle_set(tag_dicts))
+        return self.evaluator.apply(self.create_tag_bundle_set(tag_dict for _, tag_dict in tag_dicts))
+
+    def categorize_batch(self, osm_json_dicts):
+        """Categorizes multiple locations at once (vectorized by the "numpy" engine, one by one by the others)
+
+        :param osm_json_dicts: iterable of osm query results, one for each location
+        :return: list of categories matching the locations by the given strategy, in the order of the input
+        """
+        return self.evaluator.apply_batch([self.get_tag_bundle_set(osm_json_dict)
+                                           for osm_json_dict in osm_json_dicts])
+
+    def categorize_many(self, osm_json_dicts, workers=None, chunksize=64, mp_context=None):
+        """Categorizes many locations in parallel by a pool of worker processes (a generator)
+
+        The categorizer is inherited by the workers when processes are forked (copy-on-write),
+        otherwise it is pickled once for each worker (without its evaluation engine, set up again in the worker).
+        Only a bounded number of chunks are in progress at a time, so the input can be an arbitrarily long iterable.
+
+        :param osm_json_dicts: iterable of osm query results, one for each location
+        :param workers: number of worker processes (optional, the number of CPUs by default),
+            locations are categorized in this process for a single worker
+        :param chunksize: number of locations sent to a worker at once
+        :param mp_context: multiprocessing context of the worker processes (optional, the default of the platform)
+        :return: generator of the categories matching the locations, in the order of the input
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if chunksize < 1:
+            error("Chunk size must be positive: ", chunksize)
+        osm_json_dicts = iter(osm_json_dicts)
+        chunks = iter(lambda: list(islice(osm_json_dicts, chunksize)), [])
+        if workers <= 1:
+            for chunk in chunks:
+                yield from self.categorize_batch(chunk)
+            return
+        with ProcessPoolExecutor(workers, mp_context, initializer=_init_worker, initargs=(self,)) as executor:
+            # two chunks for each worker are in progress, so that the workers are not waiting for the results
+            # to be consumed
+            in_flight = deque(executor.submit(_categorize_chunk, chunk) for chunk in islice(chunks, 2 * workers))
+            try:
+                while in_flight:
+                    results = in_flight.popleft().result()
+                    for chunk in islice(chunks, 1):
+                        in_flight.append(executor.submit(_categorize_chunk, chunk))
+                    yield from results
+            finally:
+                # the generator may be closed before the end of the input
+                for future in in_flight:
+                    future.cancel()
+
+    def get_referenced_keys(self):
+        """Retrieves the tag keys looked up by the rules (e.g. for querying only the relevant tags)
+
+        :return: frozenset of tag keys
+        """
+        return self.category_cat.get_referenced_keys()
 
     def get_categories_enumerated_key_map(self):
         """Retrieves the categories parsed by __init__
@@ -35,5 +235,16 @@ class MainOsmCategorizer:
         """
         return self.category_cat.get_categories_enumerated_key_map()
 
+    def __getstate__(self):
+        # the compiled closures of the evaluation engine cannot be pickled, they are compiled again when unpickled
+        state = self.__dict__.copy()
+        del state["evaluator"]
+        del state["to_tag_bundle_set"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.set_up_evaluator()
+
     def __str__(self):
         return str(self.category_cat)
@@ -0,0 +1,85 @@
+from openlostcat.utils import to_tag_bundle_set, get_tags_from_osm_elements, error
+from openlostcat.evaluationcontext import EvaluationContext
+from openlostcat.parsers.categorycatalogparser import CategoryCatalogParser
+from openlostcat.parsers.subexpressionsharer import SubexpressionSharer
+from openlostcat.engines.closure_compiler import ClosureCompiler
+from openlostcat.engines.bitset_compiler import BitsetCompiler
+from openlostcat.engines.interned_compiler import InternedCompiler
+
+
+class MultiOsmCategorizer:
+    """Categorizes locations by multiple category catalogs at once:
+    the osm query result of a location is converted only once, and the subexpressions occurring in multiple catalogs
+    (e.g. the same atomic filters) are evaluated only once for a location
+
+    """
+
+    def __init__(self, category_catalog_sources, debug=False, engine="interpreter", rule_simplifier=None):
+        """Initializes the categorizer by setting up the category catalogs
+
+        :param category_catalog_sources: list of JSON structures as python dictionaries or file path strings
+        :param debug: Boolean, set to true for more detailed output
+        :param engine: evaluation engine of the parsed rules: "interpreter" (default), "compiled", "bitset" or
+            "interned", see MainOsmCategorizer (debug output is always produced by the interpreter)
+        :param rule_simplifier: RuleSimplifier of the parsed rules (optional)
+        """
+        # the subexpressions of all the catalogs are shared, while each catalog has its own references
+        subexpression_sharer = SubexpressionSharer()
+        self.category_cats = [CategoryCatalogParser(subexpression_sharer=subexpression_sharer,
+                                                    rule_simplifier=rule_simplifier).parse(source, debug=debug)
+                              for source in category_catalog_sources]
+        self.debug = debug
+        self.engine = engine
+        self.set_up_evaluators()
+
+    def set_up_evaluators(self):
+        """Sets up the evaluation engine of the parsed rules, compiling all the catalogs together
+        """
+        engine_switcher = {
+            "interpreter": lambda: None,
+            "compiled": ClosureCompiler,
+            "bitset": BitsetCompiler,
+            "interned": InternedCompiler
+        }
+        compiler = engine_switcher.get(self.engine,
+                                       lambda: error("Unsupported evaluation engine: ", self.engine))()
+        if compiler is None or self.debug:
+            self.evaluators = self.category_cats
+            self.prepare = EvaluationContext
+            self.to_tag_bundle_set = to_tag_bundle_set
+        else:
+            self.evaluators = compiler.compile_catalogs(self.category_cats)
+            self.prepare = compiler.prepare
+            # the "interned" engine encodes the tags of a location at ingestion
+            self.to_tag_bundle_set = self.evaluators[0].to_tag_bundle_set \
+                if isinstance(compiler, InternedCompiler) and self.evaluators else to_tag_bundle_set
+
+    def categorize(self, osm_json_dict):
+        """Categorizes a location by the osm tag bundle set of the objects located there/nearby
+
+        :param osm_json_dict: tag bundle set of the osm objects at/near the location
+        :return: list of the categories matching the location by the strategy of each catalog,
+            in the order of the catalogs
+        """
+        tag_bundle_set = self.to_tag_bundle_set(get_tags_from_osm_elements(osm_json_dict))
+        # the evaluation context (the results of the subexpressions) of the location is shared by the catalogs
+        prepared_input = self.prepare(tag_bundle_set)
+        return [evaluator.apply(tag_bundle_set, prepared_input) for evaluator in self.evaluators]
+
+    def categorize_batch(self, osm_json_dicts):
+        """Categorizes multiple locations one by one
+
+        :param osm_json_dicts: iterable of osm query results, one for each location
+        :return: list of the results of categorize for each location, in the order of the input
+        """
+        return [self.categorize(osm_json_dict) for osm_json_dict in osm_json_dicts]
+
+    def get_categories_enumerated_key_maps(self):
+        """Retrieves the categories parsed by __init__
+
+        :return: list of the categories of each catalog
+        """
+        return [category_cat.get_categories_enumerated_key_map() for category_cat in self.category_cats]
+
+    def __str__(self):
+        return "\n".join(str(category_cat) for category_cat in self.category_cats)
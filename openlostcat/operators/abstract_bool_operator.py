@@ -1,7 +1,8 @@
-from abc import ABC, abstractmethod 
+from abc import abstractmethod
+from openlostcat.operators.abstract_operator import AbstractOperator
 
 
-class AbstractBoolOperator(ABC):
+class AbstractBoolOperator(AbstractOperator):
     """Ancestor class for the category-level (bool) operators
     """
 
@@ -49,10 +50,22 @@ class AbstractBoolOperator(ABC):
         return False
   
     @abstractmethod
-    def apply(self, tag_bundle_set):
+    def apply(self, tag_bundle_set, context=None):
         """Evaluates the operator (subexpression) for the given tag bundle set
 
         :param tag_bundle_set: tag bundle set of the osm objects at/near the location
+        :param context: EvaluationContext of the location (optional),
+            references and quantifiers are evaluated only once in the same context
         :return: boolean result of the operator (subexpression)
         """
         return True
+
+    def evaluate(self, tag_bundle_set, context=None):
+        """Evaluates the operator (subexpression) for the given tag bundle set without collecting the matching tag bundles
+        of the subexpressions (debug meta info), hence it can be short-circuited
+
+        :param tag_bundle_set: tag bundle set of the osm objects at/near the location
+        :param context: EvaluationContext of the location (optional)
+        :return: boolean result of the operator (subexpression)
+        """
+        return self.apply(tag_bundle_set, context)[0]
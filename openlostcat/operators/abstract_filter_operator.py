@@ -1,9 +1,10 @@
-from abc import ABC, abstractmethod
+from abc import abstractmethod
+from openlostcat.operators.abstract_operator import AbstractOperator
 from openlostcat.operators.quantifier_operators import ANY
 from openlostcat.operators.abstract_bool_operator import AbstractBoolOperator
 
 
-class AbstractFilterOperator(ABC):
+class AbstractFilterOperator(AbstractOperator):
     """Ancestor class for the set-level (filter) operators
     """
 
@@ -46,12 +47,42 @@ class AbstractFilterOperator(ABC):
         :return: abstract bool operator (subexpression) list
         """
         return [AbstractFilterOperator.get_as_bool_op(op) for op in op_list]
+
+    def matches(self, tag_bundle):
+        """Evaluates the operator (subexpression) for a single tag bundle (set(filter)-level operators are element-wise)
+
+        :param tag_bundle: tags of an osm object
+        :return: boolean whether the tag bundle is kept by the operator
+        """
+        return len(self.apply({tag_bundle})) > 0
+
+    def any_match(self, tag_bundle_set, context=None):
+        """Determines whether the result of the operator (subexpression) is nonempty,
+        stopping at the first matching tag bundle instead of building the result set
+
+        :param tag_bundle_set: tag bundle set of the osm objects at/near the location
+        :param context: EvaluationContext of the location (optional)
+        :return: boolean
+        """
+        return any(map(self.matches, tag_bundle_set))
+
+    def all_match(self, tag_bundle_set, context=None):
+        """Determines whether the result of the operator (subexpression) equals to its operand,
+        stopping at the first tag bundle not matching instead of building the result set
+
+        :param tag_bundle_set: tag bundle set of the osm objects at/near the location
+        :param context: EvaluationContext of the location (optional)
+        :return: boolean
+        """
+        return all(map(self.matches, tag_bundle_set))
   
     @abstractmethod
-    def apply(self, tag_bundle_set):
+    def apply(self, tag_bundle_set, context=None):
         """Evaluates the operator (subexpression) for the given tag bundle set
 
         :param tag_bundle_set: tag bundle set of the osm objects at/near the location
+        :param context: EvaluationContext of the location (optional),
+            references are evaluated only once in the same context
         :return: subset of the input as a result of the operator (subexpression)
         """
         return tag_bundle_set
@@ -0,0 +1,84 @@
+from abc import ABC
+
+
+class AbstractOperator(ABC):
+    """Common ancestor class of all operators with structural equality:
+    two operators (subexpressions) are equal if they are of the same type with equal parameters and operands,
+    so that structurally identical subexpressions can be shared as a single object
+
+    """
+
+    structure_hash = None
+    """Hash of the structure, computed at its first use (operators are not changed structurally after parsing)
+    """
+
+    def get_operands(self):
+        """Retrieves the operands (direct subexpressions) of the operator
+
+        :return: list of operators
+        """
+        return []
+
+    def set_operands(self, operands):
+        """Replaces the operands by structurally equal ones (used for sharing identical subexpressions)
+
+        :param operands: list of operators in the order of get_operands
+        """
+        pass
+
+    def get_necessary_keys(self):
+        """Derives a conservative necessary condition of the subexpression being true on tag keys:
+        for a set(filter)-level operator, a tag bundle can only match if it has at least one of the keys,
+        for a category(bool)-level operator, a tag bundle set can only match if any of its tag bundles has one of them
+
+        :return: frozenset of tag keys (an empty set for an unsatisfiable subexpression),
+            or None if there is no such condition
+        """
+        return None
+
+    def get_referenced_keys(self):
+        """Retrieves the tag keys looked up by the subexpression (the keys of its atomic filters)
+
+        :return: frozenset of tag keys
+        """
+        return frozenset().union(*[op.get_referenced_keys() for op in self.get_operands()])
+
+    @staticmethod
+    def get_conjunction_necessary_keys(ops):
+        """Necessary keys of an 'and' of operators: the condition of any operand is necessary, the narrowest is chosen
+
+        :param ops: operands
+        :return: frozenset of tag keys or None
+        """
+        return min(filter(lambda keys: keys is not None, [op.get_necessary_keys() for op in ops]), key=len,
+                   default=None)
+
+    @staticmethod
+    def get_disjunction_necessary_keys(ops):
+        """Necessary keys of an 'or' of operators: the union of the conditions of all operands
+
+        :param ops: operands
+        :return: frozenset of tag keys or None if any of the operands has no condition
+        """
+        keys = frozenset()
+        for op in ops:
+            op_keys = op.get_necessary_keys()
+            if op_keys is None:
+                return None
+            keys |= op_keys
+        return keys
+
+    def get_structure(self):
+        """Identifies the subexpression by its type, parameters and operands
+
+        :return: tuple
+        """
+        return (type(self),) + tuple(self.get_operands())
+
+    def __eq__(self, other):
+        return self is other or (type(self) is type(other) and self.get_structure() == other.get_structure())
+
+    def __hash__(self):
+        if self.structure_hash is None:
+            self.structure_hash = hash(self.get_structure())
+        return self.structure_hash
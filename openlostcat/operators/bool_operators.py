@@ -1,4 +1,5 @@
 from .abstract_bool_operator import AbstractBoolOperator
+from openlostcat.evaluationcontext import EvaluationContext
 from openlostcat.utils import error, indent, base_indent_num
 
 
@@ -12,15 +13,27 @@ class BoolAND(AbstractBoolOperator):
     def __init__(self, bool_operators):
         self.bool_operators = bool_operators
 
-    def apply(self, tag_bundle_set):
+    def get_operands(self):
+        return self.bool_operators
+
+    def set_operands(self, operands):
+        self.bool_operators = list(operands)
+
+    def get_necessary_keys(self):
+        return self.get_conjunction_necessary_keys(self.bool_operators)
+
+    def apply(self, tag_bundle_set, context=None):
         result_meta_info = []
         for op in self.bool_operators:
-            (op_result, op_result_meta_info) = op.apply(tag_bundle_set)
+            (op_result, op_result_meta_info) = op.apply(tag_bundle_set, context)
             result_meta_info += self.prefix_meta_info_paths("FilterAND", op_result_meta_info)
             if not op_result:
                 return False, result_meta_info
         return True, result_meta_info
 
+    def evaluate(self, tag_bundle_set, context=None):
+        return all(op.evaluate(tag_bundle_set, context) for op in self.bool_operators)
+
     def __str__(self):
         return self.str_template.format(operators=indent(
             '\n'.join([str(operator) for operator in self.bool_operators]),
@@ -37,15 +50,27 @@ class BoolOR(AbstractBoolOperator):
     def __init__(self, bool_operators):
         self.bool_operators = bool_operators
 
-    def apply(self, tag_bundle_set):
+    def get_operands(self):
+        return self.bool_operators
+
+    def set_operands(self, operands):
+        self.bool_operators = list(operands)
+
+    def get_necessary_keys(self):
+        return self.get_disjunction_necessary_keys(self.bool_operators)
+
+    def apply(self, tag_bundle_set, context=None):
         result_meta_info = []
         for op in self.bool_operators:
-            (op_result, op_result_meta_info) = op.apply(tag_bundle_set)
+            (op_result, op_result_meta_info) = op.apply(tag_bundle_set, context)
             result_meta_info += self.prefix_meta_info_paths("FilterOR", op_result_meta_info)
             if op_result:
                 return True, result_meta_info
         return False, result_meta_info
 
+    def evaluate(self, tag_bundle_set, context=None):
+        return any(op.evaluate(tag_bundle_set, context) for op in self.bool_operators)
+
     def __str__(self):
         return self.str_template.format(operators=indent(
             '\n'.join([str(operator) for operator in self.bool_operators]),
@@ -62,10 +87,19 @@ class BoolNOT(AbstractBoolOperator):
     def __init__(self, bool_operator):
         self.bool_operator = bool_operator
 
-    def apply(self, tag_bundle_set):
-        (op_result, op_result_meta_info) = self.bool_operator.apply(tag_bundle_set)
+    def get_operands(self):
+        return [self.bool_operator]
+
+    def set_operands(self, operands):
+        self.bool_operator = operands[0]
+
+    def apply(self, tag_bundle_set, context=None):
+        (op_result, op_result_meta_info) = self.bool_operator.apply(tag_bundle_set, context)
         return not op_result, self.prefix_meta_info_paths("FilterNOT", op_result_meta_info)
 
+    def evaluate(self, tag_bundle_set, context=None):
+        return not self.bool_operator.evaluate(tag_bundle_set, context)
+
     def __str__(self):
         return self.str_template.format(operator=indent(str(self.bool_operator), base_indent_num))
 
@@ -86,17 +120,37 @@ class BoolREF(AbstractBoolOperator):
         """
         self.name = name
         self.bool_operator = bool_operator
-        # cache for an ongoing evaluation where key is the object reference of the tag bundle being categorized
+        # the result is cached in the evaluation context of the location being categorized
         # (we assume the tag_bundle_set is not changed, if it is mutable, disable the cache by with_cache = False)
         self.with_cache = with_cache
-        self.cached_key = None
-        self.cached_value = None
 
-    def apply(self, tag_bundle_set):
-        if not self.with_cache or self.cached_key is not tag_bundle_set:
-            self.cached_key = tag_bundle_set
-            self.cached_value = self.bool_operator.apply(tag_bundle_set)
-        return self.cached_value
+    def get_operands(self):
+        return [self.bool_operator]
+
+    def set_operands(self, operands):
+        self.bool_operator = operands[0]
+
+    def get_structure(self):
+        return type(self), self.name, self.with_cache, self.bool_operator
+
+    def get_necessary_keys(self):
+        return self.bool_operator.get_necessary_keys()
+
+    def apply(self, tag_bundle_set, context=None):
+        if not self.with_cache:
+            return self.bool_operator.apply(tag_bundle_set, context)
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(("apply", self), tag_bundle_set,
+                               lambda: self.bool_operator.apply(tag_bundle_set, context))
+
+    def evaluate(self, tag_bundle_set, context=None):
+        if not self.with_cache:
+            return self.bool_operator.evaluate(tag_bundle_set, context)
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(self, tag_bundle_set,
+                               lambda: self.bool_operator.evaluate(tag_bundle_set, context))
 
     def __str__(self):
         return self.str_template.format(name=self.name, operator=indent(str(self.bool_operator), base_indent_num))
@@ -118,9 +172,18 @@ class BoolConst(AbstractBoolOperator):
             error("Const must be initialized with a bool value.", const_val)
         self.const_val = const_val
 
-    def apply(self, tag_bundle_set):
+    def get_structure(self):
+        return type(self), self.const_val
+
+    def get_necessary_keys(self):
+        return None if self.const_val else frozenset()
+
+    def apply(self, tag_bundle_set, context=None):
         return self.const_val, [(str(self), tag_bundle_set)]
 
+    def evaluate(self, tag_bundle_set, context=None):
+        return self.const_val
+
     def __str__(self):
         return self.str_template.format(const=self.const_val)
 
@@ -138,8 +201,21 @@ class BoolIMPL(AbstractBoolOperator):
         self.bool_operators = bool_operators
         self.impl_op = BoolOR([BoolNOT(op) for op in bool_operators[:-1]] + [bool_operators[-1]])
 
-    def apply(self, tag_bundle_set):
-        return self.impl_op.apply(tag_bundle_set)
+    def get_operands(self):
+        return self.bool_operators
+
+    def set_operands(self, operands):
+        self.bool_operators = list(operands)
+        self.impl_op = BoolOR([BoolNOT(op) for op in self.bool_operators[:-1]] + [self.bool_operators[-1]])
+
+    def get_necessary_keys(self):
+        return self.impl_op.get_necessary_keys()
+
+    def apply(self, tag_bundle_set, context=None):
+        return self.impl_op.apply(tag_bundle_set, context)
+
+    def evaluate(self, tag_bundle_set, context=None):
+        return self.impl_op.evaluate(tag_bundle_set, context)
 
     def __str__(self):
         return self.str_template.format(operators=indent(
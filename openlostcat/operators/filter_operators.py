@@ -2,6 +2,7 @@ from .abstract_filter_operator import AbstractFilterOperator
 from openlostcat.utils import error, indent, base_indent_num
 from openlostcat.operators.quantifier_operators import ANY, ALL
 from openlostcat.operators.bool_operators import BoolConst, BoolREF
+from openlostcat.evaluationcontext import EvaluationContext
 
 
 class FilterAND(AbstractFilterOperator):
@@ -25,10 +26,25 @@ class FilterAND(AbstractFilterOperator):
         self.filter_operators = filter_operators
         self.wrapper_quantifier = self.__choose_wrapper_quantifier(filter_operators)
 
-    def apply(self, tag_bundle_set):
+    def get_operands(self):
+        return self.filter_operators
+
+    def set_operands(self, operands):
+        self.filter_operators = list(operands)
+
+    def get_necessary_keys(self):
+        return self.get_conjunction_necessary_keys(self.filter_operators)
+
+    def matches(self, tag_bundle):
+        return all(op.matches(tag_bundle) for op in self.filter_operators)
+
+    def all_match(self, tag_bundle_set, context=None):
+        return all(op.all_match(tag_bundle_set, context) for op in self.filter_operators)
+
+    def apply(self, tag_bundle_set, context=None):
         matching_tag_bundles = tag_bundle_set
         for op in self.filter_operators:
-            matching_tag_bundles = op.apply(matching_tag_bundles)
+            matching_tag_bundles = op.apply(matching_tag_bundles, context)
             if len(matching_tag_bundles) <= 0:
                 return matching_tag_bundles
         return matching_tag_bundles
@@ -60,11 +76,26 @@ class FilterOR(AbstractFilterOperator):
         self.filter_operators = filter_operators
         self.wrapper_quantifier = self.__choose_wrapper_quantifier(filter_operators)
 
-    def apply(self, tag_bundle_set):
+    def get_operands(self):
+        return self.filter_operators
+
+    def set_operands(self, operands):
+        self.filter_operators = list(operands)
+
+    def get_necessary_keys(self):
+        return self.get_disjunction_necessary_keys(self.filter_operators)
+
+    def matches(self, tag_bundle):
+        return any(op.matches(tag_bundle) for op in self.filter_operators)
+
+    def any_match(self, tag_bundle_set, context=None):
+        return any(op.any_match(tag_bundle_set, context) for op in self.filter_operators)
+
+    def apply(self, tag_bundle_set, context=None):
         result = set()
         candidates = tag_bundle_set
         for op in self.filter_operators:
-            matching_tag_bundles = op.apply(candidates)
+            matching_tag_bundles = op.apply(candidates, context)
             candidates = candidates - matching_tag_bundles
             result.update(matching_tag_bundles)
             if len(result) == len(tag_bundle_set):
@@ -88,6 +119,7 @@ class FilterNOT(AbstractFilterOperator):
         self.filter_operator = filter_operator
         self.wrapper_quantifier = self.__choose_wrapper_quantifier(filter_operator)
 
+    @staticmethod
     def __choose_wrapper_quantifier(filter_operator):
         """wrapper quantifier of 'not' will be reversed: it will default to ALL if its operand defaults to ANY, and vica versa
         :param filter_operator: operand
@@ -95,8 +127,23 @@ class FilterNOT(AbstractFilterOperator):
         """
         return ALL if issubclass(filter_operator.wrapper_quantifier, ANY) else ANY
 
-    def apply(self, tag_bundle_set):
-        return tag_bundle_set - self.filter_operator.apply(tag_bundle_set)
+    def get_operands(self):
+        return [self.filter_operator]
+
+    def set_operands(self, operands):
+        self.filter_operator = operands[0]
+
+    def apply(self, tag_bundle_set, context=None):
+        return tag_bundle_set - self.filter_operator.apply(tag_bundle_set, context)
+
+    def matches(self, tag_bundle):
+        return not self.filter_operator.matches(tag_bundle)
+
+    def any_match(self, tag_bundle_set, context=None):
+        return not self.filter_operator.all_match(tag_bundle_set, context)
+
+    def all_match(self, tag_bundle_set, context=None):
+        return not self.filter_operator.any_match(tag_bundle_set, context)
 
     def __str__(self):
         return self.str_template.format(operator=indent(str(self.filter_operator), base_indent_num))
@@ -121,8 +168,38 @@ class FilterREF(AbstractFilterOperator):
             return BoolREF("{#}" + self.name, BoolConst(self.filter_operator.const_val))
         return super().wrap_as_bool_op()
 
-    def apply(self, tag_bundle_set):
-        return self.filter_operator.apply(tag_bundle_set)
+    def get_operands(self):
+        return [self.filter_operator]
+
+    def set_operands(self, operands):
+        self.filter_operator = operands[0]
+
+    def get_structure(self):
+        return type(self), self.name, self.filter_operator
+
+    def get_necessary_keys(self):
+        return self.filter_operator.get_necessary_keys()
+
+    def apply(self, tag_bundle_set, context=None):
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(("apply", self), tag_bundle_set,
+                               lambda: self.filter_operator.apply(tag_bundle_set, context))
+
+    def matches(self, tag_bundle):
+        return self.filter_operator.matches(tag_bundle)
+
+    def any_match(self, tag_bundle_set, context=None):
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(("any_match", self), tag_bundle_set,
+                               lambda: self.filter_operator.any_match(tag_bundle_set, context))
+
+    def all_match(self, tag_bundle_set, context=None):
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(("all_match", self), tag_bundle_set,
+                               lambda: self.filter_operator.all_match(tag_bundle_set, context))
 
     def __str__(self):
         return self.str_template.format(name=self.name, operator=indent(str(self.filter_operator), base_indent_num))
@@ -145,8 +222,27 @@ class FilterIMPL(AbstractFilterOperator):
         #   (usually to ALL: if the operands are atomic filters, one of them is negated and defaults to ALL which is kept by OR)
         self.wrapper_quantifier = self.impl_op.wrapper_quantifier
 
-    def apply(self, tag_bundle_set):
-        return self.impl_op.apply(tag_bundle_set)
+    def get_operands(self):
+        return self.filter_operators
+
+    def set_operands(self, operands):
+        self.filter_operators = list(operands)
+        self.impl_op = FilterOR([FilterNOT(op) for op in self.filter_operators[:-1]] + [self.filter_operators[-1]])
+
+    def get_necessary_keys(self):
+        return self.impl_op.get_necessary_keys()
+
+    def apply(self, tag_bundle_set, context=None):
+        return self.impl_op.apply(tag_bundle_set, context)
+
+    def matches(self, tag_bundle):
+        return self.impl_op.matches(tag_bundle)
+
+    def any_match(self, tag_bundle_set, context=None):
+        return self.impl_op.any_match(tag_bundle_set, context)
+
+    def all_match(self, tag_bundle_set, context=None):
+        return self.impl_op.all_match(tag_bundle_set, context)
 
     def __str__(self):
         return self.str_template.format(operators=indent(
@@ -189,7 +285,7 @@ class AtomicFilter(AbstractFilterOperator):
         """
         if isinstance(value, list):
             return {AtomicFilter.__parse_single_value(e) for e in value}
-        else if isinstance(value, dict) and not value:
+        elif isinstance(value, dict) and not value:
             # empty dict is turned to a None meaning any value is accepted (not the same as {None}!)
             return None
         else:
@@ -210,14 +306,29 @@ class AtomicFilter(AbstractFilterOperator):
         # wrapper quantifier of an atomic filter will default to ANY
         self.wrapper_quantifier = ANY
 
+    def get_structure(self):
+        return type(self), self.key, None if self.values is None else frozenset(self.values), \
+            self.is_optional_key, self.is_any_value
+
+    def get_necessary_keys(self):
+        if self.is_optional_key:
+            return None
+        return frozenset() if not self.is_any_value and not self.values else frozenset([self.key])
+
+    def get_referenced_keys(self):
+        return frozenset([self.key])
+
     def __check_condition(self, tag_bundle):
         return (self.is_optional_key and self.key not in tag_bundle) or (
                 self.is_any_value and self.key in tag_bundle) or (
                 self.key in tag_bundle and tag_bundle[self.key] in self.values)
 
-    def apply(self, tag_bundle_set):
+    def apply(self, tag_bundle_set, context=None):
         return {tag_bundle for tag_bundle in tag_bundle_set if self.__check_condition(tag_bundle)}
 
+    def matches(self, tag_bundle):
+        return self.__check_condition(tag_bundle)
+
     def __str__(self):
         return self.str_template.format(key=self.key, value=self.values, is_optional_key=self.is_optional_key, is_any_value=self.is_any_value)
 
@@ -238,15 +349,30 @@ class FilterConst(AbstractFilterOperator):
             error("Const must be initialized with a bool value.", const_val)
         self.const_val = const_val
 
-       # wrapper quantifier of a const filter will default to ALL for TRUE and ANY for FALSE 
-       #    (in order to achieve consistency and idempotence with all operators)
-       self.wrapper_quantifier = ALL if self.const_val else ANY
+        # wrapper quantifier of a const filter will default to ALL for TRUE and ANY for FALSE
+        #    (in order to achieve consistency and idempotence with all operators)
+        self.wrapper_quantifier = ALL if self.const_val else ANY
 
     def wrap_as_bool_op(self):
         return BoolConst(self.const_val)
 
-    def apply(self, tag_bundle_set):
+    def get_structure(self):
+        return type(self), self.const_val
+
+    def get_necessary_keys(self):
+        return None if self.const_val else frozenset()
+
+    def apply(self, tag_bundle_set, context=None):
         return tag_bundle_set if self.const_val else set()
 
+    def matches(self, tag_bundle):
+        return self.const_val
+
+    def any_match(self, tag_bundle_set, context=None):
+        return self.const_val and len(tag_bundle_set) > 0
+
+    def all_match(self, tag_bundle_set, context=None):
+        return self.const_val or len(tag_bundle_set) == 0
+
     def __str__(self):
         return self.str_template.format(const=self.const_val)
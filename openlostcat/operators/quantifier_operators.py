@@ -5,6 +5,7 @@ by quantifying the filtered result set into a single bool value.
 from .abstract_bool_operator import AbstractBoolOperator
 from openlostcat.utils import indent, base_indent_num
 from openlostcat.utils import error
+from openlostcat.evaluationcontext import EvaluationContext
 
 
 class ALL(AbstractBoolOperator):
@@ -14,15 +15,47 @@ class ALL(AbstractBoolOperator):
 
     str_template = "ALL[{name}](\n{operator}\n)"
             
-    def __init__(self, name, operator):
+    def __init__(self, name, operator, with_cache=True):
+        """
+
+        :param name:
+        :param operator:
+        :param with_cache: cache the result in the evaluation context of the location (as in BoolREF),
+            so that a quantified subexpression shared by multiple categories is evaluated only once
+        """
         if self.is_bool_op(operator):
             error("ALL is not defined for bool operators: ", operator)
         self.filter_operator = operator
         self.name = self.get_name("__ALL_", name, self.filter_operator)
+        self.with_cache = with_cache
+
+    def get_operands(self):
+        return [self.filter_operator]
+
+    def set_operands(self, operands):
+        self.filter_operator = operands[0]
+
+    def get_structure(self):
+        return type(self), self.name, self.with_cache, self.filter_operator
 
-    def apply(self, tag_bundle_set):
-        matching_tag_bundles = self.filter_operator.apply(tag_bundle_set)
+    def __apply(self, tag_bundle_set, context):
+        matching_tag_bundles = self.filter_operator.apply(tag_bundle_set, context)
         return len(matching_tag_bundles) == len(tag_bundle_set), [(self.name, matching_tag_bundles)]
+
+    def apply(self, tag_bundle_set, context=None):
+        if not self.with_cache:
+            return self.__apply(tag_bundle_set, context)
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(("apply", self), tag_bundle_set, lambda: self.__apply(tag_bundle_set, context))
+
+    def evaluate(self, tag_bundle_set, context=None):
+        if not self.with_cache:
+            return self.filter_operator.all_match(tag_bundle_set, context)
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(self, tag_bundle_set,
+                               lambda: self.filter_operator.all_match(tag_bundle_set, context))
     
     def __str__(self):
         return self.str_template.format(name=self.name[6:],
@@ -36,16 +69,51 @@ class ANY(AbstractBoolOperator):
     
     str_template = "ANY[{name}](\n{operator}\n)"
             
-    def __init__(self, name, operator):
+    def __init__(self, name, operator, with_cache=True):
+        """
+
+        :param name:
+        :param operator:
+        :param with_cache: cache the result in the evaluation context of the location (as in BoolREF),
+            so that a quantified subexpression shared by multiple categories is evaluated only once
+        """
         if self.is_bool_op(operator):
             error("ANY is not defined for bool operators: ", operator)
         self.filter_operator = operator
         self.name = self.get_name("__ANY_", name, self.filter_operator)
+        self.with_cache = with_cache
+
+    def get_operands(self):
+        return [self.filter_operator]
+
+    def set_operands(self, operands):
+        self.filter_operator = operands[0]
+
+    def get_structure(self):
+        return type(self), self.name, self.with_cache, self.filter_operator
+
+    def get_necessary_keys(self):
+        return self.filter_operator.get_necessary_keys()
   
-    def apply(self, tag_bundle_set):
-        matching_tag_bundles = self.filter_operator.apply(tag_bundle_set)
+    def __apply(self, tag_bundle_set, context):
+        matching_tag_bundles = self.filter_operator.apply(tag_bundle_set, context)
         return len(matching_tag_bundles) > 0, [(self.name, matching_tag_bundles)]
 
+    def apply(self, tag_bundle_set, context=None):
+        if not self.with_cache:
+            return self.__apply(tag_bundle_set, context)
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(("apply", self), tag_bundle_set, lambda: self.__apply(tag_bundle_set, context))
+
+    def evaluate(self, tag_bundle_set, context=None):
+        if not self.with_cache:
+            return self.filter_operator.any_match(tag_bundle_set, context)
+        if context is None:
+            context = EvaluationContext(tag_bundle_set)
+        return context.memoize(self, tag_bundle_set,
+                               lambda: self.filter_operator.any_match(tag_bundle_set, context))
+
     def __str__(self):
         return self.str_template.format(name=self.name[6:],
                                         operator=indent(str(self.filter_operator), base_indent_num))
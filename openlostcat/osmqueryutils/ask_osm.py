@@ -20,33 +20,47 @@ out body;
 """
 
 
-def ask_osm(query, url=overpass_url):
+def ask_osm(query, url=overpass_url, cache=None, client=None):
     """Queries the Overpass API with a query string
 
-    :param query: an overpass query string
-    :param url:   API address
-    :return:      query results in json
+    :param query:  an overpass query string
+    :param url:    API address
+    :param cache:  ResponseCache of the query results (optional)
+    :param client: OverpassClient reusing pooled connections (optional, a new connection for each query by default)
+    :return:       query results in json
     """
-    result = requests.get(url, params={'data': query})
+    if cache is not None:
+        cached_result = cache.get(query, url)
+        if cached_result is not None:
+            return cached_result
+    if client is not None:
+        result = client.query(query, url)
+    else:
+        result = requests.get(url, params={'data': query})
     if result.status_code != 200:
         return None
     else:
-        return result.json()
+        result_json = result.json()
+        if cache is not None:
+            cache.set(query, url, result_json)
+        return result_json
 
 
-def ask_osm_around_point(lat, lng, distance=100, url=overpass_url):
+def ask_osm_around_point(lat, lng, distance=100, url=overpass_url, cache=None, client=None):
     """Queries the Overpass API around a point with a distance as radius
 
     :param lat:      wgs84 latitude
     :param lng:      wgs84 longitude
     :param distance: radius in meters
     :param url:      API address
+    :param cache:    ResponseCache of the query results (optional)
+    :param client:   OverpassClient reusing pooled connections (optional)
     :return:         query results in json
     """
-    return ask_osm(query_teplate.format(distance=distance, lat=lat, lng=lng), url=url)
+    return ask_osm(query_teplate.format(distance=distance, lat=lat, lng=lng), url=url, cache=cache, client=client)
 
 
-def ask_osm_around_point_df(df_row, distance=100, url=overpass_url):
+def ask_osm_around_point_df(df_row, distance=100, url=overpass_url, cache=None, client=None):
     """Queries the Overpass API around a point with a distance as radius, given in a dataframe
 
     Examaple:
@@ -55,12 +69,16 @@ def ask_osm_around_point_df(df_row, distance=100, url=overpass_url):
     :param df_row:   a dataframe row with wgs84 coordinates in fields named lat, lng
     :param distance: radius in meters
     :param url:      API address
+    :param cache:    ResponseCache of the query results (optional)
+    :param client:   OverpassClient reusing pooled connections (optional)
     :return:         query results in json
     """
-    return ask_osm_around_point(lat=df_row.lat, lng=df_row.lng, distance=distance, url=url)
+    return ask_osm_around_point(lat=df_row.lat, lng=df_row.lng, distance=distance, url=url, cache=cache,
+                                client=client)
 
 
-def ask_osm_around_point_np(coord_row, distance=100, lat_index=0, lng_index=1, url=overpass_url):
+def ask_osm_around_point_np(coord_row, distance=100, lat_index=0, lng_index=1, url=overpass_url, cache=None,
+                            client=None):
     """Queries the Overpass API around a point with a distance as radius, given in a np array of coords
 
     Example:
@@ -71,6 +89,9 @@ def ask_osm_around_point_np(coord_row, distance=100, lat_index=0, lng_index=1, u
     :param lat_index: index of latitude coordinate
     :param lng_index: index of longitude coordinate
     :param url:       API address
+    :param cache:     ResponseCache of the query results (optional)
+    :param client:    OverpassClient reusing pooled connections (optional)
     :return:          query results in json
     """
-    return ask_osm_around_point(lat=coord_row[lat_index], lng=coord_row[lng_index], distance=distance, url=url)
+    return ask_osm_around_point(lat=coord_row[lat_index], lng=coord_row[lng_index], distance=distance, url=url,
+                                cache=cache, client=client)
@@ -0,0 +1,129 @@
+"""
+ask_osm_async is about querying OpenStreetMap using the Overpass API concurrently for many locations
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import requests
+from openlostcat.osmqueryutils.ask_osm import overpass_url, query_teplate
+from openlostcat.osmqueryutils.overpass_client import OverpassClient
+
+# retry_statuses : the Overpass API answers 429 (too many requests) and 504 (gateway timeout) when it is overloaded,
+# such requests are retried with exponential backoff
+
+retry_statuses = (429, 504)
+
+
+def get_retry_delay(response, attempt, backoff):
+    """Determines the delay before retrying a request
+
+    :param response: the response retried (None for a connection error)
+    :param attempt:  the number of the failed attempt (from 0)
+    :param backoff:  delay in seconds after the first attempt, doubled after each further attempt
+    :return:         delay in seconds (the Retry-After header of the response, if it is longer)
+    """
+    delay = backoff * 2 ** attempt
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after is not None and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return delay
+
+
+async def ask_osm_async(query, url=overpass_url, semaphore=None, executor=None, retries=5, backoff=1.0, timeout=180,
+                        cache=None, client=None):
+    """Queries the Overpass API with a query string without blocking the event loop,
+    retrying with exponential backoff if the API is overloaded
+
+    :param query:     an overpass query string
+    :param url:       API address
+    :param semaphore: asyncio.Semaphore limiting the number of concurrent requests (optional)
+    :param executor:  executor of the blocking requests (optional, the default executor of the event loop)
+    :param retries:   maximal number of retries
+    :param backoff:   delay in seconds before the first retry, doubled for each further retry
+    :param timeout:   timeout of a request in seconds (the timeouts of the client, if given)
+    :param cache:     ResponseCache of the query results (optional)
+    :param client:    OverpassClient reusing pooled connections (optional)
+    :return:          query results in json (None if the query fails)
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(1)
+    loop = asyncio.get_running_loop()
+    if cache is not None:
+        cached_result = await loop.run_in_executor(executor, cache.get, query, url)
+        if cached_result is not None:
+            return cached_result
+    async with semaphore:
+        for attempt in range(retries + 1):
+            try:
+                if client is not None:
+                    response = await loop.run_in_executor(executor, client.query, query, url)
+                else:
+                    response = await loop.run_in_executor(
+                        executor, partial(requests.get, url, params={'data': query}, timeout=timeout))
+            except requests.RequestException:
+                response = None
+            if response is not None and response.status_code == 200:
+                result = response.json()
+                if cache is not None:
+                    await loop.run_in_executor(executor, cache.set, query, url, result)
+                return result
+            if (response is not None and response.status_code not in retry_statuses) or attempt == retries:
+                return None
+            # the slot is kept while waiting, so that an overloaded API gets fewer requests
+            await asyncio.sleep(get_retry_delay(response, attempt, backoff))
+
+
+async def ask_osm_around_points_async(coords, distance=100, url=overpass_url, max_concurrency=4, retries=5,
+                                      backoff=1.0, timeout=180, cache=None, client=None):
+    """Queries the Overpass API around many points concurrently with a distance as radius
+
+    Example:
+    results = await ask_osm_around_points_async([(47.5001, 19.0247), (47.4945, 18.9464)], distance=300)
+
+    :param coords:          iterable of (lat, lng) wgs84 coordinate pairs
+    :param distance:        radius in meters
+    :param url:             API address
+    :param max_concurrency: maximal number of requests in progress at a time
+    :param retries:         maximal number of retries of a request (on 429/504 statuses and connection errors)
+    :param backoff:         delay in seconds before the first retry, doubled for each further retry
+    :param timeout:         timeout of a request in seconds (the timeouts of the client, if given)
+    :param cache:           ResponseCache of the query results (optional)
+    :param client:          OverpassClient reusing pooled connections
+        (optional, a client with a pool of max_concurrency connections for these queries by default)
+    :return:                dictionary of the query results in json (or None if failed) by the index of the point
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    own_client = client is None
+    if own_client:
+        client = OverpassClient(pool_size=max_concurrency, read_timeout=timeout)
+    try:
+        with ThreadPoolExecutor(max_concurrency) as executor:
+            queries = [query_teplate.format(distance=distance, lat=lat, lng=lng) for lat, lng in coords]
+            results = await asyncio.gather(*[ask_osm_async(query, url, semaphore, executor, retries, backoff, timeout,
+                                                           cache, client)
+                                             for query in queries])
+    finally:
+        if own_client:
+            client.close()
+    return dict(enumerate(results))
+
+
+def ask_osm_around_points(coords, distance=100, url=overpass_url, max_concurrency=4, retries=5, backoff=1.0,
+                          timeout=180, cache=None, client=None):
+    """Queries the Overpass API around many points concurrently, see ask_osm_around_points_async
+    (not to be called from a running event loop, e.g. a notebook cell, await ask_osm_around_points_async there)
+
+    :param coords:          iterable of (lat, lng) wgs84 coordinate pairs
+    :param distance:        radius in meters
+    :param url:             API address
+    :param max_concurrency: maximal number of requests in progress at a time
+    :param retries:         maximal number of retries of a request
+    :param backoff:         delay in seconds before the first retry, doubled for each further retry
+    :param timeout:         timeout of a request in seconds
+    :param cache:           ResponseCache of the query results (optional)
+    :param client:          OverpassClient reusing pooled connections (optional)
+    :return:                dictionary of the query results in json (or None if failed) by the index of the point
+    """
+    return asyncio.run(ask_osm_around_points_async(coords, distance, url, max_concurrency, retries, backoff, timeout,
+                                                   cache, client))
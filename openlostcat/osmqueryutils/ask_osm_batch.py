@@ -0,0 +1,107 @@
+"""
+ask_osm_batch is about querying OpenStreetMap around many nearby points with a single Overpass query for each group
+"""
+
+from math import cos, radians
+from openlostcat.osmqueryutils.ask_osm import ask_osm, overpass_url
+from openlostcat.osmqueryutils.geometry import element_or_bounds_distance
+
+# batch_query_template : queries all objects around any of the points of a group,
+# with their geometry, so that they can be assigned to the points locally
+#
+# The geometry is only output within the bounding box of the circles around the points (with the bounds of the ways
+# and relations), so that a huge relation (e.g. a country border) near a point is not transferred with all its members.
+
+batch_query_template = """
+[out:json];
+(
+{around_statements}
+);
+out tags geom({south},{west},{north},{east});
+"""
+
+around_statement_template = " nwr(around:{distance},{lat},{lng});"
+
+# meters of a degree of latitude
+meters_per_degree = 111320.0
+
+
+def group_points(coords, cell_size=1000, max_group_size=50):
+    """Groups nearby points by a grid of cells
+
+    :param coords:         list of (lat, lng) wgs84 coordinate pairs
+    :param cell_size:      size of the grid cells in meters
+    :param max_group_size: maximal number of points in a group (a crowded cell is split)
+    :return:               list of lists of the indices of the points of the groups
+    """
+    cells = {}
+    for i, (lat, lng) in enumerate(coords):
+        cell_lat = int(lat * meters_per_degree // cell_size)
+        cell_lng = int(lng * meters_per_degree * cos(radians(lat)) // cell_size)
+        cells.setdefault((cell_lat, cell_lng), []).append(i)
+    return [indices[i:i + max_group_size] for indices in cells.values()
+            for i in range(0, len(indices), max_group_size)]
+
+
+def get_batch_query(coords, distance=100):
+    """Creates the query of the objects around any of the points
+
+    :param coords:   list of (lat, lng) wgs84 coordinate pairs
+    :param distance: radius in meters
+    :return:         an overpass query string
+    """
+    lats, lngs = [lat for lat, _ in coords], [lng for _, lng in coords]
+    d_lat = distance / meters_per_degree
+    d_lng = distance / (meters_per_degree * max(min(cos(radians(lat)) for lat in lats), 1e-12))
+    return batch_query_template.format(around_statements="\n".join(
+        around_statement_template.format(distance=distance, lat=lat, lng=lng) for lat, lng in coords),
+        south=min(lats) - d_lat, west=min(lngs) - d_lng, north=max(lats) + d_lat, east=max(lngs) + d_lng)
+
+
+def assign_elements(osm_json_dict, coords, distance=100):
+    """Assigns the elements queried around a group of points to the points within the distance
+
+    An element without geometry within the bounding box of the query (e.g. a relation of relations) is assigned
+    by its bounds, or to all the points if it has no bounds either, as it has been found around one of them.
+
+    :param osm_json_dict: query results in json, with the geometry of the elements
+    :param coords:        list of (lat, lng) wgs84 coordinate pairs
+    :param distance:      radius in meters
+    :return:              list of query results in json, one for each point (as queried for the point alone)
+    """
+    results = [{"elements": []} for _ in coords]
+    for element in osm_json_dict["elements"]:
+        for (lat, lng), result in zip(coords, results):
+            d = element_or_bounds_distance(element, lat, lng)
+            if d is None or d <= distance:
+                result["elements"].append(element)
+    return results
+
+
+def ask_osm_around_points_batched(coords, distance=100, url=overpass_url, cell_size=1000, max_group_size=50,
+                                  cache=None, client=None):
+    """Queries the Overpass API around many points with a distance as radius,
+    with a single query for each group of nearby points (the common objects of the points are transferred once)
+
+    Example:
+    results = ask_osm_around_points_batched(df[["lat", "lng"]].values, distance=300)
+    categories = {i: categorizer.categorize(result) for i, result in results.items() if result is not None}
+
+    :param coords:         iterable of (lat, lng) wgs84 coordinate pairs
+    :param distance:       radius in meters
+    :param url:            API address
+    :param cell_size:      size of the grid cells grouping the points in meters
+    :param max_group_size: maximal number of points in a query
+    :param cache:          ResponseCache of the query results of the groups (optional)
+    :param client:         OverpassClient reusing pooled connections (optional)
+    :return:               dictionary of the query results in json (None if failed) by the index of the point
+    """
+    coords = [(lat, lng) for lat, lng in coords]
+    results = {}
+    for group in group_points(coords, cell_size, max_group_size):
+        group_coords = [coords[i] for i in group]
+        osm_json_dict = ask_osm(get_batch_query(group_coords, distance), url=url, cache=cache, client=client)
+        group_results = assign_elements(osm_json_dict, group_coords, distance) if osm_json_dict is not None \
+            else [None] * len(group)
+        results.update(zip(group, group_results))
+    return dict(sorted(results.items()))
@@ -0,0 +1,112 @@
+"""
+ask_osm_projected is about querying only the OpenStreetMap objects and tags that a category catalog can see
+"""
+
+from openlostcat.osmqueryutils.ask_osm import ask_osm, overpass_url
+
+# projected_query_template : queries the tagged objects around the point having any of the keys (by a key regex),
+# and one representative of the other tagged objects
+#
+# The tags of other keys do not affect the categorization, so the other tagged objects are all the same for the rules
+# as an empty tag bundle. Their presence still matters (e.g. for ALL or NOT conditions), but one of them is enough.
+
+projected_query_template = """
+[out:json];
+ nwr(around:{distance},{lat},{lng})(if:count_tags() > 0)->.tagged;
+ nwr.tagged[~{key_regex}~".*"]->.relevant;
+ .relevant out tags;
+ (.tagged; - .relevant;)->.other;
+ .other out tags 1;
+"""
+
+# representative_query_template : the query for a catalog without keys (only the presence of tagged objects matters)
+
+representative_query_template = """
+[out:json];
+ nwr(around:{distance},{lat},{lng})(if:count_tags() > 0);
+out tags 1;
+"""
+
+# regex_special_chars : characters to be escaped in the key regex
+
+regex_special_chars = "\\^$.|?*+()[]{}"
+
+
+def get_key_regex(keys):
+    """Creates an Overpass string of a regex matching exactly the given keys
+
+    :param keys: iterable of tag keys
+    :return:     quoted regex
+    """
+    regex = "^({})$".format("|".join(sorted("".join("\\" + c if c in regex_special_chars else c for c in key)
+                                            for key in keys)))
+    return '"' + regex.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def get_projected_query(keys, lat, lng, distance=100):
+    """Creates a query of the objects around a point with a distance as radius, projected to the keys
+
+    :param keys:     iterable of tag keys (e.g. MainOsmCategorizer.get_referenced_keys())
+    :param lat:      wgs84 latitude
+    :param lng:      wgs84 longitude
+    :param distance: radius in meters
+    :return:         an overpass query string
+    """
+    keys = list(keys)
+    if not keys:
+        return representative_query_template.format(distance=distance, lat=lat, lng=lng)
+    return projected_query_template.format(distance=distance, lat=lat, lng=lng, key_regex=get_key_regex(keys))
+
+
+def ask_osm_around_point_projected(lat, lng, keys, distance=100, url=overpass_url, cache=None, client=None):
+    """Queries the Overpass API around a point with a distance as radius, only for the objects and tags
+    that can affect the categorization by the rules looking up the keys (the tags only, without geometry)
+
+    Example:
+    categorizer.categorize(ask_osm_around_point_projected(47.5001, 19.0247, categorizer.get_referenced_keys()))
+
+    :param lat:      wgs84 latitude
+    :param lng:      wgs84 longitude
+    :param keys:     iterable of tag keys (e.g. MainOsmCategorizer.get_referenced_keys())
+    :param distance: radius in meters
+    :param url:      API address
+    :param cache:    ResponseCache of the query results (optional)
+    :param client:   OverpassClient reusing pooled connections (optional)
+    :return:         query results in json
+    """
+    return ask_osm(get_projected_query(keys, lat, lng, distance), url=url, cache=cache, client=client)
+
+
+def ask_osm_around_point_projected_df(df_row, keys, distance=100, url=overpass_url, cache=None, client=None):
+    """Queries the Overpass API around a point with a distance as radius, given in a dataframe,
+    projected to the keys
+
+    :param df_row:   a dataframe row with wgs84 coordinates in fields named lat, lng
+    :param keys:     iterable of tag keys
+    :param distance: radius in meters
+    :param url:      API address
+    :param cache:    ResponseCache of the query results (optional)
+    :param client:   OverpassClient reusing pooled connections (optional)
+    :return:         query results in json
+    """
+    return ask_osm_around_point_projected(df_row.lat, df_row.lng, keys, distance=distance, url=url, cache=cache,
+                                          client=client)
+
+
+def ask_osm_around_point_projected_np(coord_row, keys, distance=100, lat_index=0, lng_index=1, url=overpass_url,
+                                      cache=None, client=None):
+    """Queries the Overpass API around a point with a distance as radius, given in a np array of coords,
+    projected to the keys
+
+    :param coord_row: a numpy array row with wgs84 coordinates in fields at lat_index, lng_index
+    :param keys:      iterable of tag keys
+    :param distance:  radius in meters
+    :param lat_index: index of latitude coordinate
+    :param lng_index: index of longitude coordinate
+    :param url:       API address
+    :param cache:     ResponseCache of the query results (optional)
+    :param client:    OverpassClient reusing pooled connections (optional)
+    :return:          query results in json
+    """
+    return ask_osm_around_point_projected(coord_row[lat_index], coord_row[lng_index], keys, distance=distance,
+                                          url=url, cache=cache, client=client)
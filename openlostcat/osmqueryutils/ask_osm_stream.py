@@ -0,0 +1,219 @@
+"""
+ask_osm_stream is about querying OpenStreetMap using the Overpass API with the response parsed incrementally,
+keeping only the tags of the objects instead of loading the whole response
+"""
+
+import codecs
+from contextlib import closing
+import json
+import weakref
+import requests
+from openlostcat.osmqueryutils.ask_osm import overpass_url, query_teplate
+
+# chunk_size : number of bytes of the response read at once
+
+chunk_size = 65536
+
+
+class JsonStreamBuffer:
+    """Buffer of the text of a json document arriving in chunks,
+    decoding its values one by one (the decoded text is dropped from the buffer)
+
+    """
+
+    whitespace = " \t\n\r"
+    number_chars = "0123456789.eE+-"
+
+    def __init__(self, text_chunks):
+        """Initializer
+
+        :param text_chunks: iterable of the consecutive strings of the json document
+        """
+        self.text_chunks = iter(text_chunks)
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+        self.decoder = json.JSONDecoder()
+
+    def read_chunk(self):
+        """Appends the next chunk to the buffer
+
+        :return: False if there are no more chunks
+        """
+        chunk = next(self.text_chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skips whitespace and retrieves the next character without consuming it
+
+        :return: the next character, None at the end of the document
+        """
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in self.whitespace:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read_chunk():
+                return None
+
+    def next_char(self, expected=None):
+        """Consumes the next (not whitespace) character
+
+        :param expected: the characters allowed (optional)
+        :return:         the character
+        """
+        char = self.peek()
+        if char is None or (expected is not None and char not in expected):
+            raise ValueError("Invalid json at: " + self.text[self.pos:self.pos + 40])
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """Decodes the next json value, reading chunks until it is complete
+
+        :return: the value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.pos)
+                # a number may continue in the next chunk
+                if self.exhausted or (end < len(self.text) and self.text[end] not in self.number_chars):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            # the buffer is doubled before decoding again, so that a long value is not decoded many times
+            target = 2 * (len(self.text) - self.pos) + 1
+            while len(self.text) - self.pos < target and self.read_chunk():
+                pass
+
+
+def iter_osm_elements(text_chunks):
+    """Parses the elements of an Overpass json response one by one as the chunks of the response arrive
+    (only the element being parsed is kept in memory)
+
+    :param text_chunks: iterable of the consecutive strings of the response
+    :return:            generator of elements in json
+    """
+    buffer = JsonStreamBuffer(text_chunks)
+    buffer.next_char("{")
+    if buffer.peek() == "}":
+        return
+    while True:
+        key = buffer.decode()
+        buffer.next_char(":")
+        if key == "elements":
+            buffer.next_char("[")
+            if buffer.peek() == "]":
+                buffer.next_char()
+            else:
+                while True:
+                    yield buffer.decode()
+                    if buffer.next_char(",]") == "]":
+                        break
+        else:
+            # small values as version, generator, osm3s or remark
+            buffer.decode()
+        if buffer.next_char(",}") == "}":
+            return
+
+
+def iter_osm_tags(elements, with_identity=False):
+    """Retrieves the tags of the elements (the same as utils.get_tags_from_osm_elements, lazily)
+
+    :param elements:      iterable of elements in json
+    :param with_identity: retrieve the identity of the elements too
+    :return:              generator of dictionaries of tags (or ((type, id, version), tags) pairs if with_identity,
+                          as by utils.get_identified_tags_from_osm_elements), closing the elements when closed
+    """
+    try:
+        for element in elements:
+            if 'tags' in element:
+                yield ((element.get('type'), element.get('id'), element.get('version')), element['tags']) \
+                    if with_identity else element['tags']
+    finally:
+        if hasattr(elements, "close"):
+            elements.close()
+
+
+def iter_response_text(response):
+    """Reads the body of a response in chunks as it arrives (decompressed and decoded)
+
+    :param response: requests.Response opened with stream=True
+    :return:         generator of strings
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")()
+    for chunk in response.iter_content(chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_response_elements(response):
+    """Parses the elements of a streamed response as it arrives,
+    closing the response at the end or when the generator is closed (e.g. abandoned by the caller)
+
+    :param response: requests.Response opened with stream=True
+    :return:         generator of elements in json
+    """
+    with closing(response):
+        yield from iter_osm_elements(iter_response_text(response))
+
+
+def ask_osm_elements(query, url=overpass_url, client=None):
+    """Queries the Overpass API with a query string, parsing the elements of the response as it arrives
+
+    :param query:  an overpass query string
+    :param url:    API address
+    :param client: OverpassClient reusing pooled connections (optional)
+    :return:       generator of elements in json (the response is read as they are consumed), None if the query fails
+    """
+    if client is not None:
+        response = client.query(query, url, stream=True)
+    else:
+        response = requests.get(url, params={'data': query}, stream=True)
+    if response.status_code != 200:
+        response.close()
+        return None
+    elements = iter_response_elements(response)
+    # a generator never iterated does not run its cleanup, so the response is also closed when it is collected
+    weakref.finalize(elements, response.close)
+    return elements
+
+
+def ask_osm_tags(query, url=overpass_url, client=None, with_identity=False):
+    """Queries the Overpass API with a query string, retrieving the tags of the objects as the response arrives
+
+    Example:
+    categorizer.categorize_tags(ask_osm_tags(query))
+
+    :param query:         an overpass query string
+    :param url:           API address
+    :param client:        OverpassClient reusing pooled connections (optional)
+    :param with_identity: retrieve the (type, id, version) identity of the objects too
+    :return:              generator of dictionaries of tags (see iter_osm_tags), None if the query fails
+    """
+    elements = ask_osm_elements(query, url=url, client=client)
+    return None if elements is None else iter_osm_tags(elements, with_identity)
+
+
+def ask_osm_around_point_tags(lat, lng, distance=100, url=overpass_url, client=None, with_identity=False):
+    """Queries the Overpass API around a point with a distance as radius,
+    retrieving the tags of the objects as the response arrives
+
+    :param lat:           wgs84 latitude
+    :param lng:           wgs84 longitude
+    :param distance:      radius in meters
+    :param url:           API address
+    :param client:        OverpassClient reusing pooled connections (optional)
+    :param with_identity: retrieve the (type, id, version) identity of the objects too
+    :return:              generator of dictionaries of tags (see iter_osm_tags), None if the query fails
+    """
+    return ask_osm_tags(query_teplate.format(distance=distance, lat=lat, lng=lng), url=url, client=client,
+                        with_identity=with_identity)
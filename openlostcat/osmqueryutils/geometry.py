@@ -0,0 +1,120 @@
+"""
+geometry is about distances of points and OpenStreetMap elements queried with their geometry (out geom/out center)
+"""
+
+from math import radians, sin, cos, asin, sqrt
+
+# earth_radius : mean radius of the earth in meters
+
+earth_radius = 6371008.8
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distance of two points
+
+    :param lat1: wgs84 latitude of the first point
+    :param lng1: wgs84 longitude of the first point
+    :param lat2: wgs84 latitude of the second point
+    :param lng2: wgs84 longitude of the second point
+    :return:     distance in meters
+    """
+    d_lat = radians(lat2 - lat1)
+    d_lng = radians(lng2 - lng1)
+    a = sin(d_lat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(d_lng / 2) ** 2
+    return 2 * earth_radius * asin(min(1.0, sqrt(a)))
+
+
+def segment_distance(lat, lng, lat1, lng1, lat2, lng2):
+    """Distance of a point and a line segment (projected to a local plane at the point, for short segments)
+
+    :param lat: wgs84 latitude of the point
+    :param lng: wgs84 longitude of the point
+    :param lat1: wgs84 latitude of the first end of the segment
+    :param lng1: wgs84 longitude of the first end of the segment
+    :param lat2: wgs84 latitude of the second end of the segment
+    :param lng2: wgs84 longitude of the second end of the segment
+    :return:     distance in meters
+    """
+    scale = cos(radians(lat))
+    x1, y1 = (lng1 - lng) * scale, lat1 - lat
+    x2, y2 = (lng2 - lng) * scale, lat2 - lat
+    dx, dy = x2 - x1, y2 - y1
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, -(x1 * dx + y1 * dy) / length2))
+    # the nearest point of the segment
+    return haversine(lat, lng, lat1 + t * (lat2 - lat1), lng1 + t * (lng2 - lng1))
+
+
+def bounds_distance(bounds, lat, lng):
+    """Distance of a point and a bounding box (its nearest point)
+
+    :param bounds: bounding box in json (minlat, minlon, maxlat, maxlon as by Overpass out geom)
+    :param lat:    wgs84 latitude of the point
+    :param lng:    wgs84 longitude of the point
+    :return:       distance in meters (0 inside the box)
+    """
+    return haversine(lat, lng, min(max(lat, bounds["minlat"]), bounds["maxlat"]),
+                     min(max(lng, bounds["minlon"]), bounds["maxlon"]))
+
+
+def element_or_bounds_distance(element, lat, lng):
+    """Distance of a point and an osm element by its geometry, or by its bounds if it has no geometry
+    (e.g. clipped to the bounding box of the query, or a relation of relations)
+
+    :param element: osm element in json with its geometry and/or bounds
+    :param lat:     wgs84 latitude of the point
+    :param lng:     wgs84 longitude of the point
+    :return:        distance in meters, None if the element has neither geometry nor bounds
+    """
+    d = element_distance(element, lat, lng)
+    if d is None and "bounds" in element:
+        d = bounds_distance(element["bounds"], lat, lng)
+    return d
+
+
+def split_line(points):
+    """Splits a line at its missing points (e.g. the nodes of a way outside the bounding box of the query)
+
+    :param points: list of lat/lon dictionaries (None for a missing point)
+    :return:       list of lists of (lat, lng) tuples
+    """
+    lines = [[]]
+    for p in points:
+        if p:
+            lines[-1].append((p["lat"], p["lon"]))
+        elif lines[-1]:
+            lines.append([])
+    return [line for line in lines if line]
+
+
+def get_element_lines(element):
+    """Retrieves the geometry of an element as lines (single points for nodes and centers)
+
+    :param element: osm element in json with its geometry (lat/lon, center, geometry or members with geometry)
+    :return:        list of lists of (lat, lng) tuples, empty if the element has no geometry
+    """
+    if "lat" in element and "lon" in element:
+        return [[(element["lat"], element["lon"])]]
+    if "geometry" in element:
+        return split_line(element["geometry"])
+    if "members" in element and any("geometry" in m or "lat" in m for m in element["members"]):
+        return [line for member in element["members"] for line in get_element_lines(member)]
+    if "center" in element:
+        return [[(element["center"]["lat"], element["center"]["lon"])]]
+    return []
+
+
+def element_distance(element, lat, lng):
+    """Distance of a point and an osm element (its nearest point)
+
+    :param element: osm element in json with its geometry (lat/lon, center, geometry or members with geometry)
+    :param lat:     wgs84 latitude of the point
+    :param lng:     wgs84 longitude of the point
+    :return:        distance in meters, None if the element has no geometry
+    """
+    distances = []
+    for line in get_element_lines(element):
+        if len(line) == 1:
+            distances.append(haversine(lat, lng, *line[0]))
+        distances += [segment_distance(lat, lng, *p1, *p2) for p1, p2 in zip(line, line[1:])]
+    return min(distances) if distances else None
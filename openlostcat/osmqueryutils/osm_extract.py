@@ -0,0 +1,300 @@
+"""
+osm_extract is about answering queries around points offline from an OpenStreetMap extract (.osm XML or .osm.pbf)
+imported into a local SQLite index of the tags and positions of the map objects
+"""
+
+from contextlib import closing
+import json
+import sqlite3
+import xml.etree.ElementTree as ElementTree
+from math import cos, degrees, radians
+from openlostcat.osmqueryutils.geometry import element_distance, get_element_lines, earth_radius
+
+# batch_size : number of rows written at once during the import
+
+batch_size = 10000
+
+
+def read_osm_xml(source):
+    """Reads the elements of an .osm XML file one by one (the parsed elements are discarded, so that memory is bounded)
+
+    :param source: file path or (seekable) file object of an .osm XML file, read from its beginning
+    :return:       generator of elements as dictionaries: type, id, tags and lat/lon for nodes,
+                   nodes (the node ids) for ways, members (type, ref, role) for relations
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+    root = None
+    for event, elem in ElementTree.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end" or elem.tag not in ("node", "way", "relation"):
+            continue
+        element = {"type": elem.tag, "id": int(elem.get("id")),
+                   "tags": {tag.get("k"): tag.get("v") for tag in elem.iter("tag")}}
+        if elem.tag == "node":
+            element["lat"] = float(elem.get("lat"))
+            element["lon"] = float(elem.get("lon"))
+        elif elem.tag == "way":
+            element["nodes"] = [int(nd.get("ref")) for nd in elem.iter("nd")]
+        else:
+            element["members"] = [{"type": member.get("type"), "ref": int(member.get("ref")),
+                                   "role": member.get("role", "")} for member in elem.iter("member")]
+        # the elements read are removed from the tree
+        root.clear()
+        yield element
+
+
+def read_osm_pbf(path):
+    """Reads the elements of an .osm.pbf file one by one (requires the optional osmium package)
+
+    :param path: file path of an .osm.pbf file
+    :return:     generator of elements as by read_osm_xml
+    """
+    # osmium is an optional dependency, only required for reading .osm.pbf files
+    import osmium
+    for obj in osmium.FileProcessor(path):
+        element = {"type": {"n": "node", "w": "way", "r": "relation"}[obj.type_str()], "id": obj.id,
+                   "tags": {tag.k: tag.v for tag in obj.tags}}
+        if element["type"] == "node":
+            if not obj.location.valid():
+                continue
+            element["lat"] = obj.location.lat
+            element["lon"] = obj.location.lon
+        elif element["type"] == "way":
+            element["nodes"] = [node.ref for node in obj.nodes]
+        else:
+            element["members"] = [{"type": {"n": "node", "w": "way", "r": "relation"}[member.type],
+                                   "ref": member.ref, "role": member.role} for member in obj.members]
+        yield element
+
+
+class OsmExtractIndex:
+    """Local index of the tags and geometry of the map objects of an OpenStreetMap extract in a SQLite database,
+    answering the queries around points as the Overpass API (with the geometry of the objects)
+
+    The objects having tags are indexed by the bounding boxes of their geometry in an R*Tree.
+    If only the given keys are indexed (e.g. the keys referenced by a category catalog), the other tagged objects
+    are indexed without their tags: they are all the same for the rules as an empty tag bundle, and their presence
+    still matters (e.g. for ALL or NOT conditions), so one of them near a point is returned by the queries.
+    """
+
+    def __init__(self, path):
+        """Initializer
+
+        :param path: file path of the SQLite database (created if missing)
+        """
+        self.path = path
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS elements (
+                    rowid INTEGER PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    element TEXT NOT NULL,
+                    UNIQUE (type, id)
+                )""")
+            connection.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS element_bounds USING rtree(
+                    rowid, min_lat, max_lat, min_lon, max_lon
+                )""")
+
+    @staticmethod
+    def is_relevant(element, keys):
+        """Determines whether an element is to be indexed
+
+        :param element: element as read from the extract
+        :param keys:    set of tag keys (None for any key)
+        :return:        True if the element has a tag (of one of the keys)
+        """
+        return bool(element["tags"]) if keys is None else not keys.isdisjoint(element["tags"])
+
+    @staticmethod
+    def get_indexed_tags(element, keys):
+        """Retrieves the tags an element is indexed with
+
+        :param element: tagged element as read from the extract
+        :param keys:    set of tag keys (None for any key)
+        :return:        the tags of the element if it is relevant, otherwise no tags
+        """
+        return element["tags"] if OsmExtractIndex.is_relevant(element, keys) else {}
+
+    def import_extract(self, read_elements, keys=None):
+        """Imports the elements of an extract in two passes: the members of the relations to be indexed are collected
+        first, then the positions of all the nodes are stored temporarily (on disk) to build the geometry of the ways
+
+        :param read_elements: function returning a new generator of the elements of the extract
+            (e.g. lambda: read_osm_xml(path))
+        :param keys:          iterable of the tag keys of the elements to be indexed with their tags
+            (optional, e.g. CategoryCatalog.get_referenced_keys(), the other tagged elements are indexed without tags,
+            all the tagged elements with their tags by default)
+        :return:              the number of the indexed elements
+        """
+        keys = None if keys is None else frozenset(keys)
+        member_way_ids = set()
+        for element in read_elements():
+            if element["type"] == "relation" and element["tags"]:
+                member_way_ids.update(member["ref"] for member in element["members"] if member["type"] == "way")
+        count = 0
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute("CREATE TEMP TABLE node_positions (id INTEGER PRIMARY KEY, lat REAL, lon REAL)")
+            connection.execute("CREATE TEMP TABLE way_geometries (id INTEGER PRIMARY KEY, geometry TEXT)")
+            positions = []
+            for element in read_elements():
+                if element["type"] == "node":
+                    positions.append((element["id"], element["lat"], element["lon"]))
+                    if len(positions) >= batch_size:
+                        connection.executemany("INSERT OR REPLACE INTO node_positions VALUES (?, ?, ?)", positions)
+                        positions = []
+                    if element["tags"]:
+                        count += self.insert(connection, dict(element, tags=self.get_indexed_tags(element, keys)))
+                    continue
+                if positions:
+                    connection.executemany("INSERT OR REPLACE INTO node_positions VALUES (?, ?, ?)", positions)
+                    positions = []
+                if element["type"] == "way":
+                    is_tagged = bool(element["tags"])
+                    if not is_tagged and element["id"] not in member_way_ids:
+                        continue
+                    geometry = self.get_way_geometry(connection, element["nodes"])
+                    if element["id"] in member_way_ids:
+                        connection.execute("INSERT OR REPLACE INTO way_geometries VALUES (?, ?)",
+                                           (element["id"], json.dumps(geometry)))
+                    if is_tagged:
+                        count += self.insert(connection, {"type": "way", "id": element["id"],
+                                                          "tags": self.get_indexed_tags(element, keys),
+                                                          "geometry": geometry})
+                elif element["tags"]:
+                    count += self.insert(connection, {"type": "relation", "id": element["id"],
+                                                      "tags": self.get_indexed_tags(element, keys),
+                                                      "members": self.get_members(connection, element["members"])})
+            if positions:
+                connection.executemany("INSERT OR REPLACE INTO node_positions VALUES (?, ?, ?)", positions)
+            connection.execute("DROP TABLE node_positions")
+            connection.execute("DROP TABLE way_geometries")
+        return count
+
+    def import_osm_xml(self, source, keys=None):
+        """Imports an .osm XML file
+
+        :param source: file path or (seekable) file object of an .osm XML file
+        :param keys:   iterable of the tag keys of the elements to be indexed (optional, see import_extract)
+        :return:       the number of the indexed elements
+        """
+        return self.import_extract(lambda: read_osm_xml(source), keys)
+
+    def import_osm_pbf(self, path, keys=None):
+        """Imports an .osm.pbf file (requires the optional osmium package)
+
+        :param path: file path of an .osm.pbf file
+        :param keys: iterable of the tag keys of the elements to be indexed (optional, see import_extract)
+        :return:     the number of the indexed elements
+        """
+        return self.import_extract(lambda: read_osm_pbf(path), keys)
+
+    @staticmethod
+    def get_way_geometry(connection, node_ids):
+        """Builds the geometry of a way from the stored node positions
+
+        :param connection: sqlite3 connection with the node_positions table
+        :param node_ids:   list of the node ids of the way
+        :return:           list of lat/lon dictionaries (None for a node missing from the extract)
+        """
+        positions = {}
+        for i in range(0, len(node_ids), 500):
+            chunk = node_ids[i:i + 500]
+            positions.update((node_id, (lat, lon)) for node_id, lat, lon in connection.execute(
+                "SELECT id, lat, lon FROM node_positions WHERE id IN ({})".format(",".join("?" * len(chunk))), chunk))
+        return [{"lat": positions[node_id][0], "lon": positions[node_id][1]} if node_id in positions else None
+                for node_id in node_ids]
+
+    @staticmethod
+    def get_members(connection, members):
+        """Builds the members of a relation with their geometry (as Overpass with out geom)
+
+        :param connection: sqlite3 connection with the node_positions and way_geometries tables
+        :param members:    list of the members of the relation (type, ref, role)
+        :return:           list of members in json
+        """
+        result = []
+        for member in members:
+            member_json = dict(member)
+            if member["type"] == "node":
+                row = connection.execute("SELECT lat, lon FROM node_positions WHERE id = ?",
+                                         (member["ref"],)).fetchone()
+                if row is not None:
+                    member_json["lat"], member_json["lon"] = row
+            elif member["type"] == "way":
+                row = connection.execute("SELECT geometry FROM way_geometries WHERE id = ?",
+                                         (member["ref"],)).fetchone()
+                if row is not None:
+                    member_json["geometry"] = json.loads(row[0])
+            result.append(member_json)
+        return result
+
+    @staticmethod
+    def insert(connection, element):
+        """Indexes an element by the bounding box of its geometry
+
+        :param connection: sqlite3 connection
+        :param element:    element in json with its geometry
+        :return:           1 if indexed, 0 if it has no geometry
+        """
+        points = [p for line in get_element_lines(element) for p in line]
+        if not points:
+            return 0
+        lats, lons = [p[0] for p in points], [p[1] for p in points]
+        cursor = connection.execute("INSERT OR REPLACE INTO elements (type, id, element) VALUES (?, ?, ?)",
+                                    (element["type"], element["id"], json.dumps(element, separators=(",", ":"))))
+        connection.execute("INSERT OR REPLACE INTO element_bounds VALUES (?, ?, ?, ?, ?)",
+                           (cursor.lastrowid, min(lats), max(lats), min(lons), max(lons)))
+        return 1
+
+    def ask_osm_around_point(self, lat, lng, distance=100):
+        """Retrieves the objects around a point with a distance as radius from the index
+        (the same as ask_osm.ask_osm_around_point, with the geometry of the objects,
+        only one of the objects indexed without tags)
+
+        :param lat:      wgs84 latitude
+        :param lng:      wgs84 longitude
+        :param distance: radius in meters
+        :return:         query results in json
+        """
+        d_lat = degrees(distance / earth_radius)
+        d_lng = degrees(distance / (earth_radius * max(cos(radians(lat)), 1e-12)))
+        with closing(sqlite3.connect(self.path)) as connection:
+            rows = connection.execute("""
+                SELECT element FROM elements JOIN element_bounds ON elements.rowid = element_bounds.rowid
+                WHERE max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?
+                ORDER BY elements.rowid""", (lat - d_lat, lat + d_lat, lng - d_lng, lng + d_lng)).fetchall()
+        elements = []
+        has_untagged = False
+        for row in rows:
+            element = json.loads(row[0])
+            if has_untagged and not element["tags"]:
+                continue
+            d = element_distance(element, lat, lng)
+            if d is not None and d <= distance:
+                elements.append(element)
+                has_untagged = has_untagged or not element["tags"]
+        return {"elements": elements}
+
+    def ask_osm_around_point_df(self, df_row, distance=100):
+        """Retrieves the objects around a point with a distance as radius, given in a dataframe
+
+        :param df_row:   a dataframe row with wgs84 coordinates in fields named lat, lng
+        :param distance: radius in meters
+        :return:         query results in json
+        """
+        return self.ask_osm_around_point(lat=df_row.lat, lng=df_row.lng, distance=distance)
+
+    def ask_osm_around_point_np(self, coord_row, distance=100, lat_index=0, lng_index=1):
+        """Retrieves the objects around a point with a distance as radius, given in a np array of coords
+
+        :param coord_row: a numpy array row with wgs84 coordinates in fields at lat_index, lng_index
+        :param distance:  radius in meters
+        :param lat_index: index of latitude coordinate
+        :param lng_index: index of longitude coordinate
+        :return:          query results in json
+        """
+        return self.ask_osm_around_point(lat=coord_row[lat_index], lng=coord_row[lng_index], distance=distance)
@@ -0,0 +1,50 @@
+"""
+overpass_client is about reusing HTTP connections to the Overpass API for many queries
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from openlostcat.osmqueryutils.ask_osm import overpass_url
+
+
+class OverpassClient:
+    """HTTP client of the Overpass API with a pool of keep-alive connections, timeouts and compressed transfer,
+    to be passed as the client argument of the query functions (can be shared by multiple threads)
+
+    """
+
+    def __init__(self, pool_size=10, connect_timeout=10, read_timeout=180, compression=True):
+        """Initializer
+
+        :param pool_size:       maximal number of connections kept alive for each API address
+        :param connect_timeout: timeout of connecting to the API in seconds
+        :param read_timeout:    timeout of waiting for the response in seconds
+        :param compression:     request gzip/deflate compressed responses
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate" if compression else "identity"
+
+    def query(self, query, url=overpass_url, stream=False):
+        """Sends a query to the Overpass API on a pooled connection
+
+        :param query:  an overpass query string
+        :param url:    API address
+        :param stream: read the body of the response only as it is consumed (the connection is released after it)
+        :return:       requests.Response
+        """
+        return self.session.get(url, params={'data': query}, timeout=self.timeout, stream=stream)
+
+    def close(self):
+        """Closes the pooled connections
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
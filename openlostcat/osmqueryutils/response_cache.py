@@ -0,0 +1,176 @@
+"""
+response_cache is about storing Overpass query results on disk, so that repeated queries are not sent again
+"""
+
+from contextlib import closing
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import zlib
+
+# query_token_pattern : the quoted strings of a query (with escaped characters), kept as they are,
+# and the runs of whitespace outside them, normalized to a single space
+
+query_token_pattern = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|\s+')
+
+
+class ResponseCache:
+    """Persistent cache of Overpass query results in a SQLite database file
+
+    Results are keyed by the API address and the query with normalized whitespace (outside its quoted strings),
+    and stored compressed.
+    Results older than the TTL are not returned, and the least recently used ones are evicted
+    if the total size of the stored results exceeds the limit. The total size is kept up to date by triggers
+    in a single row, and the last access of a result is updated at most once in the access interval,
+    so that a retrieval does not write the database each time.
+    The database is opened in write-ahead logging mode for each operation,
+    so that a cache file can be used by multiple threads and processes at the same time.
+    """
+
+    create_table_statement = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL
+        )"""
+
+    # the running total of the sizes of the stored results, maintained by triggers
+    create_size_table_statements = [
+        "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)",
+        # initialized by the results of a cache file created without the running total
+        "INSERT OR IGNORE INTO cache_size VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM responses))",
+        """CREATE TRIGGER IF NOT EXISTS responses_inserted AFTER INSERT ON responses
+            BEGIN UPDATE cache_size SET total = total + NEW.size; END""",
+        """CREATE TRIGGER IF NOT EXISTS responses_updated AFTER UPDATE OF size ON responses
+            BEGIN UPDATE cache_size SET total = total - OLD.size + NEW.size; END""",
+        """CREATE TRIGGER IF NOT EXISTS responses_deleted AFTER DELETE ON responses
+            BEGIN UPDATE cache_size SET total = total - OLD.size; END"""
+    ]
+
+    def __init__(self, path, ttl=None, max_size=None, timeout=30.0, access_interval=60.0):
+        """Initializer
+
+        :param path: file path of the SQLite database (created if missing)
+        :param ttl: time to live of the results in seconds (optional, results never expire by default)
+        :param max_size: maximal total size of the compressed results in bytes (optional, unlimited by default)
+        :param timeout: seconds to wait for the lock of the database held by another process
+        :param access_interval: seconds within which the last access of a result is not updated again
+            (the precision of the least recently used order)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.timeout = timeout
+        self.access_interval = access_interval
+        with closing(self.connect()) as connection, connection:
+            connection.execute(self.create_table_statement)
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            for statement in self.create_size_table_statements:
+                connection.execute(statement)
+
+    def connect(self):
+        """Opens the database
+
+        :return: sqlite3 connection
+        """
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    @staticmethod
+    def normalize_query(query):
+        """Normalizes the whitespace of a query, so that the same query written differently has the same key
+        (the quoted strings, e.g. tag values, are kept as they are)
+
+        :param query: an overpass query string
+        :return: the query with single spaces between its tokens
+        """
+        return query_token_pattern.sub(lambda match: match.group() if match.group()[0] in "\"'" else " ",
+                                       query).strip()
+
+    def get_key(self, query, url):
+        """Computes the key of a query
+
+        :param query: an overpass query string
+        :param url: API address
+        :return: hex digest of the API address and the normalized query
+        """
+        return hashlib.sha256((url + "\n" + self.normalize_query(query)).encode("utf-8")).hexdigest()
+
+    def get(self, query, url):
+        """Retrieves the cached result of a query
+
+        :param query: an overpass query string
+        :param url: API address
+        :return: query results in json, None if not cached or expired
+        """
+        key = self.get_key(query, url)
+        now = time.time()
+        with closing(self.connect()) as connection, connection:
+            row = connection.execute("SELECT payload, created, accessed FROM responses WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is None:
+                return None
+            payload, created, accessed = row
+            if self.ttl is not None and now - created > self.ttl:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            if now - accessed > self.access_interval:
+                connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    def set(self, query, url, result):
+        """Stores the result of a query, evicting the least recently used results above the size limit
+
+        :param query: an overpass query string
+        :param url: API address
+        :param result: query results in json
+        """
+        payload = zlib.compress(json.dumps(result, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        with closing(self.connect()) as connection, connection:
+            # an upsert, so that the size of a replaced result is subtracted by the update trigger
+            connection.execute("""
+                INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET url = excluded.url, payload = excluded.payload, size = excluded.size,
+                    created = excluded.created, accessed = excluded.accessed""",
+                (self.get_key(query, url), url, payload, len(payload), now, now))
+            if self.max_size is not None:
+                self.evict(connection, self.max_size)
+
+    @staticmethod
+    def evict(connection, max_size):
+        """Deletes the least recently used results until their total size is within the limit
+
+        :param connection: sqlite3 connection in a transaction
+        :param max_size: maximal total size of the results in bytes
+        """
+        total_size = connection.execute("SELECT total FROM cache_size").fetchone()[0]
+        if total_size <= max_size:
+            return
+        evicted_keys = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total_size <= max_size:
+                break
+            evicted_keys.append((key,))
+            total_size -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+
+    def get_size(self):
+        """Retrieves the total size of the stored results
+
+        :return: size in bytes
+        """
+        with closing(self.connect()) as connection:
+            return connection.execute("SELECT total FROM cache_size").fetchone()[0]
+
+    def clear(self):
+        """Deletes all the stored results
+        """
+        with closing(self.connect()) as connection, connection:
+            connection.execute("DELETE FROM responses")
@@ -0,0 +1,159 @@
+"""
+tile_provider is about answering queries around points locally from OpenStreetMap tiles fetched once
+"""
+
+from collections import OrderedDict
+from math import asinh, atan, cos, degrees, pi, radians, sinh, tan
+from openlostcat.osmqueryutils.ask_osm import ask_osm, overpass_url
+from openlostcat.osmqueryutils.geometry import element_or_bounds_distance, earth_radius
+
+# tile_query_template : queries all objects of a tile (as a bounding box) with their geometry within the tile
+# (and the bounds of the ways and relations), so that a huge object touching the tile is not transferred in full
+
+tile_query_template = """
+[out:json];
+ nwr({south},{west},{north},{east});
+out tags geom({south},{west},{north},{east});
+"""
+
+
+def get_tile(lat, lng, zoom):
+    """Retrieves the slippy map tile containing a point
+
+    :param lat:  wgs84 latitude
+    :param lng:  wgs84 longitude
+    :param zoom: zoom level of the tiles
+    :return:     (x, y) tile indices
+    """
+    n = 2 ** zoom
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - asinh(tan(radians(lat))) / pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def get_tile_bounds(x, y, zoom):
+    """Retrieves the bounding box of a slippy map tile
+
+    :param x:    tile index from the west
+    :param y:    tile index from the north
+    :param zoom: zoom level of the tiles
+    :return:     (south, west, north, east) wgs84 coordinates
+    """
+    n = 2 ** zoom
+
+    def lat_of(tile_y):
+        return degrees(atan(sinh(pi * (1 - 2 * tile_y / n))))
+    return lat_of(y + 1), x / n * 360.0 - 180.0, lat_of(y), (x + 1) / n * 360.0 - 180.0
+
+
+def get_covering_tiles(lat, lng, distance, zoom):
+    """Retrieves the tiles covering the circle around a point
+
+    :param lat:      wgs84 latitude
+    :param lng:      wgs84 longitude
+    :param distance: radius in meters
+    :param zoom:     zoom level of the tiles
+    :return:         list of (x, y) tile indices
+    """
+    d_lat = degrees(distance / earth_radius)
+    d_lng = degrees(distance / (earth_radius * max(cos(radians(lat)), 1e-12)))
+    west, north = get_tile(lat + d_lat, lng - d_lng, zoom)
+    east, south = get_tile(lat - d_lat, lng + d_lng, zoom)
+    return [(x, y) for x in range(west, east + 1) for y in range(north, south + 1)]
+
+
+class TileNeighborhoodProvider:
+    """Answers queries around points from the objects of slippy map tiles,
+    each tile being queried from the Overpass API only once
+
+    The tiles are kept in memory (the most recently used ones) and, if a ResponseCache is given, on disk.
+    """
+
+    def __init__(self, zoom=16, url=overpass_url, cache=None, max_tiles_in_memory=256, client=None):
+        """Initializer
+
+        :param zoom:                zoom level of the tiles (a z16 tile is about 600 meters wide at the equator)
+        :param url:                 API address
+        :param cache:               ResponseCache of the tiles (optional)
+        :param max_tiles_in_memory: maximal number of tiles kept in memory
+        :param client:              OverpassClient reusing pooled connections (optional)
+        """
+        self.zoom = zoom
+        self.url = url
+        self.cache = cache
+        self.max_tiles_in_memory = max_tiles_in_memory
+        self.tiles = OrderedDict()
+        self.client = client
+
+    def get_tile_elements(self, x, y):
+        """Retrieves the objects of a tile, querying them at the first retrieval
+
+        :param x: tile index from the west
+        :param y: tile index from the north
+        :return:  list of elements in json with their geometry, None if the query fails
+        """
+        if (x, y) in self.tiles:
+            self.tiles.move_to_end((x, y))
+            return self.tiles[(x, y)]
+        south, west, north, east = get_tile_bounds(x, y, self.zoom)
+        result = ask_osm(tile_query_template.format(south=south, west=west, north=north, east=east),
+                         url=self.url, cache=self.cache, client=self.client)
+        if result is None:
+            return None
+        self.tiles[(x, y)] = result["elements"]
+        if len(self.tiles) > self.max_tiles_in_memory:
+            self.tiles.popitem(last=False)
+        return result["elements"]
+
+    def ask_osm_around_point(self, lat, lng, distance=100):
+        """Retrieves the objects around a point with a distance as radius from the covering tiles
+        (the same as ask_osm.ask_osm_around_point, with the geometry of the objects clipped to a tile)
+
+        An object crossing tile borders is within the distance if its geometry in any of the tiles is,
+        and an object without geometry in the tiles (e.g. a relation of relations) is tested by its bounds,
+        or returned if it has no bounds either (as by ask_osm_batch.assign_elements).
+
+        :param lat:      wgs84 latitude
+        :param lng:      wgs84 longitude
+        :param distance: radius in meters
+        :return:         query results in json, None if the query of a tile fails
+        """
+        elements = OrderedDict()
+        for x, y in get_covering_tiles(lat, lng, distance, self.zoom):
+            tile_elements = self.get_tile_elements(x, y)
+            if tile_elements is None:
+                return None
+            for element in tile_elements:
+                # objects crossing tile borders are in multiple tiles, with the geometry in each of them
+                key = (element["type"], element["id"])
+                if key not in elements:
+                    d = element_or_bounds_distance(element, lat, lng)
+                    if d is None or d <= distance:
+                        elements[key] = element
+        return {"elements": list(elements.values())}
+
+    def ask_osm_around_point_df(self, df_row, distance=100):
+        """Retrieves the objects around a point with a distance as radius, given in a dataframe
+
+        Example:
+        df.apply(provider.ask_osm_around_point_df, axis = 1)
+
+        :param df_row:   a dataframe row with wgs84 coordinates in fields named lat, lng
+        :param distance: radius in meters
+        :return:         query results in json
+        """
+        return self.ask_osm_around_point(lat=df_row.lat, lng=df_row.lng, distance=distance)
+
+    def ask_osm_around_point_np(self, coord_row, distance=100, lat_index=0, lng_index=1):
+        """Retrieves the objects around a point with a distance as radius, given in a np array of coords
+
+        Example:
+        np.apply_along_axis(provider.ask_osm_around_point_np, 1, coords)
+
+        :param coord_row: a numpy array row with wgs84 coordinates in fields at lat_index, lng_index
+        :param distance:  radius in meters
+        :param lat_index: index of latitude coordinate
+        :param lng_index: index of longitude coordinate
+        :return:          query results in json
+        """
+        return self.ask_osm_around_point(lat=coord_row[lat_index], lng=coord_row[lng_index], distance=distance)
@@ -2,6 +2,7 @@ from openlostcat.utils import error
 from openlostcat.category import Category
 from openlostcat.categorycatalog import CategoryCatalog
 from openlostcat.parsers.refdict import RefDict
+from openlostcat.parsers.subexpressionsharer import SubexpressionSharer
 from .categoryorrefdefparser import CategoryOrRefDefParser
 import json
 
@@ -24,12 +25,16 @@ class CategoryCatalogParser:
     """Top-level JSON key for the catalog properties
     """
 
-    def __init__(self, category_or_refdef_parser=None, ref_dict=None):
+    def __init__(self, category_or_refdef_parser=None, ref_dict=None, subexpression_sharer=None, rule_simplifier=None):
         """Initializer
 
         :param category_or_refdef_parser: Nested parser for single categories and reference definitions (optional)
         :param ref_dict: A reference dictionary object containing any named subexpressions
         being referred in the rules to be parsed (optional, usually created here as an empty dict)
+        :param subexpression_sharer: SubexpressionSharer for replacing the structurally identical subexpressions
+        of the parsed rules by a single shared object (optional, usually created here)
+        :param rule_simplifier: RuleSimplifier for rewriting the parsed rules into simpler equivalent ones
+        before sharing their subexpressions (optional, the rules are kept as written by default)
         """
         if ref_dict is None:
             ref_dict = RefDict()
@@ -38,6 +43,10 @@ class CategoryCatalogParser:
             category_or_refdef_parser = CategoryOrRefDefParser()
         self.category_or_refdef_parser = category_or_refdef_parser
         self.category_or_refdef_parser.set_ref_dict(self.ref_dict)
+        if subexpression_sharer is None:
+            subexpression_sharer = SubexpressionSharer()
+        self.subexpression_sharer = subexpression_sharer
+        self.rule_simplifier = rule_simplifier
 
     def validate(self, category_rule_collection):
         """Validates the JSON input whether it has its correct required top-level fields
@@ -108,5 +117,8 @@ class CategoryCatalogParser:
                 category_catalog = json.load(f)
         if not self.validate(category_catalog):
             error("It is not a valid CategoryRuleCollection: ", category_catalog)
-        return CategoryCatalog(self.parse_category_list(self.__get_category_rules(category_catalog)),
+        categories = self.parse_category_list(self.__get_category_rules(category_catalog))
+        if self.rule_simplifier is not None:
+            categories = self.rule_simplifier.simplify_categories(categories)
+        return CategoryCatalog(self.subexpression_sharer.share_categories(categories),
                                self.get_properties(category_catalog), debug)
@@ -0,0 +1,179 @@
+from time import perf_counter
+from openlostcat.utils import error
+from openlostcat.evaluationcontext import EvaluationContext
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolIMPL
+from openlostcat.operators.filter_operators import FilterAND, FilterOR, FilterIMPL
+import json
+
+
+class OperandReorderer:
+    """Reorders the operands of the 'and'/'or' operators of parsed rules by their cost and selectivity
+    observed on a sample of locations (operands are side-effect free, so any order gives the same results)
+
+    The operand that is the cheapest relative to its probability of short-circuiting the operator
+    (being false for 'and', true for 'or') is evaluated first.
+    The operators are identified by their paths in the rules as parsed (category index and operand indices),
+    so the learned operand orders can be exported and applied to a newly parsed catalog of the same rules.
+    """
+
+    reorderable_types = (BoolAND, BoolOR, FilterAND, FilterOR)
+    """Operator types with commutative operands
+    """
+
+    path_separator = "/"
+
+    def __init__(self, operand_orders=None):
+        """Initializer
+
+        :param operand_orders: operand orders learned before as a dictionary or a string as a JSON file path (optional)
+        """
+        if operand_orders is None:
+            operand_orders = {}
+        if isinstance(operand_orders, str):
+            with open(operand_orders) as f:
+                operand_orders = json.load(f)
+        self.operand_orders = operand_orders
+
+    @staticmethod
+    def get_children(op):
+        """Retrieves the subexpressions of an operator to be traversed
+
+        :param op: operator
+        :return: list of operators (the equivalent 'or' for implications)
+        """
+        return [op.impl_op] if isinstance(op, (BoolIMPL, FilterIMPL)) else op.get_operands()
+
+    def get_reorderable_ops(self, category_catalog):
+        """Collects the 'and'/'or' operators of the rules with their paths (a shared subexpression at its first path)
+
+        :param category_catalog: CategoryCatalog
+        :return: list of (path, operator) tuples in depth-first order
+        """
+        visited = set()
+        reorderable_ops = []
+        stack = [(str(num), category.rules) for num, category in enumerate(category_catalog.categories)][::-1]
+        while stack:
+            path, op = stack.pop()
+            if id(op) in visited:
+                continue
+            visited.add(id(op))
+            if isinstance(op, self.reorderable_types):
+                reorderable_ops.append((path, op))
+            stack.extend(reversed([(path + self.path_separator + str(i), child)
+                                   for i, child in enumerate(self.get_children(op))]))
+        return reorderable_ops
+
+    @staticmethod
+    def profile_bool_operand(op, tag_bundle_sets):
+        """Measures a category(bool)-level operand on a sample of locations
+
+        :param op: category(bool)-level operator
+        :param tag_bundle_sets: list of tag bundle sets
+        :return: average evaluation time and the rate of true results
+        """
+        cost = 0.0
+        true_count = 0
+        for tag_bundle_set in tag_bundle_sets:
+            start = perf_counter()
+            true_count += op.evaluate(tag_bundle_set, EvaluationContext(tag_bundle_set))
+            cost += perf_counter() - start
+        return cost / len(tag_bundle_sets), true_count / len(tag_bundle_sets)
+
+    @staticmethod
+    def profile_filter_operand(op, tag_bundles):
+        """Measures a set(filter)-level operand on the tag bundles of a sample of locations
+
+        :param op: set(filter)-level operator
+        :param tag_bundles: list of tag bundles
+        :return: average evaluation time and the rate of matching tag bundles
+        """
+        cost = 0.0
+        true_count = 0
+        for tag_bundle in tag_bundles:
+            start = perf_counter()
+            true_count += op.matches(tag_bundle)
+            cost += perf_counter() - start
+        return cost / len(tag_bundles), true_count / len(tag_bundles)
+
+    @staticmethod
+    def get_order(op, operand_stats):
+        """Orders the operands by their cost per short-circuit probability (keeping the original order for ties)
+
+        :param op: 'and'/'or' operator
+        :param operand_stats: list of (cost, true rate) tuples of the operands
+        :return: list of the original operand indices in the new order
+        """
+        short_circuit_on_true = isinstance(op, (BoolOR, FilterOR))
+
+        def rank(i):
+            cost, true_rate = operand_stats[i]
+            short_circuit_rate = true_rate if short_circuit_on_true else 1 - true_rate
+            return cost / short_circuit_rate if short_circuit_rate > 0 else float("inf")
+        return sorted(range(len(operand_stats)), key=rank)
+
+    def profile(self, category_catalog, tag_bundle_sets):
+        """Learns the operand orders of the rules on a sample of locations (the catalog is not changed)
+
+        :param category_catalog: CategoryCatalog with the rules as parsed
+        :param tag_bundle_sets: sample of tag bundle sets
+        :return: the learned operand orders, a dictionary of the operand index lists by the operator paths
+        """
+        tag_bundle_sets = list(tag_bundle_sets)
+        tag_bundles = [tag_bundle for tag_bundle_set in tag_bundle_sets for tag_bundle in tag_bundle_set]
+        self.operand_orders = {}
+        for path, op in self.get_reorderable_ops(category_catalog):
+            if isinstance(op, (BoolAND, BoolOR)):
+                if not tag_bundle_sets:
+                    continue
+                operand_stats = [self.profile_bool_operand(operand, tag_bundle_sets) for operand in op.get_operands()]
+            else:
+                if not tag_bundles:
+                    continue
+                operand_stats = [self.profile_filter_operand(operand, tag_bundles) for operand in op.get_operands()]
+            order = self.get_order(op, operand_stats)
+            if order != sorted(order):
+                self.operand_orders[path] = order
+        return self.operand_orders
+
+    def reorder(self, category_catalog):
+        """Reorders the operands of the rules of a catalog as parsed by the operand orders
+
+        :param category_catalog: CategoryCatalog with the rules as parsed
+        :return: the catalog
+        """
+        for path, op in self.get_reorderable_ops(category_catalog):
+            if path not in self.operand_orders:
+                continue
+            operands = op.get_operands()
+            order = self.operand_orders[path]
+            if sorted(order) != list(range(len(operands))):
+                error("Invalid operand order at " + path + ": ", order)
+            op.set_operands([operands[i] for i in order])
+        # the structure of the reordered subexpressions and their ancestors has been changed
+        for op in self.get_all_ops(category_catalog):
+            op.structure_hash = None
+        return category_catalog
+
+    @staticmethod
+    def get_all_ops(category_catalog):
+        """Collects all the subexpressions of the rules
+
+        :param category_catalog: CategoryCatalog
+        :return: list of operators
+        """
+        visited = {}
+        stack = [category.rules for category in category_catalog.categories]
+        while stack:
+            op = stack.pop()
+            if id(op) not in visited:
+                visited[id(op)] = op
+                stack.extend(op.get_operands() + OperandReorderer.get_children(op))
+        return list(visited.values())
+
+    def save(self, file_path):
+        """Exports the operand orders into a JSON file
+
+        :param file_path: string
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.operand_orders, f)
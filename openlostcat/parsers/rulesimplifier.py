@@ -0,0 +1,227 @@
+from openlostcat.utils import error
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolNOT, BoolREF, BoolConst, BoolIMPL
+from openlostcat.operators.filter_operators import FilterAND, FilterOR, FilterNOT, FilterREF, FilterIMPL, \
+    AtomicFilter, FilterConst
+from openlostcat.operators.quantifier_operators import ANY, ALL
+
+
+class RuleSimplifier:
+    """Rewrites parsed rules into semantically identical, simpler ones:
+    flattens nested 'and'/'or' operators, folds constants, removes double negations,
+    replaces implications by their equivalent 'or' and set(filter)-level references by their subexpressions,
+    pushes 'not' down to atomic filters where it can be expressed by them,
+    and merges the atomic filters of the same key under an 'and'/'or' into a single one
+
+    Category(bool)-level references and quantifiers keep their names, but the debug output of the simplified rules
+    reflects the rewritten subexpressions.
+    """
+
+    def __init__(self):
+        # simplified subexpressions by the original ones
+        self.simplified_ops = {}
+
+    def simplify_categories(self, categories):
+        """Simplifies the rules of categories
+
+        :param categories: list of Category objects (their rules are replaced by the simplified ones)
+        :return: the list of categories
+        """
+        for category in categories:
+            category.rules = self.simplify(category.rules)
+        return categories
+
+    def simplify(self, op):
+        """Simplifies a subexpression
+
+        :param op: operator
+        :return: the simplified operator (a new object if anything has been rewritten)
+        """
+        if op not in self.simplified_ops:
+            switcher = {
+                AtomicFilter: lambda x: x,
+                FilterConst: lambda x: x,
+                FilterAND: lambda x: self.simplify_filter_junction(FilterAND, x.filter_operators),
+                FilterOR: lambda x: self.simplify_filter_junction(FilterOR, x.filter_operators),
+                FilterNOT: lambda x: self.negate_filter(self.simplify(x.filter_operator)),
+                FilterIMPL: lambda x: self.simplify(x.impl_op),
+                FilterREF: lambda x: self.simplify(x.filter_operator),
+                ANY: self.simplify_any,
+                ALL: self.simplify_all,
+                BoolConst: lambda x: x,
+                BoolAND: lambda x: self.simplify_bool_junction(BoolAND, x.bool_operators),
+                BoolOR: lambda x: self.simplify_bool_junction(BoolOR, x.bool_operators),
+                BoolNOT: lambda x: self.negate_bool(self.simplify(x.bool_operator)),
+                BoolIMPL: lambda x: self.simplify(x.impl_op),
+                BoolREF: self.simplify_bool_ref
+            }
+            self.simplified_ops[op] = switcher.get(type(op), lambda x: error("Unsupported operator: ", x))(op)
+        return self.simplified_ops[op]
+
+    @staticmethod
+    def get_accepted_values(atomic_filter):
+        """Retrieves the values accepted by an atomic filter
+
+        :param atomic_filter: AtomicFilter
+        :return: (whether a missing key is accepted, whether any value is accepted, set of the accepted values)
+        """
+        return atomic_filter.is_optional_key, atomic_filter.is_any_value, frozenset(atomic_filter.values or ())
+
+    @staticmethod
+    def create_atomic_filter(key, accepted_values):
+        """Creates the filter accepting the given values of a key
+
+        :param key: tag key
+        :param accepted_values: (whether a missing key is accepted, whether any value is accepted, set of values)
+        :return: AtomicFilter or FilterConst
+        """
+        missing_accepted, any_value, values = accepted_values
+        if any_value:
+            return FilterConst(True) if missing_accepted else AtomicFilter(key, {})
+        if not values and not missing_accepted:
+            return FilterConst(False)
+        return AtomicFilter(key, sorted(values) + ([None] if missing_accepted else []))
+
+    @staticmethod
+    def is_mergeable(op):
+        """Determines whether an operator is an atomic filter to be merged with the others of the same key
+        (an empty string value cannot be merged, since it is dropped from the values of an optional key)
+
+        :param op: set(filter)-level operator
+        :return: True for mergeable atomic filters
+        """
+        return isinstance(op, AtomicFilter) and "" not in (op.values or ())
+
+    @staticmethod
+    def intersect_accepted_values(a, b):
+        any_value = a[1] and b[1]
+        values = a[2] & b[2] if not a[1] and not b[1] else (b[2] if a[1] else a[2])
+        return a[0] and b[0], any_value, values if not any_value else frozenset()
+
+    @staticmethod
+    def unite_accepted_values(a, b):
+        any_value = a[1] or b[1]
+        return a[0] or b[0], any_value, a[2] | b[2] if not any_value else frozenset()
+
+    def simplify_filter_junction(self, op_type, operands):
+        """Simplifies a set(filter)-level 'and'/'or' operator
+
+        :param op_type: FilterAND or FilterOR
+        :param operands: operands of the operator
+        :return: the simplified operator
+        """
+        is_and = op_type is FilterAND
+        flat_operands = []
+        for operand in map(self.simplify, operands):
+            flat_operands += operand.filter_operators if isinstance(operand, op_type) else [operand]
+        # atomic filters of the same key are merged at the position of the first one
+        merge_accepted_values = self.intersect_accepted_values if is_and else self.unite_accepted_values
+        merged_operands = []
+        accepted_values_by_key = {}
+        for operand in flat_operands:
+            if self.is_mergeable(operand):
+                if operand.key in accepted_values_by_key:
+                    accepted_values_by_key[operand.key] = merge_accepted_values(
+                        accepted_values_by_key[operand.key], self.get_accepted_values(operand))
+                    continue
+                accepted_values_by_key[operand.key] = self.get_accepted_values(operand)
+            merged_operands.append(operand)
+        merged_operands = [self.create_atomic_filter(operand.key, accepted_values_by_key[operand.key])
+                           if self.is_mergeable(operand) else operand for operand in merged_operands]
+        # constants: the absorbing one decides, the neutral one is dropped
+        result_operands = []
+        for operand in merged_operands:
+            if isinstance(operand, FilterConst):
+                if operand.const_val != is_and:
+                    return FilterConst(not is_and)
+                continue
+            if operand not in result_operands:
+                result_operands.append(operand)
+        if not result_operands:
+            return FilterConst(is_and)
+        return result_operands[0] if len(result_operands) == 1 else op_type(result_operands)
+
+    def negate_filter(self, op):
+        """Negates a simplified set(filter)-level subexpression, without a 'not' operator if possible
+
+        :param op: simplified set(filter)-level operator
+        :return: the simplified negation
+        """
+        if isinstance(op, FilterNOT):
+            return op.filter_operator
+        if isinstance(op, FilterConst):
+            return FilterConst(not op.const_val)
+        if isinstance(op, AtomicFilter):
+            missing_accepted, any_value, values = self.get_accepted_values(op)
+            # only "the key exists" and "the key is missing" can be negated as atomic filters
+            if any_value or (missing_accepted and not values):
+                return self.create_atomic_filter(op.key, (not missing_accepted, missing_accepted, frozenset()))
+        if isinstance(op, (FilterAND, FilterOR)):
+            # De Morgan's law, only if the negation of all the operands can be expressed without 'not'
+            negated_operands = [self.negate_filter(operand) for operand in op.filter_operators]
+            if not any(isinstance(operand, FilterNOT) for operand in negated_operands):
+                return self.simplify_filter_junction(FilterOR if isinstance(op, FilterAND) else FilterAND,
+                                                     negated_operands)
+        return FilterNOT(op)
+
+    @staticmethod
+    def get_quantifier_name(op, unit_name):
+        """Retrieves the name of a simplified quantifier,
+        a generated name is generated again from the simplified filter (so that equal quantifiers can be shared)
+
+        :param op: ANY/ALL operator
+        :param unit_name: prefix of the generated names
+        :return: the name given, or None for generated names
+        """
+        return None if op.name == op.get_name(unit_name, None, op.filter_operator) else op.name
+
+    def simplify_any(self, op):
+        filter_operator = self.simplify(op.filter_operator)
+        if isinstance(filter_operator, FilterConst) and not filter_operator.const_val:
+            return BoolConst(False)
+        return ANY(self.get_quantifier_name(op, "__ANY_"), filter_operator, op.with_cache)
+
+    def simplify_all(self, op):
+        filter_operator = self.simplify(op.filter_operator)
+        if isinstance(filter_operator, FilterConst) and filter_operator.const_val:
+            return BoolConst(True)
+        return ALL(self.get_quantifier_name(op, "__ALL_"), filter_operator, op.with_cache)
+
+    def simplify_bool_junction(self, op_type, operands):
+        """Simplifies a category(bool)-level 'and'/'or' operator
+
+        :param op_type: BoolAND or BoolOR
+        :param operands: operands of the operator
+        :return: the simplified operator
+        """
+        is_and = op_type is BoolAND
+        result_operands = []
+        for operand in map(self.simplify, operands):
+            for flat_operand in operand.bool_operators if isinstance(operand, op_type) else [operand]:
+                if isinstance(flat_operand, BoolConst):
+                    if flat_operand.const_val != is_and:
+                        return BoolConst(not is_and)
+                    continue
+                if flat_operand not in result_operands:
+                    result_operands.append(flat_operand)
+        if not result_operands:
+            return BoolConst(is_and)
+        return result_operands[0] if len(result_operands) == 1 else op_type(result_operands)
+
+    @staticmethod
+    def negate_bool(op):
+        """Negates a simplified category(bool)-level subexpression
+
+        :param op: simplified category(bool)-level operator
+        :return: the simplified negation
+        """
+        if isinstance(op, BoolNOT):
+            return op.bool_operator
+        if isinstance(op, BoolConst):
+            return BoolConst(not op.const_val)
+        return BoolNOT(op)
+
+    def simplify_bool_ref(self, op):
+        bool_operator = self.simplify(op.bool_operator)
+        if isinstance(bool_operator, BoolConst):
+            return bool_operator
+        return BoolREF(op.name, bool_operator, op.with_cache)
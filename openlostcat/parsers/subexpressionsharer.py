@@ -0,0 +1,66 @@
+from openlostcat.operators.bool_operators import BoolIMPL
+from openlostcat.operators.filter_operators import FilterIMPL
+
+
+class SubexpressionSharer:
+    """Shares structurally identical subexpressions (hash-consing) after parsing:
+    any repeated subexpression of the parsed rules, whether defined by a reference or written out multiple times,
+    is replaced by a single operator object, so that it can be evaluated only once for a location
+
+    """
+
+    def __init__(self, shared_ops=None):
+        """Initializer
+
+        :param shared_ops: an existing dictionary of shared operators to be used (optional),
+            for sharing subexpressions among multiple catalogs
+        """
+        if shared_ops is None:
+            shared_ops = {}
+        self.shared_ops = shared_ops
+
+    def share(self, op):
+        """Retrieves the shared instance of a subexpression (with all of its subexpressions shared as well)
+
+        :param op: operator (subexpression)
+        :return: the structurally equal shared operator
+        """
+        shared_op = self.shared_ops.get(op)
+        if shared_op is None:
+            op.set_operands([self.share(operand) for operand in op.get_operands()])
+            if isinstance(op, (BoolIMPL, FilterIMPL)):
+                op.impl_op = self.share(op.impl_op)
+            self.shared_ops[op] = shared_op = op
+        return shared_op
+
+    def share_categories(self, categories):
+        """Shares the subexpressions of the rules of categories
+
+        :param categories: list of Category objects (their rules are replaced by the shared operators)
+        :return: the list of categories
+        """
+        for category in categories:
+            category.rules = self.share(category.rules)
+        return categories
+
+    @staticmethod
+    def get_shared_subexpressions(ops):
+        """Retrieves the subexpressions being operands of multiple operators or occurring multiple times in ops
+
+        :param ops: list of operators (e.g. the rules of the categories)
+        :return: set of operators
+        """
+        visited = set()
+        shared = set()
+        stack = list(reversed(ops))
+        while stack:
+            op = stack.pop()
+            if op in visited:
+                shared.add(op)
+                continue
+            visited.add(op)
+            operands = op.get_operands()
+            if isinstance(op, (BoolIMPL, FilterIMPL)):
+                operands = [op.impl_op]
+            stack.extend(reversed(operands))
+        return shared
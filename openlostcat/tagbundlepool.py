@@ -0,0 +1,46 @@
+from weakref import WeakValueDictionary
+from openlostcat.utils import to_tag_bundle
+
+
+class TagBundlePool:
+    """Interns the tag bundles of the locations, so that the same tags (e.g. of an osm object near many locations)
+    are represented by a single canonical tag bundle, whose hash is computed only once
+
+    The pool holds its tag bundles weakly: a tag bundle is kept only as long as a tag bundle set refers to it.
+    A pool can be shared by multiple categorizers.
+    """
+
+    def __init__(self):
+        # canonical tag bundles by their tag items
+        self.bundles = WeakValueDictionary()
+
+    def to_tag_bundle(self, tag_dict):
+        """Retrieves the canonical tag bundle of the tags (the pooled counterpart of utils.to_tag_bundle)
+
+        :param tag_dict: dictionary of tags
+        :return: tag bundle (immutabledict)
+        """
+        key = frozenset(tag_dict.items())
+        bundle = self.bundles.get(key)
+        if bundle is None:
+            bundle = self.bundles.setdefault(key, to_tag_bundle(tag_dict))
+        return bundle
+
+    def to_tag_bundle_set(self, tag_dict_list):
+        """Converts the tags of the osm objects of a location to a set of canonical tag bundles
+        (the pooled counterpart of utils.to_tag_bundle_set)
+
+        :param tag_dict_list: iterable of dictionaries of tags
+        :return: set of tag bundles
+        """
+        return {self.to_tag_bundle(tag_dict) for tag_dict in tag_dict_list}
+
+    def __len__(self):
+        return len(self.bundles)
+
+    def __getstate__(self):
+        # weak references cannot be pickled, a copy of the pool (e.g. in a worker process) starts empty
+        return {}
+
+    def __setstate__(self, state):
+        self.bundles = WeakValueDictionary()
@@ -48,6 +48,16 @@ def to_tag_bundle_set(tag_dict_list):
     return {to_tag_bundle(tag_dict) for tag_dict in tag_dict_list}
 
 
+def project_tag_dicts(tag_dict_list, keys):
+    """Restrict the original tag dictionaries to the given keys (lazily)
+
+    :param tag_dict_list:
+    :param keys: set of tag keys
+    :return:
+    """
+    return ({key: value for key, value in tag_dict.items() if key in keys} for tag_dict in tag_dict_list)
+
+
 def get_tags_from_osm_elements(osm_json_dict):
     """Extract tags from an OSM query result
 
@@ -55,3 +65,13 @@ def get_tags_from_osm_elements(osm_json_dict):
     :return:
     """
     return [elements['tags'] for elements in osm_json_dict['elements'] if 'tags' in elements]
+
+
+def get_identified_tags_from_osm_elements(osm_json_dict):
+    """Extract tags with the identity of the objects from an OSM query result
+
+    :param osm_json_dict:
+    :return: list of ((type, id, version), tags) pairs (the version is only present in results with metadata)
+    """
+    return [((element.get('type'), element.get('id'), element.get('version')), element['tags'])
+            for element in osm_json_dict['elements'] if 'tags' in element]
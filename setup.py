@@ -22,5 +22,6 @@ setup(
     ],
     python_requires='>=3.6',
     install_requires=['immutabledict > 1.0.0', 'requests'],
+    extras_require={'numpy': ['numpy'], 'osmium': ['osmium']},
     test_suite="tests",
 )
\ No newline at end of file
@@ -0,0 +1,56 @@
+import unittest
+import multiprocessing
+import pickle
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestCategorizeMany(unittest.TestCase):
+
+    locations = [{"elements": [{"tags": tags} for tags in location]} for location in test_locations] * 7
+
+    def test_same_result_as_sequential(self):
+        """Test that the parallel categorization gives the results of categorize in the order of the input
+        """
+        for source in test_catalog_sources:
+            for engine in ["interpreter", "compiled", "interned"]:
+                categorizer = MainOsmCategorizer(source, engine=engine)
+                expected = [categorizer.categorize(location) for location in self.locations]
+                with self.subTest(source=source, engine=engine):
+                    self.assertEqual(expected, list(categorizer.categorize_many(
+                        iter(self.locations), workers=2, chunksize=3)))
+
+    def test_spawned_workers(self):
+        """Test that the categorizer of compiled engines is pickled to spawned workers
+        """
+        for engine in ["interpreter", "compiled", "bitset", "interned", "atom_cache"]:
+            categorizer = MainOsmCategorizer(test_catalog_sources[-1], engine=engine)
+            expected = [categorizer.categorize(location) for location in self.locations]
+            with self.subTest(engine=engine):
+                self.assertEqual(expected, categorizer.categorize_batch(self.locations))
+                self.assertEqual(expected, pickle.loads(pickle.dumps(categorizer)).categorize_batch(self.locations))
+                self.assertEqual(expected, list(categorizer.categorize_many(
+                    self.locations, workers=2, chunksize=8, mp_context=multiprocessing.get_context("spawn"))))
+
+    def test_single_worker(self):
+        """Test that a single worker categorizes the locations in this process
+        """
+        categorizer = MainOsmCategorizer(test_catalog_sources[-1], debug=True)
+        self.assertEqual([categorizer.categorize(location) for location in self.locations],
+                         list(categorizer.categorize_many(self.locations, workers=1, chunksize=4)))
+
+    def test_early_close(self):
+        """Test that the generator can be closed before the end of the input
+        """
+        categorizer = MainOsmCategorizer(test_catalog_sources[-1])
+        results = categorizer.categorize_many(self.locations, workers=2, chunksize=1)
+        self.assertEqual(categorizer.categorize(self.locations[0]), next(results))
+        results.close()
+
+    def test_invalid_chunksize(self):
+        with self.assertRaises(SyntaxError):
+            list(MainOsmCategorizer(test_catalog_sources[-1]).categorize_many(self.locations, chunksize=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
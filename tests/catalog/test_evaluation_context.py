@@ -0,0 +1,55 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from openlostcat.evaluationcontext import EvaluationContext
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.operators.bool_operators import BoolREF, BoolAND
+from openlostcat.operators.filter_operators import AtomicFilter, FilterREF, FilterOR
+from openlostcat.operators.quantifier_operators import ANY
+from openlostcat.utils import to_tag_bundle_set
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestEvaluationContext(unittest.TestCase):
+
+    def test_memoize(self):
+        """Test that results are memoized only for the tag bundle set of the location
+        """
+        tag_bundle_set = to_tag_bundle_set([{"a": "x"}])
+        context = EvaluationContext(tag_bundle_set)
+        self.assertEqual(context.memoize("key", tag_bundle_set, lambda: 1), 1)
+        self.assertEqual(context.memoize("key", tag_bundle_set, lambda: 2), 1)
+        self.assertEqual(context.memoize("key", set(), lambda: 3), 3)
+
+    def test_references_evaluated_once(self):
+        """Test that references are evaluated once in a context, and not reused in another one
+        """
+        tag_bundle_set = to_tag_bundle_set([{"a": "x"}, {"b": "y"}])
+        filter_ref = FilterREF("#a", AtomicFilter("a", "x"))
+        bool_ref = BoolREF("##a", ANY(None, filter_ref))
+        op = BoolAND([bool_ref, ANY(None, FilterOR([filter_ref, AtomicFilter("c", {})])), bool_ref])
+        with patch.object(AtomicFilter, "matches", autospec=True, side_effect=AtomicFilter.matches) as matches:
+            self.assertTrue(op.evaluate(tag_bundle_set, EvaluationContext(tag_bundle_set)))
+            self.assertLessEqual(matches.call_count, len(tag_bundle_set))
+        with patch.object(AtomicFilter, "apply", autospec=True, side_effect=AtomicFilter.apply) as apply:
+            self.assertTrue(op.apply(tag_bundle_set, EvaluationContext(tag_bundle_set))[0])
+            # the reference once, "c" once
+            self.assertEqual(apply.call_count, 2)
+        other_tag_bundle_set = to_tag_bundle_set([{"b": "y"}])
+        self.assertFalse(op.evaluate(other_tag_bundle_set, EvaluationContext(other_tag_bundle_set)))
+
+    def test_shared_among_threads(self):
+        """Test that a categorizer gives the same results from multiple threads as sequentially
+        """
+        locations = [{"elements": [{"tags": tags} for tags in location]} for location in test_locations] * 20
+        for source in test_catalog_sources:
+            for engine in ["interpreter", "compiled", "interned"]:
+                categorizer = MainOsmCategorizer(source, engine=engine)
+                with self.subTest(source=source, engine=engine):
+                    expected = [categorizer.categorize(location) for location in locations]
+                    with ThreadPoolExecutor(8) as executor:
+                        self.assertEqual(list(executor.map(categorizer.categorize, locations)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
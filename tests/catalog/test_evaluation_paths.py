@@ -0,0 +1,42 @@
+import unittest
+from unittest.mock import patch
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolNOT, BoolREF
+from openlostcat.operators.quantifier_operators import ANY, ALL
+from openlostcat.utils import to_tag_bundle_set
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestEvaluationPaths(unittest.TestCase):
+
+    def test_no_meta_info_without_debug(self):
+        """Test that no operator collects meta info without debug
+        """
+        for source in test_catalog_sources:
+            categorizer = MainOsmCategorizer(source)
+            with patch.object(BoolAND, "apply") as and_apply, patch.object(BoolOR, "apply") as or_apply, \
+                    patch.object(BoolNOT, "apply") as not_apply, patch.object(BoolREF, "apply") as ref_apply, \
+                    patch.object(ANY, "apply") as any_apply, patch.object(ALL, "apply") as all_apply:
+                for location in test_locations:
+                    categorizer.categorize({"elements": [{"tags": tags} for tags in location]})
+                for apply in [and_apply, or_apply, not_apply, ref_apply, any_apply, all_apply]:
+                    apply.assert_not_called()
+
+    def test_same_result_as_debug(self):
+        """Test that the evaluation without debug gives the same categories as the evaluation with debug
+        """
+        for source in test_catalog_sources:
+            catalog = MainOsmCategorizer(source).category_cat
+            debug_catalog = MainOsmCategorizer(source, debug=True).category_cat
+            for location in test_locations:
+                with self.subTest(source=source, location=location):
+                    result = catalog.apply(to_tag_bundle_set(location))
+                    debug_result = debug_catalog.apply(to_tag_bundle_set(location))
+                    if catalog.evaluationStrategy == "firstMatching":
+                        self.assertEqual(result, debug_result[:2])
+                    else:
+                        self.assertEqual(result, [category[:2] for category in debug_result])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.categorycatalog import CategoryCatalog
+from openlostcat.utils import to_tag_bundle_set
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolNOT, BoolConst, BoolIMPL
+from openlostcat.operators.filter_operators import AtomicFilter, FilterAND, FilterOR, FilterConst
+from openlostcat.operators.quantifier_operators import ANY, ALL
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestKeyPrefilter(unittest.TestCase):
+
+    def test_necessary_keys(self):
+        """Test the necessary key conditions derived from the operators
+        """
+        self.assertEqual(AtomicFilter("a", "x").get_necessary_keys(), {"a"})
+        self.assertEqual(AtomicFilter("a", True).get_necessary_keys(), {"a"})
+        self.assertIsNone(AtomicFilter("a", ["x", None]).get_necessary_keys())
+        self.assertIsNone(FilterConst(True).get_necessary_keys())
+        self.assertEqual(FilterConst(False).get_necessary_keys(), set())
+        self.assertEqual(FilterAND([AtomicFilter("a", "x"), FilterOR([AtomicFilter("b", "x"), AtomicFilter("c", "x")]),
+                                    AtomicFilter("d", None)]).get_necessary_keys(), {"a"})
+        self.assertEqual(FilterOR([AtomicFilter("b", "x"), AtomicFilter("c", "x")]).get_necessary_keys(), {"b", "c"})
+        self.assertIsNone(FilterOR([AtomicFilter("b", "x"), AtomicFilter("c", None)]).get_necessary_keys())
+        self.assertEqual(ANY(None, AtomicFilter("a", "x")).get_necessary_keys(), {"a"})
+        self.assertIsNone(ALL(None, AtomicFilter("a", "x")).get_necessary_keys())
+        self.assertIsNone(BoolNOT(ANY(None, AtomicFilter("a", "x"))).get_necessary_keys())
+        self.assertEqual(BoolAND([ALL(None, AtomicFilter("a", "x")), ANY(None, AtomicFilter("b", "x"))])
+                         .get_necessary_keys(), {"b"})
+        self.assertIsNone(BoolOR([ALL(None, AtomicFilter("a", "x")), ANY(None, AtomicFilter("b", "x"))])
+                          .get_necessary_keys())
+        self.assertEqual(BoolConst(False).get_necessary_keys(), set())
+        self.assertIsNone(BoolIMPL([ANY(None, AtomicFilter("a", "x")), ANY(None, AtomicFilter("b", "x"))])
+                          .get_necessary_keys())
+
+    def test_referenced_keys(self):
+        """Test that the referenced keys are the keys of all the atomic filters, necessary or not
+        """
+        self.assertEqual({"a", "b", "c"}, BoolIMPL([ANY(None, AtomicFilter("a", "x")), BoolNOT(
+            ALL(None, FilterOR([AtomicFilter("b", None), AtomicFilter("c", {})])))]).get_referenced_keys())
+        self.assertEqual(set(), BoolConst(True).get_referenced_keys())
+        self.assertEqual({"landuse", "highway", "surface", "name", "c", "d", "e"},
+                         MainOsmCategorizer(test_catalog_sources[-1]).category_cat.get_referenced_keys())
+
+    def test_candidate_categories(self):
+        """Test that only the categories with any of their necessary keys present are candidates
+        """
+        catalog = MainOsmCategorizer({"type": "CategoryRuleCollection", "categoryRules": [
+            {"transport": {"public_transport": {}}},
+            {"accessible": {"__ANY_": {"wheelchair": "yes"}, "__ALL_": {"shop": {}}}},
+            {"other": True}
+        ]}).category_cat
+        self.assertEqual(list(catalog.get_candidate_category_nums(to_tag_bundle_set([{"shop": "bakery"}]))), [2])
+        self.assertEqual(list(catalog.get_candidate_category_nums(
+            to_tag_bundle_set([{"wheelchair": "no"}, {"public_transport": "platform"}]))), [0, 1, 2])
+        catalog.key_prefilter = False
+        self.assertEqual(list(catalog.get_candidate_category_nums(to_tag_bundle_set([{"shop": "bakery"}]))),
+                         [0, 1, 2])
+
+    def test_same_results(self):
+        """Test that the prefiltered evaluation gives the same results as the evaluation of all categories
+        """
+        for source in test_catalog_sources:
+            catalog = MainOsmCategorizer(source).category_cat
+            unfiltered_catalog = CategoryCatalog(catalog.categories, {"evaluationStrategy": catalog.evaluationStrategy},
+                                                 key_prefilter=False)
+            for location in test_locations:
+                tag_bundle_set = to_tag_bundle_set(location)
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(catalog.apply(tag_bundle_set), unfiltered_catalog.apply(tag_bundle_set))
+
+
+if __name__ == '__main__':
+    unittest.main()
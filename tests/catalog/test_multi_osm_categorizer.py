@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.multi_osm_categorizer import MultiOsmCategorizer
+from openlostcat.operators.filter_operators import AtomicFilter
+from openlostcat.utils import get_tags_from_osm_elements
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestMultiOsmCategorizer(unittest.TestCase):
+
+    first_catalog = {
+        "type": "CategoryRuleCollection",
+        "categoryRules": [
+            {"#residential": {"landuse": "residential"}},
+            {"residential": "#residential"},
+            {"other": True}
+        ]
+    }
+
+    second_catalog = {
+        "type": "CategoryRuleCollection",
+        "properties": {"evaluationStrategy": "all"},
+        "categoryRules": [
+            {"#residential": {"landuse": "residential", "name": {}}},
+            {"named_residential": "#residential"},
+            {"residential": {"landuse": "residential"}}
+        ]
+    }
+
+    common_condition_catalogs = [
+        {
+            "type": "CategoryRuleCollection",
+            "categoryRules": [{"residential": {"landuse": "residential"}}, {"other": True}]
+        },
+        {
+            "type": "CategoryRuleCollection",
+            "properties": {"evaluationStrategy": "all"},
+            "categoryRules": [{"named": {"name": {}}}, {"residential": {"landuse": "residential"}}]
+        }
+    ]
+
+    def test_same_result_as_separate_categorizers(self):
+        """Test that each catalog gives the same categories as a separate categorizer
+        """
+        for engine in ["interpreter", "compiled", "bitset", "interned"]:
+            for debug in [False, True]:
+                categorizer = MultiOsmCategorizer(test_catalog_sources, debug=debug, engine=engine)
+                separate_categorizers = [MainOsmCategorizer(source, debug=debug) for source in test_catalog_sources]
+                for location in test_locations:
+                    osm_json = {"elements": [{"tags": tags} for tags in location]}
+                    with self.subTest(engine=engine, debug=debug, location=location):
+                        self.assertEqual([c.categorize(osm_json) for c in separate_categorizers],
+                                         categorizer.categorize(osm_json))
+
+    def test_references_of_catalogs(self):
+        """Test that references of the same name in different catalogs are not mixed up
+        """
+        categorizer = MultiOsmCategorizer([self.first_catalog, self.second_catalog])
+        osm_json = {"elements": [{"tags": {"landuse": "residential"}}]}
+        self.assertEqual([(0, "residential"), [(1, "residential")]], categorizer.categorize(osm_json))
+        self.assertEqual([{0: "residential", 1: "other"}, {0: "named_residential", 1: "residential"}],
+                         categorizer.get_categories_enumerated_key_maps())
+
+    def test_converted_and_evaluated_once(self):
+        """Test that a location is converted once and a condition shared by the catalogs is evaluated once
+        """
+        osm_json = {"elements": [{"tags": {"landuse": "residential"}}, {"tags": {"highway": "primary"}}]}
+        for engine in ["interpreter", "compiled"]:
+            categorizer = MultiOsmCategorizer(self.common_condition_catalogs, engine=engine)
+            predicate = categorizer.evaluators[0].compiled_categories[0][2] if engine == "compiled" else None
+            with self.subTest(engine=engine), \
+                    patch("openlostcat.multi_osm_categorizer.get_tags_from_osm_elements",
+                          side_effect=get_tags_from_osm_elements) as get_tags, \
+                    patch.object(AtomicFilter, "matches", autospec=True, side_effect=AtomicFilter.matches) as matches:
+                self.assertEqual([(0, "residential"), [(1, "residential")]], categorizer.categorize(osm_json))
+                self.assertEqual(get_tags.call_count, 1)
+                if predicate is None:
+                    # landuse=residential is checked once for each tag bundle at most, "named" is skipped
+                    self.assertLessEqual(matches.call_count, len(osm_json["elements"]))
+            if predicate is not None:
+                # the compiled rules of the common category are the same closure for both catalogs
+                self.assertIs(predicate, categorizer.evaluators[1].compiled_categories[1][2])
+
+    def test_unsupported_engine(self):
+        with self.assertRaises(SyntaxError):
+            MultiOsmCategorizer([self.first_catalog], engine="bdd")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import gc
+import pickle
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.tagbundlepool import TagBundlePool
+from openlostcat.utils import to_tag_bundle_set
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestTagBundlePool(unittest.TestCase):
+
+    locations = [{"elements": [{"tags": tags} for tags in location]} for location in test_locations]
+
+    def test_canonical_bundles(self):
+        """Test that identical tags of different locations are the same tag bundle
+        """
+        pool = TagBundlePool()
+        first = pool.to_tag_bundle_set([{"shop": "bakery"}, {"amenity": "bench", "backrest": "yes"}])
+        second = pool.to_tag_bundle_set([{"backrest": "yes", "amenity": "bench"}, {"shop": "florist"}])
+        self.assertEqual(to_tag_bundle_set([{"shop": "bakery"}, {"amenity": "bench", "backrest": "yes"}]), first)
+        self.assertEqual(1, len(first & second))
+        self.assertIs(next(iter(first & second)), next(iter(second & first)))
+        self.assertIs(pool.to_tag_bundle({"amenity": "bench", "backrest": "yes"}),
+                      [bundle for bundle in second if "amenity" in bundle][0])
+        self.assertEqual(3, len(pool))
+
+    def test_weak_references(self):
+        """Test that the bundles not referred to are released
+        """
+        pool = TagBundlePool()
+        tag_bundle_set = pool.to_tag_bundle_set([{"shop": "bakery"}, {"shop": "florist"}])
+        self.assertEqual(2, len(pool))
+        del tag_bundle_set
+        gc.collect()
+        self.assertEqual(0, len(pool))
+
+    def test_pickle(self):
+        """Test that a pickled pool is restored empty
+        """
+        pool = TagBundlePool()
+        tag_bundle_set = pool.to_tag_bundle_set([{"shop": "bakery"}])
+        restored_pool = pickle.loads(pickle.dumps(pool))
+        self.assertEqual(0, len(restored_pool))
+        self.assertEqual(tag_bundle_set, restored_pool.to_tag_bundle_set([{"shop": "bakery"}]))
+
+    def test_same_categories(self):
+        """Test that the categories are the same with a shared pool
+        """
+        pool = TagBundlePool()
+        for source in test_catalog_sources:
+            for engine in ["interpreter", "compiled", "bitset", "interned"]:
+                categorizer = MainOsmCategorizer(source, engine=engine)
+                pooled_categorizer = MainOsmCategorizer(source, engine=engine, tag_bundle_pool=pool)
+                with self.subTest(source=source, engine=engine):
+                    self.assertEqual([categorizer.categorize(location) for location in self.locations],
+                                     [pooled_categorizer.categorize(location) for location in self.locations])
+                    self.assertEqual(categorizer.categorize_batch(self.locations),
+                                     list(pooled_categorizer.categorize_many(self.locations, workers=2, chunksize=2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from immutabledict import immutabledict
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestTagProjection(unittest.TestCase):
+
+    # the test locations with unreferenced tags and objects added
+    locations = [{"elements": [{"tags": dict(tags, source="survey", **{"name:de": "X"})} for tags in location] +
+                  [{"tags": {"source": "survey"}}, {"tags": {"wikidata": "Q1"}}]}
+                 for location in test_locations] + \
+                [{"elements": [{"tags": tags} for tags in location]} for location in test_locations]
+
+    def test_same_categories(self):
+        """Test that the categories are the same with and without the projection of the tags
+        """
+        for source in test_catalog_sources:
+            for engine in ["interpreter", "compiled", "bitset", "interned"]:
+                categorizer = MainOsmCategorizer(source, engine=engine)
+                unprojected_categorizer = MainOsmCategorizer(source, engine=engine, project_tags=False)
+                for location in self.locations:
+                    with self.subTest(source=source, engine=engine, location=location):
+                        self.assertEqual(unprojected_categorizer.categorize(location),
+                                         categorizer.categorize(location))
+
+    def test_projected_bundles(self):
+        """Test that the bundles have the referenced keys only, and the other objects collapse to one empty bundle
+        """
+        categorizer = MainOsmCategorizer({"type": "CategoryRuleCollection", "categoryRules": [
+            {"accessible": {"__ALL_": {"wheelchair": ["yes", None]}}}]})
+        self.assertEqual({"wheelchair"}, categorizer.get_referenced_keys())
+        self.assertEqual({immutabledict(wheelchair="no"), immutabledict()}, categorizer.create_tag_bundle_set(
+            [{"shop": "bakery", "wheelchair": "no"}, {"shop": "florist"}, {"amenity": "bench"}]))
+        debug_categorizer = MainOsmCategorizer(test_catalog_sources[-1], debug=True)
+        self.assertEqual({immutabledict(shop="florist")},
+                         debug_categorizer.create_tag_bundle_set([{"shop": "florist"}]))
+
+
+if __name__ == '__main__':
+    unittest.main()
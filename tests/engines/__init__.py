@@ -0,0 +1,57 @@
+import os
+
+rules_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "examples", "rules")
+
+test_catalog_sources = [os.path.join(rules_dir, file_name) for file_name in sorted(os.listdir(rules_dir))] + [
+    {
+        "type": "CategoryRuleCollection",
+        "properties": {"evaluationStrategy": "all"},
+        "categoryRules": [
+            {"#residential": {"landuse": "residential"}},
+            {"##calm": {"__ALL_": {"__NOT_": {"highway": ["primary", "secondary"]}}}},
+            {"named_residential": {"__REF_": "#residential", "name": {}}},
+            {"calm_residential": {"__REF_1": "##calm", "__REF_2": "#residential"}},
+            {"no_surface_or_asphalt": {"__ALL_": {"surface": ["asphalt", None]}}},
+            {"missing_surface": {"surface": None}},
+            {"implication": {"__IMPL_": [{"highway": {}}, {"surface": "asphalt"}]}},
+            {"bool_implication": {"__IMPL_": ["##calm", {"__NOT_": [{"__ANY_": "#residential"}]}]}},
+            {"or_of_values": [{"highway": "motorway"}, {"c": ["pass", "fail"], "d": True}]},
+            {"consts": {"__OR_": [False, {"__AND_": {"__CONST_1": True, "e": "pass"}}]}},
+            {"empty": {"__ANY_": True}},
+            {"never": False}
+        ]
+    }
+]
+
+test_locations = [
+    [],
+    [{}],
+    [{"landuse": "residential", "highway": "motorway", "surface": "BAD"},
+     {"landuse": "residential", "highway": "motorway"}],
+    [{"landuse": "residential", "name": "Foo", "surface": "asphalt"},
+     {"landuse": "BAD", "highway": "primary"}],
+    [{"landuse": "residential", "highway": "residential", "surface": "asphalt"}],
+    [{"a": "yes", "c": "fail", "d": "yes", "e": "fail"},
+     {"a": "no", "b": "2", "d": "fail", "e": "pass"},
+     {"c": "pass", "d": "pass", "e": "pass"},
+     {"c": "fail"}],
+    [{"public_transport": "stop_position", "train": "yes", "waterway": "river"},
+     {"highway": "secondary"}],
+    [{"public_transport": "platform"}, {"waterway": "river"}, {"shop": "supermarket", "wheelchair": "yes"}],
+    [{"amenity": "ferry_terminal"}, {"shop": "supermarket"}, {"shop": "supermarket", "wheelchair": "no"}],
+    [{"shop": "supermarket", "wheelchair": "limited"}, {"highway": "footway"}]
+]
+
+# categories with empty operand lists, evaluated by the interpreter as the neutral element of their operator
+test_empty_operand_rules = [{"empty_and": {}}, {"empty_or": []}, {"empty_bool_or": {"__OR_": []}},
+                            {"empty_bool_and": {"__AND_": {}}}, {"any_of_empty_and": {"__ANY_": {}}},
+                            {"any_of_empty_or": {"__ANY_": []}}, {"all_of_empty_and": {"__ALL_": {}}},
+                            {"all_of_empty_or": {"__ALL_": []}}, {"not_of_empty_and": {"__NOT_": {}}},
+                            {"not_of_empty_or": {"__NOT_": []}}]
+
+
+def get_empty_operand_catalog_sources(evaluation_strategy="all"):
+    """Catalogs of a single category with empty operands (and a fallback category)
+    """
+    return [{"type": "CategoryRuleCollection", "properties": {"evaluationStrategy": evaluation_strategy},
+             "categoryRules": [rule, {"fallback": True}]} for rule in test_empty_operand_rules]
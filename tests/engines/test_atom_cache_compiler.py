@@ -0,0 +1,117 @@
+import unittest
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from openlostcat.engines.atom_cache_compiler import AtomCacheCompiler, AtomVectorBitset, IdentifiedTagBundleSet
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.operators.filter_operators import AtomicFilter, FilterAND, FilterOR, FilterNOT, FilterIMPL, \
+    FilterConst
+from openlostcat.utils import to_tag_bundle, to_tag_bundle_set
+from tests.engines import test_catalog_sources, test_locations
+from tests.filteroperators import test_set
+
+
+class TestAtomCacheCompiler(unittest.TestCase):
+
+    # the test locations with identified objects, the same objects in multiple locations
+    locations = [{"elements": [{"type": "node", "id": hash(frozenset(tags.items())), "tags": tags}
+                               for tags in location]} for location in test_locations] * 3
+
+    def test_same_filter_result_as_interpreter(self):
+        """Test that the bitmask of the filters gathered from the atom vectors selects the same tag bundles
+        as the interpreted filters
+        """
+        filter_ops = [FilterAND([AtomicFilter("c", ["pass", "fail"]), AtomicFilter("d", "pass")]),
+                      FilterOR([AtomicFilter("a", [None, True]), AtomicFilter("e", "pass")]),
+                      FilterNOT(FilterOR([AtomicFilter("a", {}), FilterConst(False)])),
+                      FilterIMPL([AtomicFilter("c", {}), AtomicFilter("d", "pass"), AtomicFilter("e", "fail")]),
+                      FilterAND([AtomicFilter("wont_match", None), FilterConst(True)]),
+                      AtomicFilter("c", [])]
+        for filter_op in filter_ops:
+            with self.subTest(filter_op=str(filter_op)):
+                compiler = AtomCacheCompiler()
+                mask_of = compiler.compile_filter_op(filter_op)
+                tag_bundle_set = IdentifiedTagBundleSet((("node", i), tag_bundle)
+                                                        for i, tag_bundle in enumerate(test_set))
+                bitset = compiler.prepare(tag_bundle_set)
+                self.assertIsInstance(bitset, AtomVectorBitset)
+                self.assertEqual(filter_op.apply(test_set), bitset.get_tag_bundles(mask_of(bitset)))
+
+    def test_cached_atom_vectors(self):
+        """Test that the atom vectors are cached by the identity and the tags of the objects,
+        the least recently used evicted
+        """
+        compiler = AtomCacheCompiler(cache_size=2)
+        compiler.compile_filter_op(FilterOR([AtomicFilter("a", "x"), AtomicFilter("b", {})]))
+        node = to_tag_bundle({"a": "x", "b": "y"})
+        self.assertEqual(0b11, compiler.get_atom_vector(("node", 1, None), node))
+        self.assertEqual(0b11, compiler.get_atom_vector(("node", 1, None), to_tag_bundle({"a": "x", "b": "y"})))
+        self.assertEqual([(("node", 1, None), node)], list(compiler.atom_vectors))
+        # the same object with other tags (edited or projected) is evaluated again
+        self.assertEqual(0, compiler.get_atom_vector(("node", 1, None), to_tag_bundle({})))
+        self.assertEqual(0b10, compiler.get_atom_vector(("way", 1, None), to_tag_bundle({"b": "y"})))
+        self.assertEqual([(("node", 1, None), to_tag_bundle({})), (("way", 1, None), to_tag_bundle({"b": "y"}))],
+                         list(compiler.atom_vectors))
+        # objects without identity are not cached
+        self.assertEqual(0b01, compiler.get_atom_vector(None, to_tag_bundle({"a": "x"})))
+        self.assertEqual(0, compiler.get_atom_vector((None, None, None), to_tag_bundle({})))
+        self.assertEqual(2, len(compiler.atom_vectors))
+        # a new atomic filter invalidates the cache
+        compiler.compile_filter_op(AtomicFilter("c", {}))
+        self.assertEqual(0, len(compiler.atom_vectors))
+
+    def test_identified_tag_bundle_set(self):
+        """Test that the identified tag bundle set is the set of the tag bundles, also after pickling
+        """
+        tag_bundle_set = IdentifiedTagBundleSet([(("node", 1, None), to_tag_bundle({"a": "x"})),
+                                                 (("node", 2, None), to_tag_bundle({"a": "x"})),
+                                                 (("way", 1, None), to_tag_bundle({}))])
+        self.assertEqual(to_tag_bundle_set([{"a": "x"}, {}]), tag_bundle_set)
+        self.assertEqual(("node", 1, None), tag_bundle_set.element_keys[to_tag_bundle({"a": "x"})])
+        restored = pickle.loads(pickle.dumps(tag_bundle_set))
+        self.assertEqual(tag_bundle_set, restored)
+        self.assertEqual(tag_bundle_set.element_keys, restored.element_keys)
+
+    def test_same_result_as_interpreter(self):
+        """Test that the atom cache engine returns the same categories as the interpreter
+        """
+        for source in test_catalog_sources:
+            interpreter = MainOsmCategorizer(source)
+            atom_cache = MainOsmCategorizer(source, engine="atom_cache", atom_cache_size=4)
+            for location in self.locations:
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(location), atom_cache.categorize(location))
+            with self.subTest(source=source):
+                self.assertEqual(interpreter.categorize_batch(self.locations),
+                                 atom_cache.categorize_batch(self.locations))
+
+
+    def test_reused_identities(self):
+        """Test that the same identities with different tags (e.g. objects edited between the locations,
+        queried without metadata) get the same categories as by the interpreter
+        """
+        locations = [{"elements": [{"type": "node", "id": i, "tags": tags} for i, tags in enumerate(location)]}
+                     for location in test_locations]
+        locations += [{"elements": [{"type": "node", "id": i, "tags": tags}
+                                    for i, tags in enumerate(reversed(location))]} for location in test_locations]
+        for source in test_catalog_sources:
+            interpreter = MainOsmCategorizer(source)
+            atom_cache = MainOsmCategorizer(source, engine="atom_cache")
+            for location in locations:
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(location), atom_cache.categorize(location))
+
+    def test_threads_sharing_cache(self):
+        """Test that locations categorized by multiple threads sharing the cache get the same categories
+        """
+        for source in test_catalog_sources:
+            interpreter = MainOsmCategorizer(source)
+            atom_cache = MainOsmCategorizer(source, engine="atom_cache", atom_cache_size=2)
+            locations = self.locations * 20
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(atom_cache.categorize, locations))
+            with self.subTest(source=source):
+                self.assertEqual([interpreter.categorize(location) for location in locations], results)
+
+
+if __name__ == '__main__':
+    unittest.main()
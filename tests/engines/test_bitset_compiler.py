@@ -0,0 +1,58 @@
+import unittest
+from openlostcat.engines.bitset_compiler import BitsetCompiler, TagBundleBitset, indices_to_mask
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.operators.filter_operators import AtomicFilter, FilterAND, FilterOR, FilterNOT, FilterIMPL, \
+    FilterConst
+from tests.engines import test_catalog_sources, test_locations, get_empty_operand_catalog_sources
+from tests.filteroperators import test_set
+
+
+class TestBitsetCompiler(unittest.TestCase):
+
+    def test_indices_to_mask(self):
+        self.assertEqual(indices_to_mask([], 0), 0)
+        self.assertEqual(indices_to_mask([0, 3, 9], 10), 0b1000001001)
+        self.assertEqual(indices_to_mask(range(100), 100), (1 << 100) - 1)
+
+    def test_same_filter_result_as_interpreter(self):
+        """Test that the bitmask of the filters selects the same tag bundles as the interpreted filters
+        """
+        filter_ops = [FilterAND([AtomicFilter("c", ["pass", "fail"]), AtomicFilter("d", "pass")]),
+                      FilterOR([AtomicFilter("a", [None, True]), AtomicFilter("e", "pass")]),
+                      FilterNOT(FilterOR([AtomicFilter("a", {}), FilterConst(False)])),
+                      FilterIMPL([AtomicFilter("c", {}), AtomicFilter("d", "pass"), AtomicFilter("e", "fail")]),
+                      FilterAND([AtomicFilter("wont_match", None), FilterConst(True)]),
+                      AtomicFilter("c", [])]
+        for filter_op in filter_ops:
+            with self.subTest(filter_op=str(filter_op)):
+                compiler = BitsetCompiler()
+                mask_of = compiler.compile_filter_op(filter_op)
+                bitset = TagBundleBitset(test_set)
+                self.assertEqual(filter_op.apply(test_set), bitset.get_tag_bundles(mask_of(bitset)))
+
+    def test_same_result_as_interpreter(self):
+        """Test that the bitset engine returns the same categories as the interpreter
+        """
+        for source in test_catalog_sources:
+            interpreter = MainOsmCategorizer(source)
+            bitset = MainOsmCategorizer(source, engine="bitset")
+            for location in test_locations:
+                osm_json = {"elements": [{"tags": tags} for tags in location]}
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(osm_json), bitset.categorize(osm_json))
+
+
+    def test_empty_operands(self):
+        """Test that empty operand lists are evaluated as by the interpreter
+        """
+        for source in get_empty_operand_catalog_sources():
+            interpreter = MainOsmCategorizer(source)
+            bitset = MainOsmCategorizer(source, engine="bitset")
+            for location in test_locations:
+                osm_json = {"elements": [{"tags": tags} for tags in location]}
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(osm_json), bitset.categorize(osm_json))
+
+
+if __name__ == '__main__':
+    unittest.main()
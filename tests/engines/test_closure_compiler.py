@@ -0,0 +1,76 @@
+import unittest
+from openlostcat.engines.closure_compiler import ClosureCompiler, CompiledCategoryCatalog
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.operators.filter_operators import AtomicFilter
+from openlostcat.utils import to_tag_bundle_set
+from tests.engines import test_catalog_sources, test_locations, get_empty_operand_catalog_sources
+from tests.filteroperators import test_set
+
+
+class TestClosureCompiler(unittest.TestCase):
+
+    @staticmethod
+    def to_osm_json(tag_dict_list):
+        return {"elements": [{"tags": tags} for tags in tag_dict_list]}
+
+    def test_atomic_filter_specialization(self):
+        """Test the specialized atomic predicates against the interpreted atomic filters
+        """
+        for value in [{}, None, [None], [None, True], [None, "pass", "fail"], "pass", ["pass", "fail"], [], True, 2]:
+            for key in ["a", "b", "c", "wont_match"]:
+                with self.subTest(key=key, value=value):
+                    atomic_filter = AtomicFilter(key, value)
+                    predicate = ClosureCompiler.compile_atomic_filter(atomic_filter)
+                    self.assertEqual(atomic_filter.apply(test_set),
+                                     {tag_bundle for tag_bundle in test_set if predicate(tag_bundle)})
+
+    def test_same_result_as_interpreter(self):
+        """Test that the compiled engine returns the same categories as the interpreter
+        """
+        for source in test_catalog_sources:
+            interpreter = MainOsmCategorizer(source)
+            compiled = MainOsmCategorizer(source, engine="compiled")
+            self.assertTrue(isinstance(compiled.evaluator, CompiledCategoryCatalog))
+            for location in test_locations:
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(self.to_osm_json(location)),
+                                     compiled.categorize(self.to_osm_json(location)))
+
+    def test_empty_operands(self):
+        """Test that empty operand lists are evaluated as by the interpreter
+        """
+        for source in get_empty_operand_catalog_sources():
+            interpreter = MainOsmCategorizer(source)
+            compiled = MainOsmCategorizer(source, engine="compiled")
+            for location in test_locations:
+                osm_json = self.to_osm_json(location)
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(osm_json), compiled.categorize(osm_json))
+
+    def test_debug_delegation(self):
+        """Test that the compiled engine gives the debug output of the interpreter
+        """
+        for source in test_catalog_sources:
+            compiled = MainOsmCategorizer(source, debug=True, engine="compiled")
+            for location in test_locations:
+                with self.subTest(source=source, location=location):
+                    tag_bundle_set = to_tag_bundle_set(location)
+                    self.assertEqual(compiled.category_cat.apply(tag_bundle_set),
+                                     compiled.evaluator.apply(tag_bundle_set))
+
+    def test_shared_reference_compiled_once(self):
+        """Test that a reference used multiple times is compiled to the same closure
+        """
+        compiler = ClosureCompiler()
+        compiled = MainOsmCategorizer(test_catalog_sources[-1]).category_cat
+        catalog = compiler.compile(compiled)
+        self.assertEqual(len(catalog.compiled_categories), len(compiled.categories))
+        self.assertFalse(catalog.apply_fm_evaluation(to_tag_bundle_set([{"foo": "void"}]))[0] < 0)
+
+    def test_unsupported_engine(self):
+        with self.assertRaises(SyntaxError):
+            MainOsmCategorizer(test_catalog_sources[-1], engine="no_such_engine")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from openlostcat.engines.decision_diagram import DecisionDiagram, DecisionDiagramCompiler
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from tests.engines import test_catalog_sources, test_locations, get_empty_operand_catalog_sources
+
+
+class TestDecisionDiagram(unittest.TestCase):
+
+    def test_reduction(self):
+        """Test that equivalent boolean functions are built as the same node
+        """
+        diagram = DecisionDiagram()
+        x, y = diagram.variable(0), diagram.variable(1)
+        self.assertIs(diagram.conjunction(x, y), diagram.conjunction(y, x))
+        self.assertIs(diagram.disjunction(x, diagram.negate(x)), diagram.leaf(True))
+        self.assertIs(diagram.negate(diagram.conjunction(x, y)),
+                      diagram.disjunction(diagram.negate(x), diagram.negate(y)))
+        self.assertIsNot(diagram.leaf(1), diagram.leaf(True))
+        self.assertEqual(diagram.get_depth(diagram.select(x, 0, diagram.select(y, 1, diagram.leaf(-1)))), 2)
+
+    def test_atoms_evaluated_once(self):
+        """Test that a location is categorized by at most one test of each quantified subexpression
+        """
+        catalog = MainOsmCategorizer({
+            "type": "CategoryRuleCollection",
+            "categoryRules": [
+                {"first": {"__ANY_1": {"a": "x"}, "__ANY_2": {"b": "x"}}},
+                {"second": [{"a": "x"}, {"c": "x"}]},
+                {"third": {"__ALL_": {"__NOT_": {"a": "x"}}, "__ANY_3": {"b": "x"}}},
+                {"fourth": {"b": "x"}}
+            ]
+        }).category_cat
+        compiler = DecisionDiagramCompiler()
+        compiled_catalog = compiler.compile(catalog)
+        self.assertEqual(len(compiler.atoms), 3)
+        # the fourth category is never reached: "b" implies one of the first three categories
+        self.assertEqual(compiler.diagram.get_depth(compiled_catalog.root), 3)
+        self.assertEqual(compiler.diagram.count_nodes(compiled_catalog.root), 9)
+
+    def test_all_strategy_unsupported(self):
+        with self.assertRaises(SyntaxError):
+            MainOsmCategorizer(test_catalog_sources[-1], engine="bdd")
+
+    def test_same_result_as_interpreter(self):
+        """Test that the decision diagram returns the same categories as the interpreter
+        """
+        for source in test_catalog_sources:
+            interpreter = MainOsmCategorizer(source)
+            if interpreter.category_cat.evaluationStrategy != "firstMatching":
+                continue
+            bdd = MainOsmCategorizer(source, engine="bdd")
+            for location in test_locations:
+                osm_json = {"elements": [{"tags": tags} for tags in location]}
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(osm_json), bdd.categorize(osm_json))
+
+
+    def test_empty_operands(self):
+        """Test that empty operand lists are evaluated as by the interpreter
+        """
+        for source in get_empty_operand_catalog_sources("firstMatching"):
+            interpreter = MainOsmCategorizer(source)
+            bdd = MainOsmCategorizer(source, engine="bdd")
+            for location in test_locations:
+                osm_json = {"elements": [{"tags": tags} for tags in location]}
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(osm_json), bdd.categorize(osm_json))
+
+
+if __name__ == '__main__':
+    unittest.main()
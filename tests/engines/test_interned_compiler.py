@@ -0,0 +1,91 @@
+import unittest
+from openlostcat.engines.interned_compiler import InternedCompiler, TagInterner, EncodedTagBundleSet, \
+    UNREFERENCED_CODE
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.operators.filter_operators import AtomicFilter, FilterAND, FilterOR, FilterNOT, FilterIMPL, \
+    FilterConst
+from tests.engines import test_catalog_sources, test_locations, get_empty_operand_catalog_sources
+from tests.filteroperators import test_set
+
+
+class TestInternedCompiler(unittest.TestCase):
+
+    def test_encoding(self):
+        """Test that equal tags are encoded by the same codes and the encoding can be decoded
+        """
+        interner = TagInterner()
+        encoded = interner.encode_tag_bundle_set(test_set)
+        self.assertIsInstance(encoded, EncodedTagBundleSet)
+        self.assertEqual(len(encoded), len(test_set))
+        self.assertEqual(interner.decode_tag_bundle_set(encoded), test_set)
+        self.assertEqual(interner.encode_tag_bundle({"a": "yes", "b": "2"}),
+                         interner.encode_tag_bundle({"b": "2", "a": "yes"}))
+        self.assertEqual(interner.get_code("a"), interner.get_code("a"))
+        self.assertNotEqual(interner.get_code("a"), interner.get_code(("a", "yes")))
+
+    def test_same_filter_result_as_interpreter(self):
+        """Test that the compiled filters select the same encoded tag bundles as the interpreted filters
+        """
+        filter_ops = [FilterAND([AtomicFilter("c", ["pass", "fail"]), AtomicFilter("d", "pass")]),
+                      FilterOR([AtomicFilter("a", [None, True]), AtomicFilter("e", "pass")]),
+                      FilterNOT(FilterOR([AtomicFilter("a", {}), FilterConst(False)])),
+                      FilterIMPL([AtomicFilter("c", {}), AtomicFilter("d", "pass"), AtomicFilter("e", "fail")]),
+                      FilterAND([AtomicFilter("wont_match", None), FilterConst(True)]),
+                      AtomicFilter("c", [])]
+        for filter_op in filter_ops:
+            with self.subTest(filter_op=str(filter_op)):
+                compiler = InternedCompiler()
+                predicate = compiler.compile_filter_op(filter_op)
+                encoded = compiler.prepare(test_set).tag_bundle_set
+                self.assertEqual(filter_op.apply(test_set),
+                                 compiler.interner.decode_tag_bundle_set(set(filter(predicate, encoded))))
+
+    def test_same_result_as_interpreter(self):
+        """Test that the interned engine returns the same categories as the interpreter
+        """
+        for source in test_catalog_sources:
+            interpreter = MainOsmCategorizer(source)
+            interned = MainOsmCategorizer(source, engine="interned")
+            for location in test_locations:
+                osm_json = {"elements": [{"tags": tags} for tags in location]}
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(osm_json), interned.categorize(osm_json))
+                    self.assertEqual(interpreter.category_cat.apply_batch([interpreter.to_tag_bundle_set(location)]),
+                                     interned.evaluator.apply_batch([interned.to_tag_bundle_set(location)]))
+
+
+    def test_frozen_interner(self):
+        """Test that the tags not referenced by the rules do not grow the codes of the compiled interner
+        """
+        interned = MainOsmCategorizer(test_catalog_sources[0], engine="interned", project_tags=False)
+        interner = interned.evaluator.interner
+        self.assertTrue(interner.frozen)
+        code_count = len(interner.symbols)
+        encoded = interner.encode_tag_bundle({"unreferenced": "x", "other": "y"})
+        self.assertEqual(frozenset([UNREFERENCED_CODE]), encoded)
+        self.assertEqual(code_count, len(interner.symbols))
+        self.assertEqual({}, interner.decode_tag_bundle(encoded))
+        for location in test_locations:
+            osm_json = {"elements": [{"tags": dict(tags, unreferenced=str(len(location)))} for tags in location]}
+            with self.subTest(location=location):
+                self.assertEqual(MainOsmCategorizer(test_catalog_sources[0]).categorize(osm_json),
+                                 interned.categorize(osm_json))
+        self.assertEqual(code_count, len(interner.symbols))
+        # the interner of a debug catalog decodes the tag bundles, hence it is not frozen
+        self.assertFalse(MainOsmCategorizer(test_catalog_sources[0], debug=True,
+                                            engine="interned").evaluator.interner.frozen)
+
+    def test_empty_operands(self):
+        """Test that empty operand lists are evaluated as by the interpreter
+        """
+        for source in get_empty_operand_catalog_sources():
+            interpreter = MainOsmCategorizer(source)
+            interned = MainOsmCategorizer(source, engine="interned")
+            for location in test_locations:
+                osm_json = {"elements": [{"tags": tags} for tags in location]}
+                with self.subTest(source=source, location=location):
+                    self.assertEqual(interpreter.categorize(osm_json), interned.categorize(osm_json))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+from openlostcat.engines.numpy_batch import NumpyBatchCatalog, TagBundleColumns
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.utils import to_tag_bundle_set
+from tests.engines import test_catalog_sources, test_locations, get_empty_operand_catalog_sources
+
+
+class TestNumpyBatch(unittest.TestCase):
+
+    osm_json_dicts = [{"elements": [{"tags": tags} for tags in location]} for location in test_locations]
+
+    def test_segment_reductions(self):
+        """Test the segmented quantifier reductions with empty locations
+        """
+        batch = TagBundleColumns([to_tag_bundle_set(location) for location in [[], [{"a": "1"}, {"a": "2"}], [], [{}]]])
+        self.assertEqual(batch.bundle_count, 3)
+        column = np.array([True, False, False])
+        self.assertEqual(batch.segment_any(column).tolist(), [False, True, False, False])
+        self.assertEqual(batch.segment_all(column).tolist(), [True, False, True, False])
+        empty_batch = TagBundleColumns([to_tag_bundle_set([])])
+        self.assertEqual(empty_batch.segment_all(np.zeros(0, dtype=bool)).tolist(), [True])
+
+    def test_same_result_as_interpreter(self):
+        """Test that the batch engine returns the same categories as the interpreter, location by location
+        """
+        for source in test_catalog_sources:
+            with self.subTest(source=source):
+                interpreter = MainOsmCategorizer(source)
+                batch_categorizer = MainOsmCategorizer(source, engine="numpy")
+                self.assertTrue(isinstance(batch_categorizer.evaluator, NumpyBatchCatalog))
+                self.assertEqual([interpreter.categorize(osm_json_dict) for osm_json_dict in self.osm_json_dicts],
+                                 batch_categorizer.categorize_batch(self.osm_json_dicts))
+                self.assertEqual(interpreter.categorize_batch(self.osm_json_dicts),
+                                 [batch_categorizer.categorize(osm_json_dict) for osm_json_dict in self.osm_json_dicts])
+
+    def test_empty_operands(self):
+        """Test that empty operand lists are evaluated as by the interpreter
+        """
+        for strategy in ["all", "firstMatching"]:
+            for source in get_empty_operand_catalog_sources(strategy):
+                with self.subTest(source=source):
+                    self.assertEqual(MainOsmCategorizer(source).categorize_batch(self.osm_json_dicts),
+                                     MainOsmCategorizer(source, engine="numpy").categorize_batch(self.osm_json_dicts))
+
+    def test_category_arrays(self):
+        """Test the array outputs of both strategies
+        """
+        catalog = MainOsmCategorizer(test_catalog_sources[-1], engine="numpy").evaluator
+        tag_bundle_sets = [to_tag_bundle_set(location) for location in test_locations]
+        all_matrix = catalog.apply_all_evaluation_batch(tag_bundle_sets)
+        self.assertEqual(all_matrix.shape, (len(test_locations), len(catalog.category_catalog.categories)))
+        first_matching = catalog.apply_fm_evaluation_batch(tag_bundle_sets)
+        self.assertEqual(first_matching.tolist(),
+                         [row.tolist().index(True) if row.any() else -1 for row in all_matrix])
+
+
+if __name__ == '__main__':
+    unittest.main()
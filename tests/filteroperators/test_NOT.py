@@ -24,8 +24,8 @@ class TestNot(unittest.TestCase):
         const_with_any = FilterConst(False)
         const_with_all = FilterConst(False)
         const_with_all.wrapper_quantifier = ALL
-        self.assertEqual(FilterNOT(const_with_any).wrapper_quantifier, ANY)
-        self.assertEqual(FilterNOT(const_with_all).wrapper_quantifier, ALL)
+        self.assertEqual(FilterNOT(const_with_any).wrapper_quantifier, ALL)
+        self.assertEqual(FilterNOT(const_with_all).wrapper_quantifier, ANY)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+from openlostcat.operators.filter_operators import AtomicFilter, FilterAND, FilterOR, FilterNOT, FilterIMPL, \
+    FilterREF, FilterConst
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolNOT, BoolIMPL, BoolREF, BoolConst
+from openlostcat.operators.quantifier_operators import ANY, ALL
+from tests.filteroperators import test_set
+
+
+class TestLazyEvaluation(unittest.TestCase):
+
+    filter_ops = [AtomicFilter("c", ["pass", "fail"]),
+                  AtomicFilter("a", [None, True]),
+                  AtomicFilter("b", {}),
+                  FilterAND([AtomicFilter("c", ["pass", "fail"]), AtomicFilter("d", "pass")]),
+                  FilterOR([AtomicFilter("a", [None, True]), AtomicFilter("e", "pass")]),
+                  FilterNOT(FilterOR([AtomicFilter("a", {}), FilterConst(False)])),
+                  FilterNOT(FilterAND([AtomicFilter("c", {}), FilterConst(True)])),
+                  FilterIMPL([AtomicFilter("c", {}), AtomicFilter("d", "pass"), AtomicFilter("e", "fail")]),
+                  FilterREF("ref", FilterNOT(AtomicFilter("e", "fail"))),
+                  FilterConst(True),
+                  FilterConst(False)]
+
+    def test_same_result_as_apply(self):
+        """Test that the lazy evaluation of filters gives the same result as checking their result set
+        """
+        for filter_op in self.filter_ops:
+            for tag_bundle_set in [test_set, set(list(test_set)[:2]), set()]:
+                with self.subTest(filter_op=str(filter_op), tag_bundle_set=tag_bundle_set):
+                    matching_tag_bundles = filter_op.apply(tag_bundle_set)
+                    self.assertEqual({tag_bundle for tag_bundle in tag_bundle_set if filter_op.matches(tag_bundle)},
+                                     matching_tag_bundles)
+                    self.assertEqual(filter_op.any_match(tag_bundle_set), len(matching_tag_bundles) > 0)
+                    self.assertEqual(filter_op.all_match(tag_bundle_set),
+                                     len(matching_tag_bundles) == len(tag_bundle_set))
+
+    def test_same_bool_result_as_apply(self):
+        """Test that the evaluation of bool operators without meta info gives the same result as apply
+        """
+        bool_ops = [ANY(None, op, with_cache=False) for op in self.filter_ops] + \
+                   [ALL(None, op, with_cache=False) for op in self.filter_ops] + \
+                   [BoolAND([ANY(None, self.filter_ops[0]), ALL(None, self.filter_ops[5])]),
+                    BoolOR([ALL(None, self.filter_ops[0]), BoolNOT(ANY(None, self.filter_ops[2]))]),
+                    BoolIMPL([ANY(None, self.filter_ops[3]), ALL(None, self.filter_ops[4])]),
+                    BoolREF("ref", BoolConst(False), with_cache=False)]
+        for bool_op in bool_ops:
+            with self.subTest(bool_op=str(bool_op)):
+                self.assertEqual(bool_op.evaluate(test_set), bool_op.apply(test_set)[0])
+
+    def test_no_materialization(self):
+        """Test that the quantifiers do not build the result set of their filter without debug
+        """
+        with patch.object(AtomicFilter, "apply", autospec=True, side_effect=AtomicFilter.apply) as atomic_apply:
+            self.assertTrue(ANY(None, FilterOR([AtomicFilter("a", {}), AtomicFilter("b", {})])).evaluate(test_set))
+            self.assertFalse(ALL(None, FilterNOT(AtomicFilter("c", {}))).evaluate(test_set))
+            self.assertEqual(atomic_apply.call_count, 0)
+
+    def test_cache_with_meta_info(self):
+        """Test that a cached result of the evaluation without meta info is not returned by apply
+        """
+        any_op = ANY("any", AtomicFilter("c", "pass"))
+        self.assertTrue(any_op.evaluate(test_set))
+        self.assertEqual(any_op.apply(test_set), (True, [("any", {t for t in test_set if t.get("c") == "pass"})]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from openlostcat.osmqueryutils.ask_osm import query_teplate
+from openlostcat.osmqueryutils.ask_osm_async import ask_osm_around_points, get_retry_delay
+
+
+class StubOverpassHandler(BaseHTTPRequestHandler):
+    """Answers the query with the query string as a tag, overloaded statuses are answered first for some queries
+    """
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)["data"][0]
+        with server.lock:
+            server.in_progress += 1
+            server.max_in_progress = max(server.max_in_progress, server.in_progress)
+            server.request_counts[query] = server.request_counts.get(query, 0) + 1
+            failures = server.failures.get(query, [])
+            status = failures[server.request_counts[query] - 1] \
+                if server.request_counts[query] <= len(failures) else 200
+        time.sleep(0.02)
+        body = json.dumps({"elements": [{"tags": {"query": query}}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.in_progress -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAskOsmAsync(unittest.TestCase):
+
+    coords = [(47.5 + i / 1000, 19.0) for i in range(12)]
+
+    def setUp(self):
+        # concurrent requests are handled by concurrent threads
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOverpassHandler)
+        self.server.lock = threading.Lock()
+        self.server.in_progress = 0
+        self.server.max_in_progress = 0
+        self.server.request_counts = {}
+        self.server.failures = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:{port}/api/interpreter".format(port=self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_results_by_index(self):
+        """Test that the results are keyed by the index of the points, with a limited number of concurrent requests
+        """
+        results = ask_osm_around_points(self.coords, distance=50, url=self.url, max_concurrency=3)
+        self.assertEqual(list(range(len(self.coords))), sorted(results))
+        for i, (lat, lng) in enumerate(self.coords):
+            query = results[i]["elements"][0]["tags"]["query"]
+            self.assertIn("around:50,{lat},{lng}".format(lat=lat, lng=lng), query)
+        self.assertLessEqual(self.server.max_in_progress, 3)
+        self.assertGreater(self.server.max_in_progress, 1)
+
+    def test_retry(self):
+        """Test that overloaded statuses are retried, other errors are not
+        """
+        coords = self.coords[:3]
+        queries = [query_teplate.format(distance=100, lat=lat, lng=lng) for lat, lng in coords]
+        self.server.failures = {queries[0]: [429, 504], queries[1]: [400], queries[2]: [429] * 10}
+        results = ask_osm_around_points(coords, url=self.url, retries=3, backoff=0.01)
+        self.assertEqual([3, 1, 4], [self.server.request_counts[query] for query in queries])
+        self.assertIsNotNone(results[0])
+        self.assertIsNone(results[1])
+        self.assertIsNone(results[2])
+
+    def test_connection_error(self):
+        """Test that a point is given None if the API cannot be reached
+        """
+        self.assertEqual({0: None}, ask_osm_around_points(self.coords[:1], url="http://127.0.0.1:1/api", retries=1,
+                                                          backoff=0.01, timeout=1))
+
+    def test_retry_delay(self):
+        class Response:
+            headers = {"Retry-After": "5"}
+        self.assertEqual(0.5 * 4, get_retry_delay(None, 2, 0.5))
+        self.assertEqual(5, get_retry_delay(Response(), 0, 0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
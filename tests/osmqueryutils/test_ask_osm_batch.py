@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import patch
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.osmqueryutils.ask_osm_batch import group_points, get_batch_query, assign_elements, \
+    ask_osm_around_points_batched
+
+
+class TestAskOsmBatch(unittest.TestCase):
+
+    coords = [(47.5, 19.0), (47.5005, 19.0), (47.51, 19.0), (47.6, 19.2)]
+
+    elements = [
+        {"type": "node", "id": 1, "lat": 47.5002, "lon": 19.0, "tags": {"amenity": "bench"}},
+        {"type": "way", "id": 2, "geometry": [{"lat": 47.5095, "lon": 18.999}, {"lat": 47.5095, "lon": 19.001}],
+         "tags": {"highway": "primary"}},
+        {"type": "node", "id": 3, "lat": 47.5012, "lon": 19.0}
+    ]
+
+    def test_group_points(self):
+        """Test that nearby points are grouped, and groups are limited in size
+        """
+        groups = group_points(self.coords, cell_size=5000)
+        self.assertEqual([[0, 1, 2], [3]], sorted(groups))
+        groups = group_points(self.coords, cell_size=5000, max_group_size=2)
+        self.assertEqual([[0, 1], [2], [3]], sorted(groups))
+        self.assertEqual(4, len(group_points(self.coords, cell_size=10)))
+
+    def test_batch_query(self):
+        query = get_batch_query(self.coords[:2], distance=50)
+        self.assertIn("nwr(around:50,47.5,19.0);", query)
+        self.assertIn("nwr(around:50,47.5005,19.0);", query)
+        # the geometry is output within the bounding box of the circles around the points only
+        south, west, north, east = map(float, query[query.index("geom(") + 5:query.index(");", query.index("geom("))]
+                                       .split(","))
+        self.assertAlmostEqual(47.5 - 50 / 111320, south)
+        self.assertAlmostEqual(47.5005 + 50 / 111320, north)
+        self.assertLess(west, 19.0 - 50 / 111320)
+        self.assertGreater(east, 19.0 + 50 / 111320)
+
+    def test_assign_elements(self):
+        """Test that the elements are assigned to all the points within the distance
+        """
+        results = assign_elements({"elements": self.elements}, self.coords[:3], distance=100)
+        self.assertEqual([[1], [1, 3], [2]], [[e["id"] for e in result["elements"]] for result in results])
+
+    def test_assign_clipped_elements(self):
+        """Test that the elements clipped to the bounding box of the query are assigned by their remaining geometry,
+        by their bounds, or to all the points without either (as found around one of them)
+        """
+        elements = [
+            {"type": "way", "id": 4, "geometry": [{"lat": 47.4995, "lon": 19.0}, None, None,
+                                                  {"lat": 47.5105, "lon": 19.0}],
+             "bounds": {"minlat": 47.4995, "minlon": 18.9, "maxlat": 47.5105, "maxlon": 19.0}},
+            {"type": "relation", "id": 5, "bounds": {"minlat": 47.509, "minlon": 19.0, "maxlat": 47.52, "maxlon": 19.1},
+             "members": [{"type": "relation", "ref": 6, "role": ""}]},
+            {"type": "relation", "id": 7, "members": [{"type": "relation", "ref": 6, "role": ""}]}
+        ]
+        results = assign_elements({"elements": elements}, self.coords[:3], distance=100)
+        self.assertEqual([[4, 7], [7], [4, 5, 7]], [[e["id"] for e in result["elements"]] for result in results])
+
+    def test_batched_query(self):
+        """Test that a query is sent for each group, and the results can be categorized by the points
+        """
+        catalog = {"type": "CategoryRuleCollection", "categoryRules": [{"bench": {"amenity": "bench"}}]}
+        categorizer = MainOsmCategorizer(catalog)
+        def ask_osm_stub(query, url, cache, client):
+            return {"elements": self.elements} if "47.5," in query else None
+        with patch("openlostcat.osmqueryutils.ask_osm_batch.ask_osm", side_effect=ask_osm_stub) as ask:
+            results = ask_osm_around_points_batched(self.coords, distance=100, cell_size=5000)
+        self.assertEqual(2, ask.call_count)
+        self.assertEqual([0, 1, 2, 3], list(results))
+        self.assertIsNone(results[3])
+        self.assertEqual([(0, "bench"), (0, "bench"), (-1, None)],
+                         [categorizer.categorize(results[i]) for i in range(3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import patch
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.osmqueryutils.ask_osm_projected import get_key_regex, get_projected_query, \
+    ask_osm_around_point_projected
+from tests.engines import test_catalog_sources, test_locations
+
+
+def project_location(location, keys, representative):
+    """The tags of a location as queried by the projected query: the objects having any of the keys,
+    and one (the given) of the other objects
+    """
+    relevant = [tags for tags in location if not keys.isdisjoint(tags)]
+    other = [tags for tags in location if keys.isdisjoint(tags)]
+    return relevant + other[representative:representative + 1]
+
+
+class TestAskOsmProjected(unittest.TestCase):
+
+    def test_query(self):
+        """Test that the query filters by a regex of exactly the keys, escaped in the query string
+        """
+        self.assertEqual('"^(amenity|name:en)$"', get_key_regex(["name:en", "amenity"]))
+        self.assertEqual('"^(a\\\\.b|x\\"y)$"', get_key_regex(["a.b", 'x"y']))
+        query = get_projected_query({"shop", "amenity"}, 47.5, 19.0, 300)
+        self.assertIn("nwr(around:300,47.5,19.0)(if:count_tags() > 0)->.tagged;", query)
+        self.assertIn('nwr.tagged[~"^(amenity|shop)$"~".*"]->.relevant;', query)
+        self.assertIn(".other out tags 1;", query)
+        self.assertNotIn("[~", get_projected_query(set(), 47.5, 19.0, 300))
+        with patch("openlostcat.osmqueryutils.ask_osm_projected.ask_osm", return_value={"elements": []}) as ask:
+            ask_osm_around_point_projected(47.5, 19.0, {"shop", "amenity"}, distance=300)
+            self.assertEqual(query, ask.call_args[0][0])
+
+    def test_same_categories(self):
+        """Test that the locations are categorized the same by the objects of the projected query,
+        with any representative of the objects without the keys
+        """
+        for source in test_catalog_sources:
+            categorizer = MainOsmCategorizer(source)
+            keys = categorizer.get_referenced_keys()
+            for location in test_locations:
+                expected = categorizer.categorize({"elements": [{"tags": tags} for tags in location]})
+                for representative in range(max(len(location), 1)):
+                    projected = project_location(location, keys, representative)
+                    with self.subTest(source=source, location=location, representative=representative):
+                        self.assertEqual(expected,
+                                         categorizer.categorize({"elements": [{"tags": tags} for tags in projected]}))
+
+
+if __name__ == '__main__':
+    unittest.main()
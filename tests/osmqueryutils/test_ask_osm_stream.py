@@ -0,0 +1,171 @@
+import unittest
+import gc
+import gzip
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest.mock import patch, Mock
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.utils import get_tags_from_osm_elements, get_identified_tags_from_osm_elements
+from openlostcat.osmqueryutils.ask_osm_stream import iter_osm_elements, iter_osm_tags, ask_osm_around_point_tags, \
+    ask_osm_tags
+from openlostcat.osmqueryutils.overpass_client import OverpassClient
+from tests.engines import test_catalog_sources, test_locations
+
+
+osm_json_dict = {
+    "version": 0.6,
+    "generator": "Overpass API 0.7.62",
+    "osm3s": {"timestamp_osm_base": "2024-01-01T00:00:00Z", "copyright": "The data included in this document..."},
+    "elements": [
+        {"type": "node", "id": 1, "lat": 47.5, "lon": 19.0, "tags": {"amenity": "bench", "note": "[{\"x\": 1}], "}},
+        {"type": "node", "id": 2, "lat": 47.5001, "lon": 19.0001},
+        {"type": "way", "id": 3, "nodes": [1, 2], "tags": {"highway": "footway", "name": "Árpád út"}},
+        {"type": "relation", "id": 4, "members": [{"type": "way", "ref": 3, "role": "outer"}],
+         "tags": {"type": "multipolygon", "elements": "[]"}}
+    ],
+    "remark": "runtime error: Query timed out"
+}
+
+
+def split_chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StubOverpassHandler(BaseHTTPRequestHandler):
+    """Answers the test response gzip compressed, or 429 for queries around the south pole
+    """
+
+    def do_GET(self):
+        if "-90" in self.path:
+            self.send_response(429)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = gzip.compress(json.dumps(osm_json_dict, ensure_ascii=False).encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAskOsmStream(unittest.TestCase):
+
+    def test_incremental_parsing(self):
+        """Test that the elements are parsed the same for any chunking of the response
+        """
+        for text in [json.dumps(osm_json_dict), json.dumps(osm_json_dict, indent=2, ensure_ascii=False)]:
+            for size in [1, 2, 7, 64, len(text)]:
+                with self.subTest(size=size):
+                    self.assertEqual(osm_json_dict["elements"], list(iter_osm_elements(split_chunks(text, size))))
+        self.assertEqual([], list(iter_osm_elements(['{"version": 0.6, "elements": [ ]}'])))
+        self.assertEqual([], list(iter_osm_elements(["{}"])))
+
+    def test_elements_arrive_lazily(self):
+        """Test that the elements are yielded before the rest of the response is read
+        """
+        text = json.dumps(osm_json_dict)
+        read = []
+
+        def chunks():
+            for chunk in split_chunks(text, 16):
+                read.append(chunk)
+                yield chunk
+        elements = iter_osm_elements(chunks())
+        next(elements)
+        self.assertLess(len("".join(read)), len(text) / 2)
+
+    def test_invalid_response(self):
+        """Test that a truncated or invalid response raises an error
+        """
+        text = json.dumps(osm_json_dict)
+        with self.assertRaises(ValueError):
+            list(iter_osm_elements(split_chunks(text[:len(text) // 2], 10)))
+        with self.assertRaises(ValueError):
+            list(iter_osm_elements(['{"elements": [{"id": 1} {"id": 2}]}']))
+
+    def test_tags(self):
+        """Test that the tags are the same as retrieved from the loaded response, optionally with the identity
+        """
+        self.assertEqual(get_tags_from_osm_elements(osm_json_dict), list(iter_osm_tags(osm_json_dict["elements"])))
+        self.assertEqual(get_identified_tags_from_osm_elements(osm_json_dict),
+                         list(iter_osm_tags(osm_json_dict["elements"], with_identity=True)))
+        self.assertEqual([("node", 1, None), ("way", 3, None), ("relation", 4, None)],
+                         [identity for identity, tags in iter_osm_tags(osm_json_dict["elements"], with_identity=True)])
+
+    def test_categorize_tags(self):
+        """Test that categorizing the streamed tags is the same as categorizing the loaded response
+        """
+        for source in test_catalog_sources:
+            for engine in ["interpreter", "interned"]:
+                categorizer = MainOsmCategorizer(source, engine=engine)
+                for location in test_locations:
+                    with self.subTest(source=source, engine=engine, location=location):
+                        self.assertEqual(categorizer.categorize({"elements": [{"tags": tags} for tags in location]}),
+                                         categorizer.categorize_tags(iter(location)))
+
+    def test_abandoned_response_closed(self):
+        """Test that the response is closed when the tags are abandoned before the end, or never iterated
+        """
+        def stub_response():
+            text = json.dumps(osm_json_dict).encode()
+            return Mock(status_code=200, encoding="utf-8", iter_content=Mock(return_value=split_chunks(text, 16)))
+        for consumed in [0, 1, 3]:
+            response = stub_response()
+            with self.subTest(consumed=consumed):
+                with patch("openlostcat.osmqueryutils.ask_osm_stream.requests.get", return_value=response):
+                    tags = ask_osm_tags("query")
+                for _ in range(consumed):
+                    next(tags)
+                response.close.assert_not_called()
+                del tags
+                gc.collect()
+                response.close.assert_called()
+        response = stub_response()
+        with patch("openlostcat.osmqueryutils.ask_osm_stream.requests.get", return_value=response):
+            tags = ask_osm_tags("query")
+        next(tags)
+        tags.close()
+        response.close.assert_called()
+
+    def test_categorize_identified_tags(self):
+        """Test that categorizing the streamed tags with identity is the same as categorizing the loaded response,
+        with the identities cached by the atom cache engine
+        """
+        for source in test_catalog_sources:
+            for engine in ["interpreter", "bitset", "atom_cache"]:
+                categorizer = MainOsmCategorizer(source, engine=engine)
+                for location in test_locations:
+                    elements = [{"type": "node", "id": i, "tags": tags} for i, tags in enumerate(location)]
+                    with self.subTest(source=source, engine=engine, location=location):
+                        self.assertEqual(categorizer.categorize({"elements": elements}),
+                                         categorizer.categorize_tags(iter_osm_tags(elements, with_identity=True),
+                                                                     with_identity=True))
+                if engine == "atom_cache":
+                    compiler = categorizer.evaluator.prepare.__self__
+                    self.assertIn(("node", 0, None), [element_key for element_key, _ in compiler.atom_vectors])
+
+    def test_streamed_query(self):
+        """Test the streamed query of a compressed response, with and without a client
+        """
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubOverpassHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:{port}/api/interpreter".format(port=server.server_address[1])
+        try:
+            expected = get_tags_from_osm_elements(osm_json_dict)
+            self.assertEqual(expected, list(ask_osm_around_point_tags(47.5, 19.0, url=url)))
+            with OverpassClient() as client:
+                self.assertEqual(expected, list(ask_osm_around_point_tags(47.5, 19.0, url=url, client=client)))
+                self.assertIsNone(ask_osm_around_point_tags(-90, 0, url=url, client=client))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
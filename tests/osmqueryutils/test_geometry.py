@@ -0,0 +1,53 @@
+import unittest
+from openlostcat.osmqueryutils.geometry import haversine, segment_distance, element_distance, bounds_distance, \
+    split_line
+
+
+class TestGeometry(unittest.TestCase):
+
+    def test_haversine(self):
+        self.assertEqual(0, haversine(47.5, 19.0, 47.5, 19.0))
+        self.assertAlmostEqual(111195, haversine(47.0, 19.0, 48.0, 19.0), delta=1)
+        self.assertAlmostEqual(haversine(47.5, 19.0, 47.5, 19.01), haversine(47.5, 19.01, 47.5, 19.0))
+
+    def test_segment_distance(self):
+        """Test the distance of the nearest point of a segment, an end or an inner point
+        """
+        self.assertAlmostEqual(haversine(47.5, 19.0, 47.501, 19.0),
+                               segment_distance(47.5, 19.0, 47.501, 18.999, 47.501, 19.001), delta=0.01)
+        self.assertAlmostEqual(haversine(47.5, 19.0, 47.501, 19.001),
+                               segment_distance(47.5, 19.0, 47.501, 19.001, 47.501, 19.002), delta=0.01)
+        self.assertAlmostEqual(haversine(47.5, 19.0, 47.501, 19.001),
+                               segment_distance(47.5, 19.0, 47.501, 19.001, 47.501, 19.001), delta=0.01)
+
+    def test_bounds_distance(self):
+        bounds = {"minlat": 47.5, "minlon": 19.0, "maxlat": 47.6, "maxlon": 19.1}
+        self.assertEqual(0, bounds_distance(bounds, 47.55, 19.05))
+        self.assertAlmostEqual(haversine(47.7, 19.05, 47.6, 19.05), bounds_distance(bounds, 47.7, 19.05))
+        self.assertAlmostEqual(haversine(47.4, 18.9, 47.5, 19.0), bounds_distance(bounds, 47.4, 18.9))
+
+    def test_split_line(self):
+        """Test that a line is split at its missing points
+        """
+        self.assertEqual([[(47.5, 19.0), (47.6, 19.0)], [(47.7, 19.0)]],
+                         split_line([None, {"lat": 47.5, "lon": 19.0}, {"lat": 47.6, "lon": 19.0}, None, None,
+                                     {"lat": 47.7, "lon": 19.0}, None]))
+        self.assertEqual([], split_line([None]))
+
+    def test_element_distance(self):
+        node = {"type": "node", "lat": 47.501, "lon": 19.0}
+        way = {"type": "way", "geometry": [{"lat": 47.501, "lon": 18.999}, {"lat": 47.501, "lon": 19.001}]}
+        relation = {"type": "relation", "members": [
+            {"type": "way", "geometry": [{"lat": 47.502, "lon": 18.999}, {"lat": 47.502, "lon": 19.001}]},
+            {"type": "node", "lat": 47.501, "lon": 19.0},
+            {"type": "relation"}]}
+        center = {"type": "way", "center": {"lat": 47.501, "lon": 19.0}}
+        expected = haversine(47.5, 19.0, 47.501, 19.0)
+        for element in [node, way, relation, center]:
+            with self.subTest(element=element):
+                self.assertAlmostEqual(expected, element_distance(element, 47.5, 19.0), delta=0.01)
+        self.assertIsNone(element_distance({"type": "relation", "members": []}, 47.5, 19.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import io
+import os
+import tempfile
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.osmqueryutils.osm_extract import read_osm_xml, OsmExtractIndex
+
+osm_xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+ <node id="1" lat="47.5000" lon="19.0000"><tag k="amenity" v="bench"/></node>
+ <node id="2" lat="47.5010" lon="19.0000"/>
+ <node id="3" lat="47.5010" lon="19.0020"/>
+ <node id="4" lat="47.5005" lon="19.0005"><tag k="name" v="Untitled"/></node>
+ <node id="5" lat="47.5100" lon="19.0000"><tag k="amenity" v="cafe"/></node>
+ <node id="6" lat="47.4995" lon="18.9990"/>
+ <way id="10"><nd ref="2"/><nd ref="3"/><tag k="highway" v="primary"/></way>
+ <way id="11"><nd ref="6"/><nd ref="2"/></way>
+ <way id="12"><nd ref="3"/><nd ref="5"/></way>
+ <relation id="20">
+  <member type="way" ref="11" role="outer"/>
+  <member type="node" ref="5" role=""/>
+  <tag k="landuse" v="residential"/>
+ </relation>
+</osm>
+"""
+
+
+class TestOsmExtract(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = OsmExtractIndex(os.path.join(self.directory.name, "extract.sqlite"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_osm_xml(self):
+        elements = list(read_osm_xml(io.BytesIO(osm_xml)))
+        self.assertEqual(["node"] * 6 + ["way"] * 3 + ["relation"], [e["type"] for e in elements])
+        self.assertEqual({"type": "node", "id": 1, "tags": {"amenity": "bench"}, "lat": 47.5, "lon": 19.0},
+                         elements[0])
+        self.assertEqual([2, 3], elements[6]["nodes"])
+        self.assertEqual([{"type": "way", "ref": 11, "role": "outer"}, {"type": "node", "ref": 5, "role": ""}],
+                         elements[-1]["members"])
+
+    def test_import_referenced_keys(self):
+        """Test that the elements with the given keys are indexed with their tags and geometry
+        """
+        count = self.index.import_extract(lambda: read_osm_xml(io.BytesIO(osm_xml)),
+                                          keys={"amenity", "highway", "landuse"})
+        self.assertEqual(5, count)
+        result = self.index.ask_osm_around_point(47.5, 19.0, distance=150)
+        self.assertEqual([("node", 1), ("node", 4), ("way", 10), ("relation", 20)],
+                         [(e["type"], e["id"]) for e in result["elements"]])
+        # the tagged object without the keys is indexed without its tags
+        self.assertEqual({}, result["elements"][1]["tags"])
+        way = result["elements"][2]
+        self.assertEqual([{"lat": 47.501, "lon": 19.0}, {"lat": 47.501, "lon": 19.002}], way["geometry"])
+        relation = result["elements"][3]
+        self.assertEqual([{"lat": 47.4995, "lon": 18.999}, {"lat": 47.501, "lon": 19.0}],
+                         relation["members"][0]["geometry"])
+        self.assertEqual((47.51, 19.0), (relation["members"][1]["lat"], relation["members"][1]["lon"]))
+        self.assertEqual([("node", 5), ("relation", 20)],
+                         [(e["type"], e["id"]) for e in self.index.ask_osm_around_point(47.51, 19.0, 50)["elements"]])
+        self.assertEqual([], self.index.ask_osm_around_point(47.6, 19.0)["elements"])
+
+    def test_import_all_tagged(self):
+        self.assertEqual(5, self.index.import_osm_xml(io.BytesIO(osm_xml)))
+        self.assertIn(("node", 4), [(e["type"], e["id"])
+                                    for e in self.index.ask_osm_around_point(47.5, 19.0)["elements"]])
+
+    def test_categorize_offline(self):
+        """Test that the results of the index can be categorized by a catalog, indexing only its referenced keys
+        """
+        catalog = {"type": "CategoryRuleCollection", "categoryRules": [
+            {"bench_on_primary": {"__ANY_1": {"amenity": "bench"}, "__ANY_2": {"highway": "primary"}}},
+            {"cafe": {"amenity": "cafe"}}]}
+        categorizer = MainOsmCategorizer(catalog)
+        self.assertEqual({"amenity", "highway"}, categorizer.category_cat.get_referenced_keys())
+        self.index.import_osm_xml(io.BytesIO(osm_xml), categorizer.category_cat.get_referenced_keys())
+        self.assertEqual((0, "bench_on_primary"),
+                         categorizer.categorize(self.index.ask_osm_around_point(47.5, 19.0, 150)))
+        self.assertEqual((1, "cafe"), categorizer.categorize(self.index.ask_osm_around_point(47.51, 19.0, 10)))
+
+    def test_untagged_representative(self):
+        """Test that ALL and NOT conditions categorize the index of the referenced keys as the index of all the tags,
+        with one of the other tagged objects returned near a point
+        """
+        catalog = {"type": "CategoryRuleCollection", "categoryRules": [
+            {"only_benches": {"__ALL_": {"amenity": "bench"}}},
+            {"no_highway": {"__NOT_": {"__ANY_": {"highway": {}}}}},
+            {"other": True}]}
+        categorizer = MainOsmCategorizer(catalog)
+        full_index = OsmExtractIndex(os.path.join(self.directory.name, "full.sqlite"))
+        full_index.import_osm_xml(io.BytesIO(osm_xml))
+        self.index.import_osm_xml(io.BytesIO(osm_xml), categorizer.get_referenced_keys())
+        for lat, lng, distance in [(47.5, 19.0, 10), (47.5, 19.0, 100), (47.5, 19.0, 150), (47.5005, 19.0005, 5),
+                                   (47.51, 19.0, 10), (47.51, 19.0, 1000), (47.6, 19.0, 100)]:
+            with self.subTest(lat=lat, lng=lng, distance=distance):
+                self.assertEqual(categorizer.categorize(full_index.ask_osm_around_point(lat, lng, distance)),
+                                 categorizer.categorize(self.index.ask_osm_around_point(lat, lng, distance)))
+        self.assertEqual((1, "no_highway"), categorizer.categorize(self.index.ask_osm_around_point(47.5, 19.0, 100)))
+        self.assertEqual(1, len([e for e in self.index.ask_osm_around_point(47.51, 19.0, 1000)["elements"]
+                                 if not e["tags"]]))
+
+    @unittest.skipIf(__import__("importlib").util.find_spec("osmium") is None, "osmium is not installed")
+    def test_import_osm_pbf(self):
+        import osmium
+        xml_path = os.path.join(self.directory.name, "extract.osm")
+        pbf_path = os.path.join(self.directory.name, "extract.osm.pbf")
+        with open(xml_path, "wb") as f:
+            f.write(osm_xml)
+        with osmium.SimpleWriter(pbf_path) as writer:
+            for obj in osmium.FileProcessor(xml_path):
+                writer.add(obj)
+        self.assertEqual(5, self.index.import_osm_pbf(pbf_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import gzip
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import requests
+from openlostcat.osmqueryutils.ask_osm import ask_osm, ask_osm_around_point
+from openlostcat.osmqueryutils.ask_osm_async import ask_osm_around_points
+from openlostcat.osmqueryutils.overpass_client import OverpassClient
+
+
+class StubOverpassHandler(BaseHTTPRequestHandler):
+    """Answers the query with the query string as a tag (gzip compressed if accepted) on keep-alive connections,
+    recording the client ports and the accepted encodings
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)["data"][0]
+        accept_encoding = self.headers.get("Accept-Encoding", "")
+        with server.lock:
+            server.client_ports.append(self.client_address[1])
+            server.accept_encodings.append(accept_encoding)
+        time.sleep(server.delay)
+        body = json.dumps({"elements": [{"tags": {"query": query}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in accept_encoding:
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestOverpassClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOverpassHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.client_ports = []
+        self.server.accept_encodings = []
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:{port}/api/interpreter".format(port=self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive_and_compression(self):
+        """Test that the queries of a client reuse one connection and the compressed responses are decoded
+        """
+        with OverpassClient(pool_size=2) as client:
+            for i in range(5):
+                result = ask_osm_around_point(47.5, 19.0 + i / 1000, url=self.url, client=client)
+                self.assertIn("{lng}".format(lng=19.0 + i / 1000), result["elements"][0]["tags"]["query"])
+        self.assertEqual(1, len(set(self.server.client_ports)))
+        self.assertTrue(all("gzip" in encoding for encoding in self.server.accept_encodings))
+
+    def test_no_compression(self):
+        """Test that uncompressed responses can be requested
+        """
+        with OverpassClient(compression=False) as client:
+            self.assertIsNotNone(ask_osm("[out:json];", url=self.url, client=client))
+        self.assertEqual(["identity"], self.server.accept_encodings)
+
+    def test_timeout(self):
+        """Test that a hung request fails with a timeout
+        """
+        self.server.delay = 0.5
+        with OverpassClient(read_timeout=0.1) as client:
+            with self.assertRaises(requests.Timeout):
+                ask_osm("[out:json];", url=self.url, client=client)
+
+    def test_async_pooled_connections(self):
+        """Test that the concurrent queries use at most as many connections as the concurrency
+        """
+        self.server.delay = 0.02
+        coords = [(47.5 + i / 1000, 19.0) for i in range(12)]
+        results = ask_osm_around_points(coords, url=self.url, max_concurrency=3)
+        self.assertTrue(all(result is not None for result in results.values()))
+        self.assertLessEqual(len(set(self.server.client_ports)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
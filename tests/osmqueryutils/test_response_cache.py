@@ -0,0 +1,145 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from multiprocessing import get_context
+from unittest.mock import patch, Mock
+from openlostcat.osmqueryutils.ask_osm import ask_osm_around_point, query_teplate
+from openlostcat.osmqueryutils.response_cache import ResponseCache
+
+
+def store_results(path, worker):
+    cache = ResponseCache(path)
+    for i in range(20):
+        cache.set("query {worker} {i}".format(worker=worker, i=i), "url", {"elements": [{"id": i}]})
+
+
+class TestResponseCache(unittest.TestCase):
+
+    result = {"elements": [{"type": "node", "id": 1, "tags": {"amenity": "bench", "name": "Ő"}}]}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "responses.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_and_set(self):
+        """Test that results are keyed by the API address and the query with normalized whitespace
+        """
+        cache = ResponseCache(self.path)
+        self.assertIsNone(cache.get("[out:json]; node(1);  out;", "url"))
+        cache.set("[out:json]; node(1);  out;", "url", self.result)
+        self.assertEqual(self.result, cache.get("\n[out:json];\n node(1);\nout;\n", "url"))
+        self.assertEqual(self.result, ResponseCache(self.path).get("[out:json]; node(1); out;", "url"))
+        self.assertIsNone(cache.get("[out:json]; node(1); out;", "other url"))
+        self.assertIsNone(cache.get("[out:json]; node(2); out;", "url"))
+        cache.clear()
+        self.assertIsNone(cache.get("[out:json]; node(1); out;", "url"))
+
+    def test_quoted_whitespace(self):
+        """Test that the whitespace inside the quoted strings of a query is not normalized
+        """
+        self.assertEqual('node["name"="a  b"] [\'x\'=\'\\\'  \'];',
+                         ResponseCache.normalize_query(' node["name"="a  b"]\n  [\'x\'=\'\\\'  \'];\n'))
+        cache = ResponseCache(self.path)
+        cache.set('node["name"="a  b"]; out;', "url", self.result)
+        self.assertEqual(self.result, cache.get('node["name"="a  b"];\n out;', "url"))
+        self.assertIsNone(cache.get('node["name"="a b"]; out;', "url"))
+
+    def test_ttl(self):
+        cache = ResponseCache(self.path, ttl=60)
+        cache.set("query", "url", self.result)
+        self.assertEqual(self.result, cache.get("query", "url"))
+        with patch("openlostcat.osmqueryutils.response_cache.time.time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("query", "url"))
+        self.assertIsNone(cache.get("query", "url"))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used results are evicted above the size limit
+        """
+        cache = ResponseCache(self.path)
+        cache.set("query 0", "url", self.result)
+        size = cache.get_size()
+        cache = ResponseCache(self.path, max_size=3 * size, access_interval=0)
+        for i in range(1, 3):
+            cache.set("query {i}".format(i=i), "url", self.result)
+        # query 0 is used again, so query 1 is the least recently used one
+        self.assertIsNotNone(cache.get("query 0", "url"))
+        cache.set("query 3", "url", self.result)
+        self.assertLessEqual(cache.get_size(), 3 * size)
+        self.assertEqual([True, False, True, True],
+                         [cache.get("query {i}".format(i=i), "url") is not None for i in range(4)])
+
+    def test_throttled_access(self):
+        """Test that the last access of a result is updated at most once in the access interval
+        """
+        cache = ResponseCache(self.path, access_interval=60)
+        cache.set("query 0", "url", self.result)
+        cache.set("query 1", "url", self.result)
+        with closing(sqlite3.connect(self.path)) as connection:
+            accessed = dict(connection.execute("SELECT key, accessed FROM responses"))
+        self.assertIsNotNone(cache.get("query 0", "url"))
+        with patch("openlostcat.osmqueryutils.response_cache.time.time", return_value=time.time() + 61):
+            self.assertIsNotNone(cache.get("query 1", "url"))
+        with closing(sqlite3.connect(self.path)) as connection:
+            updated = dict(connection.execute("SELECT key, accessed FROM responses"))
+        self.assertEqual(accessed[cache.get_key("query 0", "url")], updated[cache.get_key("query 0", "url")])
+        self.assertLess(accessed[cache.get_key("query 1", "url")], updated[cache.get_key("query 1", "url")])
+
+    def test_running_total_size(self):
+        """Test that the total size is kept up to date, also for a cache file created without it
+        """
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute(ResponseCache.create_table_statement)
+            connection.execute("INSERT INTO responses VALUES ('key', 'url', x'00', 7, 0, 0)")
+        cache = ResponseCache(self.path)
+        self.assertEqual(7, cache.get_size())
+        cache.set("query", "url", self.result)
+        size = cache.get_size() - 7
+        cache.set("query", "url", {"elements": []})
+        cache.set("query", "url", self.result)
+        self.assertEqual(7 + size, cache.get_size())
+        with closing(sqlite3.connect(self.path)) as connection:
+            self.assertEqual(connection.execute("SELECT SUM(size) FROM responses").fetchone()[0], cache.get_size())
+        cache.clear()
+        self.assertEqual(0, cache.get_size())
+
+    def test_multiple_processes(self):
+        """Test that multiple processes can store results in the same cache file
+        """
+        ResponseCache(self.path)
+        processes = [get_context("spawn").Process(target=store_results, args=(self.path, worker))
+                     for worker in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        cache = ResponseCache(self.path)
+        for worker in range(3):
+            for i in range(20):
+                self.assertEqual({"elements": [{"id": i}]},
+                                 cache.get("query {worker} {i}".format(worker=worker, i=i), "url"))
+
+    def test_ask_osm_with_cache(self):
+        """Test that a cached query is not sent again, and failed queries are not cached
+        """
+        cache = ResponseCache(self.path)
+        response = Mock(status_code=200, json=Mock(return_value=self.result))
+        with patch("openlostcat.osmqueryutils.ask_osm.requests.get", return_value=response) as get:
+            self.assertEqual(self.result, ask_osm_around_point(47.5, 19.0, cache=cache))
+            self.assertEqual(self.result, ask_osm_around_point(47.5, 19.0, cache=cache))
+            self.assertEqual(1, get.call_count)
+        self.assertEqual(self.result, cache.get(query_teplate.format(distance=100, lat=47.5, lng=19.0),
+                                                "http://overpass-api.de/api/interpreter"))
+        with patch("openlostcat.osmqueryutils.ask_osm.requests.get", return_value=Mock(status_code=429)) as get:
+            self.assertIsNone(ask_osm_around_point(47.6, 19.0, cache=cache))
+            self.assertIsNone(ask_osm_around_point(47.6, 19.0, cache=cache))
+            self.assertEqual(2, get.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import os
+import re
+import tempfile
+from unittest.mock import patch
+from openlostcat.osmqueryutils.geometry import element_distance
+from openlostcat.osmqueryutils.response_cache import ResponseCache
+from openlostcat.osmqueryutils.tile_provider import get_tile, get_tile_bounds, get_covering_tiles, \
+    TileNeighborhoodProvider
+
+
+class TestTileProvider(unittest.TestCase):
+
+    elements = [{"type": "node", "id": i, "lat": 47.49 + i * 0.0005, "lon": 19.04 + (i % 7) * 0.0004,
+                 "tags": {"n": str(i)}} for i in range(60)] + [
+        {"type": "way", "id": 1, "tags": {"highway": "primary"},
+         "geometry": [{"lat": 47.49 + i * 0.0002, "lon": 19.03 + i * 0.0001} for i in range(200)]}]
+
+    def ask_osm_stub(self, query, url, cache, client):
+        """Answers a bounding box query from the elements (a way if any of its dense nodes is in the box),
+        with the geometry clipped to the box (keeping the nodes next to the box) and the bounds of the ways,
+        a relation if the test-only center of its bounds is in the box
+        """
+        south, west, north, east = map(float, re.search(r"nwr\(([^)]*)\)", query).group(1).split(","))
+        self.assertIn("geom({},{},{},{})".format(south, west, north, east), query)
+
+        def inside(p):
+            return p is not None and south <= p["lat"] <= north and west <= p["lon"] <= east
+        elements = []
+        for e in self.elements:
+            if "geometry" in e:
+                geometry = e["geometry"]
+                clipped = [p if any(map(inside, geometry[max(i - 1, 0):i + 2])) else None
+                           for i, p in enumerate(geometry)]
+                if any(map(inside, geometry)):
+                    elements.append(dict(e, geometry=clipped, bounds={
+                        "minlat": min(p["lat"] for p in geometry), "minlon": min(p["lon"] for p in geometry),
+                        "maxlat": max(p["lat"] for p in geometry), "maxlon": max(p["lon"] for p in geometry)}))
+            elif "lat" in e and inside(e) or "members" in e and inside(e["bounds_center"]):
+                elements.append({k: v for k, v in e.items() if k != "bounds_center"})
+        return {"elements": elements}
+
+    def test_tiles(self):
+        """Test that a point is in the bounds of its tile, and the tiles cover the circle around it
+        """
+        lat, lng = 47.5001, 19.0247
+        x, y = get_tile(lat, lng, 16)
+        south, west, north, east = get_tile_bounds(x, y, 16)
+        self.assertTrue(south <= lat <= north and west <= lng <= east)
+        self.assertEqual([(x, y)], get_covering_tiles((south + north) / 2, (west + east) / 2, 1, 16))
+        tiles = get_covering_tiles(lat, lng, 1000, 16)
+        self.assertIn((x, y), tiles)
+        self.assertGreaterEqual(len(tiles), 9)
+
+    def test_same_as_around_query(self):
+        """Test that the objects are the ones within the distance, each tile is queried only once
+        """
+        provider = TileNeighborhoodProvider(zoom=17)
+        points = [(47.495 + i * 0.001, 19.041) for i in range(10)]
+        with patch("openlostcat.osmqueryutils.tile_provider.ask_osm", side_effect=self.ask_osm_stub) as ask:
+            for lat, lng in points:
+                result = provider.ask_osm_around_point(lat, lng, distance=150)
+                with self.subTest(lat=lat, lng=lng):
+                    self.assertEqual(sorted((e["type"], e["id"]) for e in self.elements
+                                            if element_distance(e, lat, lng) <= 150),
+                                     sorted((e["type"], e["id"]) for e in result["elements"]))
+            self.assertEqual(len(provider.tiles), ask.call_count)
+            self.assertLess(ask.call_count, len(points) * 4)
+
+    def test_elements_without_geometry(self):
+        """Test that an object without geometry in the tiles (a relation of relations) is kept by its bounds,
+        or for any point if it has no bounds either
+        """
+        members = [{"type": "relation", "ref": 3, "role": ""}]
+        relations = [{"type": "relation", "id": 2, "tags": {"boundary": "administrative"}, "members": members,
+                      "bounds": {"minlat": 47.499, "minlon": 19.039, "maxlat": 47.501, "maxlon": 19.041},
+                      "bounds_center": {"lat": 47.5, "lon": 19.04}},
+                     {"type": "relation", "id": 4, "tags": {"type": "site"}, "members": members,
+                      "bounds_center": {"lat": 47.5, "lon": 19.04}}]
+        provider = TileNeighborhoodProvider(zoom=17)
+        with patch.object(self, "elements", relations), \
+                patch("openlostcat.osmqueryutils.tile_provider.ask_osm", side_effect=self.ask_osm_stub):
+            self.assertEqual([("relation", 2), ("relation", 4)],
+                             [(e["type"], e["id"]) for e in provider.ask_osm_around_point(47.5, 19.04, 10)["elements"]])
+            # in the same tile, but farther from the bounds of the first relation
+            self.assertEqual([("relation", 4)], [(e["type"], e["id"]) for e in
+                                                 provider.ask_osm_around_point(47.4988, 19.0418, 10)["elements"]])
+
+    def test_failed_tile(self):
+        provider = TileNeighborhoodProvider()
+        with patch("openlostcat.osmqueryutils.tile_provider.ask_osm", return_value=None):
+            self.assertIsNone(provider.ask_osm_around_point(47.5, 19.04))
+        self.assertEqual(0, len(provider.tiles))
+
+    def test_tiles_in_memory_and_on_disk(self):
+        """Test that the least recently used tiles are dropped from memory, but kept in the cache
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResponseCache(os.path.join(directory, "tiles.sqlite"))
+            provider = TileNeighborhoodProvider(zoom=17, cache=cache, max_tiles_in_memory=2)
+            with patch("openlostcat.osmqueryutils.ask_osm.requests.get") as get:
+                get.return_value.status_code = 200
+                get.return_value.json.side_effect = lambda: {"elements": self.elements[:1]}
+                for i in range(5):
+                    provider.ask_osm_around_point(47.49 + i * 0.01, 19.04, distance=1)
+                self.assertEqual(2, len(provider.tiles))
+                self.assertEqual(5, get.call_count)
+                provider = TileNeighborhoodProvider(zoom=17, cache=cache)
+                self.assertEqual({"elements": [self.elements[0]]}, provider.ask_osm_around_point(47.49, 19.04, 1))
+                self.assertEqual(5, get.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
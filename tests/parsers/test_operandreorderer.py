@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.parsers.operandreorderer import OperandReorderer
+from openlostcat.utils import to_tag_bundle_set
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestOperandReorderer(unittest.TestCase):
+
+    catalog_json = {
+        "type": "CategoryRuleCollection",
+        "properties": {"evaluationStrategy": "all"},
+        "categoryRules": [
+            {"and": {"__AND_": {"__ANY_1": {"shop": {}}, "__ANY_2": {"amenity": "bench"}}}},
+            {"or": [{"__ANY_": {"shop": "butcher"}}, {"__ANY_": {"shop": {}}}]},
+            {"filter_and": {"__ANY_": {"shop": {}, "wheelchair": "yes"}}}
+        ]
+    }
+
+    sample = [{"elements": [{"tags": {"shop": "supermarket"}}, {"tags": {"shop": "bakery", "highway": "primary"}}]},
+              {"elements": [{"tags": {"shop": "kiosk", "wheelchair": "no"}}]}]
+
+    def test_profile(self):
+        """Test that the operands most likely to short-circuit their operator are moved forward
+        """
+        categorizer = MainOsmCategorizer(self.catalog_json)
+        operand_orders = categorizer.optimize_operand_order(self.sample)
+        self.assertEqual(operand_orders, {"0": [1, 0], "1": [1, 0], "2/0": [1, 0]})
+        rules = [category.rules for category in categorizer.category_cat.categories]
+        self.assertEqual(rules[0].bool_operators[0].filter_operator.key, "amenity")
+        self.assertIsNone(rules[1].bool_operators[0].filter_operator.values)
+        self.assertEqual(rules[2].filter_operator.filter_operators[0].key, "wheelchair")
+
+    def test_reload(self):
+        """Test that saved operand orders are applied to a newly parsed catalog
+        """
+        reorderer = OperandReorderer()
+        reorderer.profile(MainOsmCategorizer(self.catalog_json).category_cat,
+                          [to_tag_bundle_set([element["tags"] for element in osm["elements"]]) for osm in self.sample])
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "orders.json")
+            reorderer.save(file_path)
+            categorizer = MainOsmCategorizer(self.catalog_json, operand_orders=file_path)
+        optimized = MainOsmCategorizer(self.catalog_json)
+        optimized.optimize_operand_order(self.sample)
+        self.assertEqual(str(categorizer), str(optimized))
+
+    def test_same_result(self):
+        """Test that the reordered rules give the same categories
+        """
+        sample = [{"elements": [{"tags": tags} for tags in location]} for location in test_locations]
+        for source in test_catalog_sources:
+            for engine in ["interpreter", "compiled"]:
+                categorizer = MainOsmCategorizer(source, engine=engine)
+                expected = [categorizer.categorize(osm) for osm in sample]
+                categorizer.optimize_operand_order(sample)
+                with self.subTest(source=source, engine=engine):
+                    self.assertEqual([categorizer.categorize(osm) for osm in sample], expected)
+
+    def test_invalid_order(self):
+        with self.assertRaises(SyntaxError):
+            MainOsmCategorizer(self.catalog_json, operand_orders={"0": [0, 0]})
+
+
+if __name__ == '__main__':
+    unittest.main()
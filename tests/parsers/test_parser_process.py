@@ -82,48 +82,48 @@ class TestParserProcess(unittest.TestCase):
         operator_validation_output = "OR[ \
                 AND( \
                     IMPL( \
-                        ANY[test]( \
+                        ALL[test]( \
                             not( \
                                 or[ \
-                                    {access : {'private'}}, is_optional_key = False \
-                                    {motor_vehicle : {'yes'}}, is_optional_key = False \
+                                    {access : {'private'}}, is_optional_key = False, is_any_value = False \
+                                    {motor_vehicle : {'yes'}}, is_optional_key = False, is_any_value = False \
                                     and( \
                                         or[ \
                                             and( \
                                                 const(True) \
-                                                {landuse : {'residential'}}, is_optional_key = False \
+                                                {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                             ) \
                                             const(False) \
                                         ] \
-                                        {landuse : {'residential'}}, is_optional_key = False \
+                                        {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                     ) \
                                 ] \
                             ) \
                         ) \
                         => \
                         ALL[test]( \
-                            {landuse : {'residential'}}, is_optional_key = False \
+                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                         ) \
                         => \
                         ANY[test]( \
-                            {landuse : {'residential'}}, is_optional_key = False \
+                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                         ) \
                     ) \
                     ALL[test]( \
                         impl( \
-                            {landuse : {'42'}}, is_optional_key = False \
+                            {landuse : {'42'}}, is_optional_key = False, is_any_value = False \
                             => \
-                            {landuse : set()}, is_optional_key = True \
+                            {landuse : set()}, is_optional_key = True, is_any_value = False \
                             => \
-                            {landuse : {'residential'}}, is_optional_key = True \
+                            {landuse : {'residential'}}, is_optional_key = True, is_any_value = False \
                         ) \
                     ) \
                     ANY[test]( \
-                        {landuse : {'residential'}}, is_optional_key = False \
+                        {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                     ) \
                 ) \
                 ANY[test]( \
-                    {landuse : {'residential'}}, is_optional_key = False \
+                    {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                 ) \
                 ANY[test]( \
                     and( \
@@ -226,32 +226,32 @@ class TestParserProcess(unittest.TestCase):
                                             ANY[test]( \
                                                 and( \
                                                     impl( \
-                                                            {landuse : {'residential'}}, is_optional_key = False \
+                                                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                             => \
-                                                            {landuse : {'residential'}}, is_optional_key = False \
+                                                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                             => \
-                                                            {landuse : {'residential'}}, is_optional_key = False \
+                                                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                         ) \
                                                     impl( \
-                                                            {landuse : {'residential'}}, is_optional_key = False \
+                                                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                             => \
-                                                            {landuse : {'residential'}}, is_optional_key = False \
+                                                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                             => \
-                                                            {landuse : {'residential'}}, is_optional_key = False \
+                                                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                         ) \
-                                                            {landuse : {'residential'}}, is_optional_key = False \
+                                                            {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                 ) \
                                             ) \
                                             ANY[test]( \
-                                                {landuse : {'residential'}}, is_optional_key = False \
+                                                {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                             ) \
                                             ALL[test]( \
                                                 impl( \
-                                                    {landuse : {'residential'}}, is_optional_key = False \
+                                                    {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                     => \
-                                                    {landuse : {'residential'}}, is_optional_key = False \
+                                                    {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                     => \
-                                                    {landuse : {'residential'}}, is_optional_key = False \
+                                                    {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                                 ) \
                                             ) \
                                         ] \
@@ -293,28 +293,28 @@ class TestParserProcess(unittest.TestCase):
                             or[ \
                                 and( \
                                     impl( \
-                                        {landuse : {'residential'}}, is_optional_key = False \
+                                        {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                         => \
-                                        {landuse : {'residential'}}, is_optional_key = False \
+                                        {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                         => \
-                                        {landuse : {'residential'}}, is_optional_key = False \
+                                        {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                     ) \
                                 impl( \
-                                    {landuse : {'residential'}}, is_optional_key = False \
+                                    {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                     => \
-                                    {landuse : {'residential'}}, is_optional_key = False \
+                                    {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                     => \
-                                    {landuse : {'residential'}}, is_optional_key = False \
+                                    {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                 ) \
-                                {landuse : {'residential'}}, is_optional_key = False \
+                                {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                 ) \
-                                {landuse : {'residential'}}, is_optional_key = False \
+                                {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                 impl( \
-                                    {landuse : {'residential'}}, is_optional_key = False \
+                                    {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                 => \
-                                {landuse : {'residential'}}, is_optional_key = False \
+                                {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                 => \
-                                {landuse : {'residential'}}, is_optional_key = False \
+                                {landuse : {'residential'}}, is_optional_key = False, is_any_value = False \
                                 ) \
                             ] \
                     ) \
@@ -387,14 +387,14 @@ class TestParserProcess(unittest.TestCase):
                         Category name: water_nearby \
                             rules: [ \
                                 ANY[test]( \
-                                    {waterway : {'river'}}, is_optional_key = False \
+                                    {waterway : {'river'}}, is_optional_key = False, is_any_value = False \
                                 ) \
                             ] \
                         Category name: calm_streets \
                         rules: [ \
                             ALL[test]( \
                                 not( \
-                                    {highway : {'primary'}}, is_optional_key = False \
+                                    {highway : {'primary'}}, is_optional_key = False, is_any_value = False \
                                 ) \
                             ) \
                         ] \
@@ -447,7 +447,7 @@ class TestParserProcess(unittest.TestCase):
                         OR[ \
                             ANY[test]( \
                                 ref #test( \
-                                    {__FIELDCONST_ : {'yes'}}, is_optional_key = False \
+                                    {__FIELDCONST_ : {'yes'}}, is_optional_key = False, is_any_value = False \
                                 ) \
                             ) \
                             REF ##test( \
@@ -455,7 +455,7 @@ class TestParserProcess(unittest.TestCase):
                             ) \
                             ANY[test]( \
                                 ref #test2( \
-                                    {__FIELDCONST_ : {'no'}}, is_optional_key = False \
+                                    {__FIELDCONST_ : {'no'}}, is_optional_key = False, is_any_value = False \
                                  ) \
                             ) \
                         ] \
@@ -466,7 +466,7 @@ class TestParserProcess(unittest.TestCase):
                             OR[ \
                                 ANY[test]( \
                                     ref #test( \
-                                        {__FIELDCONST_ : {'yes'}}, is_optional_key = False \
+                                        {__FIELDCONST_ : {'yes'}}, is_optional_key = False, is_any_value = False \
                                     ) \
                                 ) \
                                 REF ##test( \
@@ -483,7 +483,7 @@ class TestParserProcess(unittest.TestCase):
                         IMPL( \
                             ANY[test]( \
                                 ref #test( \
-                                    {__FIELDCONST_ : {'yes'}}, is_optional_key = False \
+                                    {__FIELDCONST_ : {'yes'}}, is_optional_key = False, is_any_value = False \
                                 ) \
                             ) \
                             => \
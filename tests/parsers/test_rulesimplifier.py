@@ -0,0 +1,107 @@
+import unittest
+import itertools
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.parsers.categorycatalogparser import CategoryCatalogParser
+from openlostcat.parsers.rulesimplifier import RuleSimplifier
+from openlostcat.operators.bool_operators import BoolAND, BoolOR, BoolNOT, BoolREF, BoolConst, BoolIMPL
+from openlostcat.operators.filter_operators import AtomicFilter, FilterAND, FilterOR, FilterNOT, FilterREF, \
+    FilterIMPL, FilterConst
+from openlostcat.operators.quantifier_operators import ANY, ALL
+from openlostcat.utils import to_tag_bundle_set
+from tests.engines import test_catalog_sources, test_locations
+
+
+class TestRuleSimplifier(unittest.TestCase):
+
+    tag_bundles = [{}, {"a": "x"}, {"a": "y"}, {"a": "z"}, {"b": "x"}, {"a": "x", "b": "y"}, {"a": ""}]
+
+    filters = [
+        FilterAND([FilterAND([AtomicFilter("a", ["x", "y"]), AtomicFilter("b", {})]), AtomicFilter("a", ["y", "z"])]),
+        FilterOR([AtomicFilter("a", "x"), FilterOR([AtomicFilter("a", None), AtomicFilter("b", "x")])]),
+        FilterAND([AtomicFilter("a", {}), AtomicFilter("a", ["x", None])]),
+        FilterOR([AtomicFilter("a", {}), AtomicFilter("a", None)]),
+        FilterAND([AtomicFilter("a", "x"), AtomicFilter("a", "y")]),
+        FilterOR([AtomicFilter("a", ""), AtomicFilter("a", None)]),
+        FilterNOT(FilterNOT(AtomicFilter("a", "x"))),
+        FilterNOT(FilterAND([AtomicFilter("a", {}), AtomicFilter("b", None)])),
+        FilterNOT(FilterOR([AtomicFilter("a", "x"), AtomicFilter("b", None)])),
+        FilterIMPL([AtomicFilter("a", {}), AtomicFilter("a", "x")]),
+        FilterREF("$ref", FilterAND([FilterConst(True), AtomicFilter("b", "y")])),
+        FilterOR([FilterConst(False), FilterNOT(FilterConst(True))]),
+        FilterAND([AtomicFilter("a", "x"), FilterNOT(FilterConst(False))])
+    ]
+
+    def test_filter_equivalence(self):
+        """Test that the simplified filters match the same tag bundles as the original ones
+        """
+        simplifier = RuleSimplifier()
+        for op in self.filters:
+            simplified = simplifier.simplify(op)
+            for tag_bundle in to_tag_bundle_set(self.tag_bundles):
+                with self.subTest(op=str(op), tag_bundle=tag_bundle):
+                    self.assertEqual(op.matches(tag_bundle), simplified.matches(tag_bundle))
+
+    def test_filter_rewriting(self):
+        """Test the simplified forms of the filters
+        """
+        simplifier = RuleSimplifier()
+        self.assertEqual(FilterAND([AtomicFilter("a", "y"), AtomicFilter("b", {})]),
+                         simplifier.simplify(self.filters[0]))
+        self.assertEqual(FilterOR([AtomicFilter("a", ["x", None]), AtomicFilter("b", "x")]),
+                         simplifier.simplify(self.filters[1]))
+        self.assertEqual(AtomicFilter("a", "x"), simplifier.simplify(self.filters[2]))
+        self.assertEqual(FilterConst(True), simplifier.simplify(self.filters[3]))
+        self.assertEqual(FilterConst(False), simplifier.simplify(self.filters[4]))
+        self.assertEqual(FilterOR([AtomicFilter("a", ""), AtomicFilter("a", None)]),
+                         simplifier.simplify(self.filters[5]))
+        self.assertEqual(AtomicFilter("a", "x"), simplifier.simplify(self.filters[6]))
+        self.assertEqual(FilterOR([AtomicFilter("a", None), AtomicFilter("b", {})]),
+                         simplifier.simplify(self.filters[7]))
+        self.assertEqual(FilterNOT(FilterOR([AtomicFilter("a", "x"), AtomicFilter("b", None)])),
+                         simplifier.simplify(self.filters[8]))
+        self.assertEqual(AtomicFilter("a", ["x", None]), simplifier.simplify(self.filters[9]))
+        self.assertEqual(AtomicFilter("b", "y"), simplifier.simplify(self.filters[10]))
+        self.assertEqual(FilterConst(False), simplifier.simplify(self.filters[11]))
+        self.assertEqual(AtomicFilter("a", "x"), simplifier.simplify(self.filters[12]))
+
+    def test_bool_rewriting(self):
+        """Test the simplified forms of category(bool)-level operators
+        """
+        simplifier = RuleSimplifier()
+        quantifier = ANY(None, AtomicFilter("a", "x"))
+        self.assertEqual(quantifier, simplifier.simplify(
+            BoolAND([BoolConst(True), BoolNOT(BoolNOT(quantifier))])))
+        self.assertEqual(BoolConst(True), simplifier.simplify(BoolOR([quantifier, BoolNOT(BoolConst(False))])))
+        self.assertEqual(BoolOR([BoolNOT(quantifier), ALL(None, AtomicFilter("b", "y"))]),
+                         simplifier.simplify(BoolIMPL([quantifier, ALL(None, AtomicFilter("b", "y"))])))
+        self.assertEqual(BoolAND([quantifier, ANY(None, AtomicFilter("b", "y"))]), simplifier.simplify(
+            BoolAND([quantifier, BoolAND([ANY(None, AtomicFilter("b", "y")), quantifier])])))
+        self.assertEqual(BoolConst(False), simplifier.simplify(ANY(None, FilterConst(False))))
+        self.assertEqual(BoolConst(True), simplifier.simplify(ALL(None, FilterNOT(FilterConst(False)))))
+        self.assertEqual(BoolConst(False), simplifier.simplify(BoolREF("#ref", BoolAND([BoolConst(False)]))))
+
+    def test_names(self):
+        """Test that given names are kept, generated quantifier names are generated again for the simplified filter
+        """
+        simplifier = RuleSimplifier()
+        ref = simplifier.simplify(BoolREF("##ref", ANY("__ANY_named", FilterAND([AtomicFilter("a", "x")]))))
+        self.assertEqual("##ref", ref.name)
+        self.assertEqual("__ANY_named", ref.bool_operator.name)
+        self.assertEqual(ANY(None, AtomicFilter("a", "x")),
+                         simplifier.simplify(ANY(None, FilterAND([AtomicFilter("a", "x")]))))
+
+    def test_same_result_as_original(self):
+        """Test that the simplified catalogs categorize the locations the same way as the original ones
+        """
+        for source, engine in itertools.product(test_catalog_sources, ["interpreter", "compiled"]):
+            original = MainOsmCategorizer(source, engine=engine)
+            simplified = MainOsmCategorizer(source, engine=engine, category_catalog_parser=CategoryCatalogParser(
+                rule_simplifier=RuleSimplifier()))
+            for location in test_locations:
+                osm_json = {"elements": [{"tags": tags} for tags in location]}
+                with self.subTest(source=source, engine=engine, location=location):
+                    self.assertEqual(original.categorize(osm_json), simplified.categorize(osm_json))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+from openlostcat.main_osm_categorizer import MainOsmCategorizer
+from openlostcat.operators.bool_operators import BoolAND, BoolNOT, BoolConst, BoolIMPL
+from openlostcat.operators.filter_operators import AtomicFilter, FilterAND, FilterOR, FilterConst
+from openlostcat.operators.quantifier_operators import ANY, ALL
+from openlostcat.parsers.subexpressionsharer import SubexpressionSharer
+
+
+class TestSubexpressionSharer(unittest.TestCase):
+
+    catalog_json = {
+        "type": "CategoryRuleCollection",
+        "properties": {"evaluationStrategy": "all"},
+        "categoryRules": [
+            {"first": {"highway": ["primary", "secondary"], "surface": "asphalt"}},
+            {"second": [{"highway": ["secondary", "primary"], "surface": "asphalt"}, {"landuse": "residential"}]},
+            {"third": {"__NOT_": {"highway": ["primary", "secondary"], "surface": "asphalt"}}},
+            {"fourth": {"__IMPL_": [{"landuse": "residential"}, {"surface": "asphalt"}]}}
+        ]
+    }
+
+    def test_structural_equality(self):
+        """Test that operators with the same type, parameters and operands are equal with equal hashes
+        """
+        self.assertEqual(AtomicFilter("a", ["x", "y"]), AtomicFilter("a", ["y", "x"]))
+        self.assertEqual(hash(AtomicFilter("a", ["x", "y"])), hash(AtomicFilter("a", ["y", "x"])))
+        self.assertNotEqual(AtomicFilter("a", "x"), AtomicFilter("a", ["x", None]))
+        self.assertNotEqual(AtomicFilter("a", {}), AtomicFilter("b", {}))
+        self.assertEqual(FilterAND([AtomicFilter("a", "x"), FilterConst(True)]),
+                         FilterAND([AtomicFilter("a", "x"), FilterConst(True)]))
+        self.assertNotEqual(FilterAND([AtomicFilter("a", "x"), FilterConst(True)]),
+                            FilterOR([AtomicFilter("a", "x"), FilterConst(True)]))
+        self.assertEqual(ANY(None, AtomicFilter("a", "x")), ANY(None, AtomicFilter("a", "x")))
+        self.assertNotEqual(ANY(None, AtomicFilter("a", "x")), ALL(None, AtomicFilter("a", "x")))
+        self.assertNotEqual(ANY("__ANY_1", AtomicFilter("a", "x")), ANY("__ANY_2", AtomicFilter("a", "x")))
+        self.assertEqual(BoolIMPL([BoolConst(True), BoolNOT(BoolConst(False))]),
+                         BoolIMPL([BoolConst(True), BoolNOT(BoolConst(False))]))
+        self.assertNotEqual(BoolAND([BoolConst(True)]), BoolAND([BoolConst(False)]))
+
+    def test_sharing(self):
+        """Test that the identical subexpressions of the parsed categories are the same object
+        """
+        categories = MainOsmCategorizer(self.catalog_json).category_cat.categories
+        first_and = categories[0].rules.filter_operator
+        self.assertIs(first_and, categories[1].rules.bool_operators[0].filter_operator)
+        self.assertIs(first_and, categories[2].rules.filter_operator.filter_operator)
+        self.assertIs(categories[1].rules.bool_operators[1].filter_operator,
+                      categories[3].rules.filter_operator.filter_operators[0])
+        shared = SubexpressionSharer.get_shared_subexpressions([category.rules for category in categories])
+        self.assertIn(first_and, shared)
+        self.assertIn(categories[0].rules, shared)
+
+    def test_sharing_among_catalogs(self):
+        """Test that a sharer can share subexpressions among multiple category lists
+        """
+        sharer = SubexpressionSharer()
+        first = sharer.share(ANY(None, AtomicFilter("a", "x")))
+        self.assertIs(first, sharer.share(ANY(None, AtomicFilter("a", "x"))))
+        self.assertIs(first.filter_operator, sharer.share(ALL(None, AtomicFilter("a", "x"))).filter_operator)
+
+    def test_evaluated_once(self):
+        """Test that a shared quantified subexpression is evaluated only once for a location
+        """
+        osm_json = {"elements": [{"tags": {"highway": "primary", "surface": "asphalt"}},
+                                 {"tags": {"landuse": "residential"}}]}
+        categorizer = MainOsmCategorizer(self.catalog_json)
+        with patch.object(FilterAND, "any_match", autospec=True, side_effect=FilterAND.any_match) as and_any_match:
+            self.assertEqual([(0, "first"), (1, "second")], categorizer.categorize(osm_json))
+            # once for ANY in the first and second categories, once for ALL of its negation in the third category
+            self.assertEqual(and_any_match.call_count, 2)
+        self.assertEqual([(0, "first"), (1, "second")],
+                         MainOsmCategorizer(self.catalog_json, engine="compiled").categorize(osm_json))
+
+if __name__ == '__main__':
+    unittest.main()